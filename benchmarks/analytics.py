@@ -0,0 +1,102 @@
+"""
+Benchmark of campaigns.analytics against the per-row dict loops it replaced,
+on 100k and 1M monthly performance rows: the dashboard's month totals
+(aggregates.aggregate_by_month) and the full insights computation (month and
+campaign group-bys, weighted ROI, changes, moving average, trend score), each
+with NumPy and with the pure-Python fallback. Loading the rows into columns
+is timed on its own, as it dominates the NumPy path.
+
+    python benchmarks/analytics.py --rows 100000 1000000 --repeat 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from stub_upstream import iter_performance, make_campaigns  # noqa: E402
+
+MONTHS = 24
+
+
+def loop_aggregate_by_month(rows):
+    # aggregates.aggregate_by_month before the analytics module
+    aggregated = {}
+    for item in rows:
+        month = item['month']
+        if month not in aggregated:
+            aggregated[month] = {
+                'name': month, 'impressions': 0, 'clicks': 0, 'conversions': 0, 'spend': 0.0, 'revenue': 0.0
+            }
+        for field in ('impressions', 'clicks', 'conversions'):
+            aggregated[month][field] += item.get(field) or 0
+        for field in ('spend', 'revenue'):
+            aggregated[month][field] += float(item.get(field) or 0.0)
+    return sorted(aggregated.values(), key=lambda x: x['name'])
+
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+
+    from campaigns import analytics
+    from campaigns.aggregates import PERFORMANCE_AMOUNTS, PERFORMANCE_COUNTERS, aggregate_by_month
+    from campaigns.insights import build_insights
+
+    def without_numpy(function):
+        def run():
+            with mock.patch.object(analytics, '_numpy', False):
+                function()
+        return run
+
+    if analytics.get_numpy() is None:
+        print('numpy is not installed: only the loops and the pure-Python fallback are timed')
+
+    for size in args.rows:
+        campaigns = make_campaigns(-(-size // MONTHS))
+        rows = list(iter_performance(campaigns, MONTHS))[:size]
+        load = lambda: analytics.PerformanceFrame(  # noqa: E731
+            rows, ('month', 'campaign_id'), PERFORMANCE_COUNTERS + PERFORMANCE_AMOUNTS
+        )
+        # name -> (function, the case it is compared with); references run first
+        cases = {
+            'month totals, dict loop': (lambda: loop_aggregate_by_month(rows), None),
+            'month totals (python)': (without_numpy(lambda: aggregate_by_month(rows)), 'month totals, dict loop'),
+            'month totals (numpy)': (lambda: aggregate_by_month(rows), 'month totals, dict loop'),
+            'insights (python)': (without_numpy(lambda: build_insights(rows, 'clicks', 3, {})), None),
+            'insights (numpy)': (lambda: build_insights(rows, 'clicks', 3, {}), 'insights (python)'),
+            '  load columns (python)': (without_numpy(load), None),
+            '  load columns (numpy)': (load, '  load columns (python)'),
+        }
+        if analytics.get_numpy() is None:
+            cases = {case: entry for case, entry in cases.items() if 'numpy' not in case}
+
+        print(f'{len(rows)} rows ({len(campaigns)} campaigns x {MONTHS} months)')
+        best_ms = {}
+        for case, (function, reference) in cases.items():
+            best_ms[case], median = timed(function, args.repeat)
+            speedup = f'x{best_ms[reference] / best_ms[case]:.1f}' if reference else ''
+            print(f'  {case:26} best {best_ms[case]:9.1f}ms  median {median:9.1f}ms  {speedup}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Cold-start report for the serverless entry point: each run starts a fresh
+interpreter under `python -X importtime`, builds the WSGI app and serves one
+request against the PostgREST stub, like a lambda's first invocation.
+
+Reports wall time to the first response, time spent importing (in total and
+by top-level package), module count and peak RSS, for the full settings
+(config.wsgi) and the API-only ones (config.serverless).
+
+    python benchmarks/cold_start.py --runs 5 --json cold_start.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from harness import ROOT  # noqa: E402
+from stub_upstream import start_stub  # noqa: E402
+
+ENTRIES = {
+    'full': 'config.wsgi',
+    'api-only': 'config.serverless',
+}
+
+# Runs in the child: build the app and push one request through the WSGI callable
+CHILD = """
+import importlib, json, resource, sys, time
+started = time.perf_counter()
+application = importlib.import_module(sys.argv[1]).application
+booted = time.perf_counter()
+path, _, query = sys.argv[2].partition('?')
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SERVER_NAME': 'localhost',
+    'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_HOST': 'localhost', 'wsgi.url_scheme': 'http',
+    'wsgi.input': sys.stdin.buffer, 'wsgi.errors': sys.stderr, 'wsgi.version': (1, 0),
+    'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+status = []
+b''.join(application(environ, lambda line, headers, exc_info=None: status.append(line)))
+done = time.perf_counter()
+print(json.dumps({
+    'boot_ms': (booted - started) * 1000, 'first_request_ms': (done - booted) * 1000,
+    'status': status[0], 'modules': len(sys.modules),
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """Total import time and per top-level package self time, in ms, from -X importtime output."""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1000
+    return sum(packages.values()), packages
+
+
+def cold_start(entry, path, env):
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD, entry, path], cwd=ROOT,
+                             env=env, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    wall = (time.perf_counter() - started) * 1000
+    if process.returncode:
+        raise RuntimeError(f'{entry} failed:\n{process.stderr[-2000:]}')
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result['wall_ms'] = wall
+    result['import_ms'], result['packages'] = parse_importtime(process.stderr)
+    return result
+
+
+def summarize(runs, top):
+    median = {field: round(statistics.median(run[field] for run in runs), 1)
+              for field in ('wall_ms', 'boot_ms', 'first_request_ms', 'import_ms', 'modules', 'peak_rss_mb')}
+    packages = {}
+    for run in runs:
+        for package, ms in run['packages'].items():
+            packages.setdefault(package, []).append(ms)
+    heaviest = sorted(((statistics.median(times), package) for package, times in packages.items()), reverse=True)
+    median['status'] = runs[-1]['status']
+    median['top_packages'] = {package: round(ms, 1) for ms, package in heaviest[:top]}
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='cold starts per entry point (medians are reported)')
+    parser.add_argument('--path', default='/api/dashboard/stats/', help='the first request')
+    parser.add_argument('--top', type=int, default=10, help='heaviest packages to list')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    stub, upstream_url = start_stub(delay=0, campaigns=100, months=12)
+    # Each entry point picks its own settings module
+    env = {name: value for name, value in os.environ.items() if name != 'DJANGO_SETTINGS_MODULE'}
+    env.update(SUPABASE_URL=upstream_url, SUPABASE_SERVICE_ROLE_KEY='benchmark', DEBUG='False')
+    results = {}
+    try:
+        for name, entry in ENTRIES.items():
+            results[name] = summarize([cold_start(entry, args.path, env) for _ in range(args.runs)], args.top)
+            stats = results[name]
+            print(f"{name:9} {stats['status']:7} wall {stats['wall_ms']:7.1f}ms  boot {stats['boot_ms']:7.1f}ms  "
+                  f"first request {stats['first_request_ms']:7.1f}ms  imports {stats['import_ms']:7.1f}ms  "
+                  f"modules {stats['modules']:5.0f}  rss {stats['peak_rss_mb']:.1f}MB")
+            print('          ' + ', '.join(f'{package} {ms}ms' for package, ms in stats['top_packages'].items()))
+    finally:
+        stub.shutdown()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
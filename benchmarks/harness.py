@@ -0,0 +1,124 @@
+"""
+Helpers shared by the benchmarks: start the app under gunicorn, drive it
+with concurrent requests and summarise latency, throughput and memory.
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app, env, workers=1, worker_args=(), probe='/api/insights/trends/', timeout=30):
+    """
+    Run `app` (e.g. config.wsgi:application) under gunicorn with `env` added
+    to the environment. Returns (process, base URL) once `probe` answers.
+    gunicorn.conf.py applies, except that workers are never recycled:
+    recycling mid-run would time worker boots, not requests.
+    """
+    port = free_port()
+    command = [
+        sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers), '--log-level', 'warning', *worker_args, app,
+    ]
+    process = subprocess.Popen(command, cwd=ROOT, env={**os.environ, 'GUNICORN_MAX_REQUESTS': '0', **env})
+    base_url = f'http://127.0.0.1:{port}'
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(base_url + probe, timeout=5)
+            return process, base_url
+        except httpx.TransportError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{app} did not start')
+
+
+def stop_server(process):
+    process.terminate()
+    process.wait()
+
+
+def summarize(latencies, errors, duration):
+    total = len(latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if total > 1 else latencies * 99
+    return {
+        'requests': total,
+        'errors': errors,
+        'throughput_rps': round(total / duration, 1),
+        'p50_ms': round(quantiles[49] * 1000, 1),
+        'p95_ms': round(quantiles[94] * 1000, 1),
+        'p99_ms': round(quantiles[98] * 1000, 1),
+    }
+
+
+def run_load(base_url, make_request, total, concurrency, on_response=None):
+    """
+    Send `total` requests, `concurrency` at a time. `make_request(i)` returns
+    (method, path, httpx request kwargs); `on_response` sees every response.
+    Anything but a 2xx counts as an error.
+    """
+    latencies = []
+    errors = 0
+
+    with httpx.Client(base_url=base_url, limits=httpx.Limits(max_connections=concurrency), timeout=120) as client:
+        def one(i):
+            method, path, kwargs = make_request(i)
+            start = time.perf_counter()
+            try:
+                response = client.request(method, path, **kwargs)
+            except httpx.HTTPError:
+                return time.perf_counter() - start, None
+            elapsed = time.perf_counter() - start
+            if on_response:
+                on_response(response)
+            return elapsed, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            for elapsed, status in pool.map(one, range(total)):
+                latencies.append(elapsed)
+                errors += status is None or not 200 <= status < 300
+        duration = time.perf_counter() - started
+
+    return summarize(latencies, errors, duration)
+
+
+def _children(pid):
+    try:
+        return [int(child) for child in Path(f'/proc/{pid}/task/{pid}/children').read_text().split()]
+    except OSError:
+        return []
+
+
+def peak_rss_mb(pid):
+    """
+    Highest peak RSS (VmHWM) among a gunicorn master and its workers, in MB.
+    Linux only; None elsewhere. Read it before stopping the server.
+    """
+    peaks = []
+    for process in [pid, *_children(pid)]:
+        try:
+            status = Path(f'/proc/{process}/status').read_text()
+        except OSError:
+            continue
+        for line in status.splitlines():
+            if line.startswith('VmHWM:'):
+                peaks.append(int(line.split()[1]) / 1024)
+    return round(max(peaks), 1) if peaks else None
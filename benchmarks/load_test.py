@@ -0,0 +1,265 @@
+"""
+Load-test every route in campaigns/urls.py against datasets of growing size
+and report p50/p95/p99 latency, throughput and peak worker RSS per route.
+
+Backends:
+  orm   the app reads a database seeded by seed.py (CAMPAIGNS_DATA_BACKEND=orm);
+        a fresh SQLite file per size unless --database-url is given
+  stub  the app talks to stub_upstream.py, a PostgREST stand-in holding the
+        same dataset; --fallback drops the dashboard rollup and RPC so the
+        dashboard endpoints aggregate the raw rows in Python
+
+Sizes are monthly performance rows (campaigns x --months). Results are saved
+with --json; --compare flags routes that regressed against an earlier run.
+
+    python benchmarks/load_test.py --sizes 100,10000,100000 --json before.json
+    python benchmarks/load_test.py --backend stub --fallback --sizes 1000,100000,1000000
+    python benchmarks/load_test.py --sizes 100,10000 --compare before.json --json after.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from harness import ROOT, peak_rss_mb, run_load, start_server, stop_server  # noqa: E402
+from stub_upstream import start_stub  # noqa: E402
+
+CAMPAIGN = {
+    "name": "Load test", "platform": "Email", "status": "Draft", "budget": 100,
+    "start_date": "2026-01-01", "end_date": "2026-12-31", "goal": "Sales",
+}
+
+
+class Context:
+    """Dataset facts the routes need: seeded campaign ids, and campaigns and jobs created during the run."""
+
+    def __init__(self, campaigns):
+        self.campaigns = campaigns
+        self.created = []
+        self.jobs = []
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+
+    def campaign(self):
+        # Seeded ids are UUID(int=1..N), the same in both backends
+        with self._lock:
+            return str(uuid.UUID(int=self._random.randint(1, self.campaigns)))
+
+    def remember(self, response):
+        if response.status_code == 201:
+            with self._lock:
+                self.created.append(response.json()['id'])
+        elif response.status_code == 202:
+            with self._lock:
+                self.jobs.append(response.json()['id'])
+
+    def created_campaign(self):
+        with self._lock:
+            return self.created.pop() if self.created else str(uuid.uuid4())
+
+    def job(self):
+        # One queued by the async ingest route, which runs first
+        with self._lock:
+            return self._random.choice(self.jobs) if self.jobs else str(uuid.uuid4())
+
+
+def _performance(month):
+    return {"month": f"2030-{month:02d}-01", "impressions": 1000, "clicks": 50, "conversions": 5,
+            "spend": 100, "revenue": 150}
+
+
+def _ingest_body(ctx):
+    lines = [{"campaign_id": ctx.campaign(), **_performance(month)} for month in range(1, 13)]
+    return "\n".join(json.dumps(line) for line in lines)
+
+
+# name -> (request builder, options). `heavy` routes return the whole table and
+# get a tenth of the requests; `orm` ones need the Django tables (the job queue),
+# which only the orm backend's database has.
+ROUTES = {
+    'campaigns list': (lambda ctx, i: ('GET', '/api/campaigns/?limit=20', {}), {}),
+    'campaigns list filtered': (lambda ctx, i: ('GET', '/api/campaigns/?limit=20&status=Active&platform=Email', {}), {}),
+    'campaigns list by roi': (lambda ctx, i: ('GET', '/api/campaigns/?limit=20&ordering=-roi&min_ctr=1', {}), {}),
+    'campaigns search': (lambda ctx, i: ('GET', f'/api/campaigns/?limit=20&search=Campaign {i % 100}', {}), {}),
+    'campaigns list all': (lambda ctx, i: ('GET', '/api/campaigns/', {}), {'heavy': True}),
+    'campaign detail': (lambda ctx, i: ('GET', f'/api/campaigns/{ctx.campaign()}/', {}), {}),
+    'campaign performance': (lambda ctx, i: ('GET', f'/api/campaigns/{ctx.campaign()}/performance/', {}), {}),
+    'campaigns compare': (
+        lambda ctx, i: ('GET', f"/api/campaigns/compare/?ids={','.join(ctx.campaign() for _ in range(20))}", {}), {}
+    ),
+    'dashboard stats': (lambda ctx, i: ('GET', '/api/dashboard/stats/', {}), {}),
+    'dashboard performance': (lambda ctx, i: ('GET', '/api/dashboard/performance/', {}), {}),
+    'dashboard performance filtered': (
+        lambda ctx, i: ('GET', '/api/dashboard/performance/?from=2020-03&to=2020-09&platform=Email', {}), {}
+    ),
+    'insights trends': (lambda ctx, i: ('GET', '/api/insights/trends/', {}), {}),
+    'news search': (lambda ctx, i: ('POST', '/api/news/search/', {'json': {'query': f'topic {i % 10}'}}), {}),
+    'export campaigns': (lambda ctx, i: ('GET', '/api/export/campaigns/', {}), {'heavy': True}),
+    'export performance': (
+        lambda ctx, i: ('GET', f'/api/export/performance/?format=ndjson&campaign_id={ctx.campaign()}', {}), {}
+    ),
+    'campaign create': (lambda ctx, i: ('POST', '/api/campaigns/', {'json': CAMPAIGN}), {}),
+    'campaign update': (lambda ctx, i: ('PATCH', f'/api/campaigns/{ctx.campaign()}/', {'json': {'budget': 100 + i}}), {}),
+    'campaign performance put': (
+        lambda ctx, i: ('PUT', f'/api/campaigns/{ctx.campaign()}/performance/',
+                        {'json': [_performance(month) for month in (1, 2, 3)]}), {}
+    ),
+    'performance ingest': (
+        lambda ctx, i: ('POST', '/api/performance/ingest',
+                        {'content': _ingest_body(ctx), 'headers': {'Content-Type': 'application/x-ndjson'}}), {}
+    ),
+    # Stages the body and queues a job; nothing runs the jobs during the load test
+    'performance ingest async': (
+        lambda ctx, i: ('POST', '/api/performance/ingest?async=true',
+                        {'content': _ingest_body(ctx), 'headers': {'Content-Type': 'application/x-ndjson'}}),
+        {'orm': True}
+    ),
+    'jobs list': (lambda ctx, i: ('GET', '/api/jobs', {}), {'orm': True}),
+    'job detail': (lambda ctx, i: ('GET', f'/api/jobs/{ctx.job()}', {}), {'orm': True}),
+    'campaigns bulk': (
+        lambda ctx, i: ('POST', '/api/campaigns/bulk', {'json': {'create': [CAMPAIGN, CAMPAIGN]}}), {}
+    ),
+    'campaign delete': (lambda ctx, i: ('DELETE', f'/api/campaigns/{ctx.created_campaign()}/', {}), {}),
+}
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed_database(database_url, campaigns, months, rollup):
+    command = [sys.executable, str(Path(__file__).with_name('seed.py')), '--campaigns', str(campaigns),
+               '--months', str(months), '--database-url', database_url]
+    subprocess.run(command + ([] if rollup else ['--no-rollup']), cwd=ROOT, check=True)
+
+
+def run_size(args, size, workdir):
+    campaigns = max(1, math.ceil(size / args.months))
+    started = time.perf_counter()
+    env = {
+        'CAMPAIGNS_CACHE_BACKEND': 'local' if args.cache else 'none',
+        'SUPABASE_SERVICE_ROLE_KEY': 'benchmark',
+        'SUPABASE_POOL_SIZE': str(args.threads),
+        'RAPIDAPI_KEY': 'benchmark',
+        # Measure the proxy, not its upstream rate limit
+        'NEWS_RATE_LIMIT': '10000',
+        'NEWS_RATE_BURST': '10000',
+        'DEBUG': 'False',
+    }
+
+    if args.backend == 'stub':
+        stub, upstream_url = start_stub(delay=args.delay, campaigns=campaigns, months=args.months,
+                                        rollups=not args.fallback)
+        env.update(SUPABASE_URL=upstream_url, NEWS_SEARCH_URL=f'{upstream_url}/search')
+    else:
+        database_url = args.database_url or f'sqlite:///{workdir}/bench-{size}.sqlite3'
+        seed_database(database_url, campaigns, args.months, rollup=not args.fallback)
+        # Only the news search goes upstream
+        stub, upstream_url = start_stub(delay=args.delay, campaigns=0, months=0)
+        env.update(CAMPAIGNS_DATA_BACKEND='orm', DATABASE_URL=database_url, DATABASE_CONN_MAX_AGE='60',
+                   MEDIA_ROOT=f'{workdir}/media-{size}', SUPABASE_URL=upstream_url, NEWS_SEARCH_URL=f'{upstream_url}/search')
+    seconds = round(time.perf_counter() - started, 1)
+
+    result = {'performance_rows': campaigns * args.months, 'campaigns': campaigns, 'months': args.months,
+              'setup_s': seconds, 'routes': {}}
+    try:
+        process, base_url = start_server(
+            'config.wsgi:application', env, args.workers, ['--worker-class', 'gthread', '--threads', str(args.threads)]
+        )
+        try:
+            ctx = Context(campaigns)
+            for name, (build, options) in ROUTES.items():
+                if args.routes and name not in args.routes:
+                    continue
+                if options.get('orm') and args.backend != 'orm':
+                    continue
+                total = max(5, args.requests // 10) if options.get('heavy') else args.requests
+                stats = run_load(base_url, lambda i: build(ctx, i), total, args.concurrency, on_response=ctx.remember)
+                stats['peak_rss_mb'] = peak_rss_mb(process.pid)
+                result['routes'][name] = stats
+                print(f"{result['performance_rows']:>8} rows  {name:32} {stats['throughput_rps']:>8} req/s  "
+                      f"p50 {stats['p50_ms']}ms  p95 {stats['p95_ms']}ms  p99 {stats['p99_ms']}ms  "
+                      f"errors {stats['errors']}  rss {stats['peak_rss_mb']}MB", flush=True)
+            result['peak_rss_mb'] = peak_rss_mb(process.pid)
+        finally:
+            stop_server(process)
+    finally:
+        stub.shutdown()
+    return result
+
+
+def compare(previous, current, threshold):
+    """Print routes whose p95 rose or throughput fell by more than `threshold`; returns how many."""
+    before = {(run['performance_rows'], name): stats
+              for run in previous['runs'] for name, stats in run['routes'].items()}
+    regressions = 0
+    for run in current['runs']:
+        for name, stats in run['routes'].items():
+            if (old := before.get((run['performance_rows'], name))) is None:
+                continue
+            p95 = stats['p95_ms'] / old['p95_ms'] - 1 if old['p95_ms'] else 0
+            throughput = 1 - stats['throughput_rps'] / old['throughput_rps'] if old['throughput_rps'] else 0
+            regressed = p95 > threshold or throughput > threshold
+            regressions += regressed
+            print(f"{'REGRESSED' if regressed else 'ok':9} {run['performance_rows']:>8} rows  {name:32} "
+                  f"p95 {old['p95_ms']} -> {stats['p95_ms']}ms ({p95:+.0%})  "
+                  f"throughput {old['throughput_rps']} -> {stats['throughput_rps']} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=('orm', 'stub'), default='orm')
+    parser.add_argument('--sizes', default='100,10000,100000',
+                        help='comma-separated monthly performance row counts (up to 1000000)')
+    parser.add_argument('--months', type=int, default=12, help='months of performance per campaign')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--delay', type=float, default=0.005, help='stub round-trip latency in seconds')
+    parser.add_argument('--database-url', help='orm backend: seed and use this scratch database instead of SQLite')
+    parser.add_argument('--fallback', action='store_true', help='run without the dashboard rollup (and RPC on the stub)')
+    parser.add_argument('--cache', action='store_true', help='keep the response cache on')
+    parser.add_argument('--routes', nargs='*', choices=list(ROUTES), help='only these routes')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='earlier --json results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative change counted as a regression')
+    args = parser.parse_args()
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'options': {name: value for name, value in vars(args).items() if name not in ('json', 'compare')},
+        'runs': [],
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(size) for size in args.sizes.split(',')):
+            results['runs'].append(run_size(args, size, workdir))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    if args.compare:
+        sys.exit(1 if compare(json.loads(Path(args.compare).read_text()), results, args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
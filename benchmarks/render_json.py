@@ -0,0 +1,104 @@
+"""
+Microbenchmark of response serialization on large payloads: the old path
+(a float() pass over every campaign row, then DRF's stdlib-json renderer)
+against campaigns.renderers.FastJSONRenderer, with and without orjson. The
+ETag hash of a cacheable response is timed the same way.
+
+    python benchmarks/render_json.py --rows 10000 --repeat 20
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from stub_upstream import make_campaigns, make_performance  # noqa: E402
+
+
+def format_campaign(data):
+    # The per-row coercion the list and detail views used to run before rendering
+    if 'budget' in data:
+        data['budget'] = float(data['budget'])
+    if 'amount_spent' in data:
+        data['amount_spent'] = float(data['amount_spent'])
+    if 'roi' in data and data['roi'] is not None:
+        data['roi'] = float(data['roi'])
+    return data
+
+
+def old_etag(data):
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def best_ms(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+    from rest_framework.renderers import JSONRenderer
+
+    from campaigns import renderers
+    from campaigns.renderers import FastJSONRenderer, dumps
+
+    campaigns = make_campaigns(args.rows)
+    # Integral budgets, as PostgREST sends double precision values like 1000.0
+    for row in campaigns:
+        row['budget'] = int(row['budget'])
+    payloads = {
+        'campaigns': campaigns,
+        'performance': make_performance(campaigns[:math.ceil(args.rows / 12)], 12)[:args.rows],
+    }
+
+    def without_orjson(function):
+        def run():
+            with mock.patch.object(renderers, 'orjson', None):
+                function()
+        return run
+
+    for name, rows in payloads.items():
+        # Only campaign rows went through format_campaign, which coerced them in place
+        copies = [dict(row) for row in rows]
+        coerce = format_campaign if name == 'campaigns' else None
+        cases = {
+            'before (drf json)': lambda: JSONRenderer().render([coerce(row) for row in copies] if coerce else rows),
+            'fast renderer (orjson)': lambda: FastJSONRenderer().render(rows),
+            'fast renderer (stdlib)': without_orjson(lambda: FastJSONRenderer().render(rows)),
+            'etag before': lambda: old_etag(rows),
+            'etag (orjson)': lambda: hashlib.sha1(dumps(rows, sort_keys=True)).hexdigest(),
+        }
+        if renderers.orjson is None:
+            del cases['fast renderer (orjson)'], cases['etag (orjson)']
+
+        print(f'{name}: {len(rows)} rows, {len(JSONRenderer().render(rows)) / 1024:.0f} KiB')
+        baseline = None
+        for case, function in cases.items():
+            best, median = best_ms(function, args.repeat)
+            if case.startswith('etag before') or baseline is None:
+                baseline = best
+            print(f'  {case:26} best {best:8.2f}ms  median {median:8.2f}ms  x{baseline / best:.1f}')
+
+
+if __name__ == '__main__':
+    main()
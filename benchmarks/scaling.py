@@ -0,0 +1,113 @@
+"""
+How throughput scales with gunicorn worker processes under the production
+settings in gunicorn.conf.py (preloaded app, gthread workers). Seeds one
+SQLite database with the ORM backend, then serves it with 1, 2, 4, ... workers
+up to the available CPUs and drives the CPU-bound routes (aggregation loops
+and large JSON responses) at a fixed concurrency. Reports req/s per worker
+count, the speedup over one worker and the efficiency per worker.
+
+The response cache is off and the dashboard rollup is dropped, so every
+request does its full work. Run it on a machine with several idle cores; a
+single-core machine can only show the cost of the extra workers.
+
+    python benchmarks/scaling.py --rows 100000 --workers 1 2 4 8 --json scaling.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from harness import peak_rss_mb, run_load, start_server, stop_server  # noqa: E402
+from load_test import ROUTES, Context, git_commit, seed_database  # noqa: E402
+
+# Routes whose time goes to Python work in the worker rather than waiting on a database
+CPU_ROUTES = ('insights trends', 'dashboard performance', 'campaigns compare', 'campaigns list all')
+
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers():
+    # Powers of two up to the CPU count, and the CPU count itself
+    cpus = available_cpus()
+    counts = {cpus}
+    count = 1
+    while count < cpus:
+        counts.add(count)
+        count *= 2
+    return sorted(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000, help='monthly performance rows to seed')
+    parser.add_argument('--months', type=int, default=12, help='months of performance per campaign')
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers())
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--concurrency', type=int, help='requests in flight (default: 4 per worker of the largest run)')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route and worker count')
+    parser.add_argument('--routes', nargs='*', choices=list(ROUTES), default=list(CPU_ROUTES))
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+    args.workers = sorted(set(args.workers))
+    concurrency = args.concurrency or 4 * max(args.workers)
+
+    campaigns = max(1, math.ceil(args.rows / args.months))
+    results = {
+        'commit': git_commit(),
+        'cpus': available_cpus(),
+        'options': {**{name: value for name, value in vars(args).items() if name != 'json'},
+                    'concurrency': concurrency},
+        'runs': [],
+    }
+    print(f"{campaigns * args.months} rows, {results['cpus']} CPUs, concurrency {concurrency}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database_url = f'sqlite:///{workdir}/scaling.sqlite3'
+        seed_database(database_url, campaigns, args.months, rollup=False)
+        env = {
+            'CAMPAIGNS_DATA_BACKEND': 'orm',
+            'DATABASE_URL': database_url,
+            'DATABASE_CONN_MAX_AGE': '60',
+            'CAMPAIGNS_CACHE_BACKEND': 'none',
+            'DEBUG': 'False',
+        }
+
+        baseline = {}
+        for workers in args.workers:
+            # gunicorn.conf.py is picked up from the repository root; these flags override its counts
+            process, base_url = start_server('config.wsgi:application', env, workers, ['--threads', str(args.threads)])
+            run = {'workers': workers, 'routes': {}}
+            try:
+                ctx = Context(campaigns)
+                for name in args.routes:
+                    build, _ = ROUTES[name]
+                    stats = run_load(base_url, lambda i: build(ctx, i), args.requests, concurrency)
+                    baseline.setdefault(name, stats['throughput_rps'])
+                    speedup = stats['throughput_rps'] / baseline[name] if baseline[name] else 0
+                    # Relative to the smallest worker count, per worker added on top of it
+                    efficiency = speedup / (workers / args.workers[0])
+                    stats.update(speedup=round(speedup, 2), efficiency=round(efficiency, 2))
+                    run['routes'][name] = stats
+                    print(f"{workers:>3} workers  {name:24} {stats['throughput_rps']:>8} req/s  "
+                          f"x{stats['speedup']:<5} efficiency {stats['efficiency']:.0%}  "
+                          f"p95 {stats['p95_ms']}ms  errors {stats['errors']}", flush=True)
+                run['peak_rss_mb'] = peak_rss_mb(process.pid)
+            finally:
+                stop_server(process)
+            results['runs'].append(run)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Seed a database with N campaigns x M months of monthly performance, the same
+dataset stub_upstream.py serves, for running the API with the ORM backend.
+Migrates first; the campaign tables are emptied, so use a scratch database.
+
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 python benchmarks/seed.py --campaigns 1000 --months 12
+"""
+import argparse
+import os
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from stub_upstream import iter_performance, make_campaigns  # noqa: E402
+
+BATCH_SIZE = 5000
+
+
+def seed(campaigns, months, rollup=True):
+    from django.db import transaction
+
+    from campaigns.models import Campaign, DashboardStats, MonthlyPerformance
+    from campaigns.repository import OrmRepository
+
+    rows = make_campaigns(campaigns)
+    with transaction.atomic():
+        DashboardStats.objects.all().delete()
+        MonthlyPerformance.objects.all().delete()
+        Campaign.objects.all().delete()
+
+        Campaign.objects.bulk_create(
+            (Campaign(**{column: value for column, value in row.items() if column != 'created_at'}) for row in rows),
+            batch_size=BATCH_SIZE,
+        )
+        # Let the database assign ids so its sequence stays usable for later inserts
+        performances = (
+            MonthlyPerformance(**{column: value for column, value in row.items() if column != 'id'})
+            for row in iter_performance(rows, months)
+        )
+        while batch := list(islice(performances, BATCH_SIZE)):
+            MonthlyPerformance.objects.bulk_create(batch)
+
+        if rollup:
+            # No rollup row yet, so this aggregates the tables
+            DashboardStats.objects.create(id=1, **OrmRepository().dashboard_stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--campaigns', type=int, default=100)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--database-url', help='defaults to $DATABASE_URL')
+    parser.add_argument('--no-rollup', action='store_true', help='leave the dashboard stats rollup unbuilt')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    if not os.environ.get('DATABASE_URL'):
+        # Never seed the project's own db.sqlite3 by accident
+        parser.error('set DATABASE_URL or pass --database-url')
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    from django.core.management import call_command
+    django.setup()
+    call_command('migrate', verbosity=0)
+
+    started = time.perf_counter()
+    seed(args.campaigns, args.months, rollup=not args.no_rollup)
+    print(f'Seeded {args.campaigns} campaigns x {args.months} months in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""
+Minimal stand-in for Supabase's PostgREST API, used by the benchmarks so they
+can run without network access. Every request sleeps for `delay` seconds to
+model the round trip to a hosted database, then returns canned rows.
+
+Reads honour eq/in/gt/gte/lt/lte filters plus limit and offset; other filters
+are ignored. Writes are not stored: inserts echo the request body, updates and
+deletes return the matching rows. `/search` answers like the news search API.
+"""
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+PLATFORMS = ['Google Ads', 'Facebook', 'Instagram', 'LinkedIn', 'Email']
+STATUSES = ['Active', 'Paused', 'Completed', 'Draft']
+
+# Query params that are not column filters
+RESERVED_PARAMS = {'select', 'order', 'limit', 'offset', 'on_conflict', 'columns', 'or', 'and'}
+
+COMPARISONS = {
+    'gt': lambda a, b: a > b,
+    'gte': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'lte': lambda a, b: a <= b,
+}
+
+NOT_FOUND = object()
+
+
+def make_campaigns(count):
+    return [{
+        "id": str(uuid.UUID(int=i + 1)),
+        "name": f"Campaign {i}",
+        "description": "Benchmark campaign",
+        "platform": PLATFORMS[i % len(PLATFORMS)],
+        "status": STATUSES[i % len(STATUSES)],
+        "budget": 1000.0 + i,
+        "amount_spent": 0.0,
+        "start_date": "2026-01-01",
+        "end_date": "2026-12-31",
+        "target_audience": None,
+        "goal": "Sales",
+        "roi": None,
+        "created_at": f"2026-01-01T00:00:{i % 60:02d}+00:00",
+    } for i in range(count)]
+
+
+def iter_performance(campaigns, months):
+    # Generator form of make_performance, for seeding large datasets without holding them in memory
+    pk = 0
+    for campaign in campaigns:
+        for month in range(months):
+            pk += 1
+            spend = 100.0 + month
+            revenue = 150.0 + 2 * month
+            yield {
+                "id": pk,
+                "campaign_id": campaign["id"],
+                "month": f"{2020 + month // 12}-{month % 12 + 1:02d}-01",
+                "impressions": 1000 + month,
+                "clicks": 100 + month,
+                "conversions": 10,
+                "spend": spend,
+                "revenue": revenue,
+                "roi": round((revenue - spend) / spend * 100, 2),
+            }
+
+
+def make_performance(campaigns, months):
+    return list(iter_performance(campaigns, months))
+
+
+def _coerce(value, like):
+    # Filter values arrive as strings; compare them as the column's type
+    if isinstance(like, bool) or not isinstance(like, (int, float)):
+        return value
+    return float(value)
+
+
+def _matches(row, column, condition):
+    op, _, value = condition.partition('.')
+    current = row.get(column)
+    if current is None:
+        return False
+    if op == 'eq':
+        return current == _coerce(value, current)
+    if op == 'in':
+        values = [item.strip().strip('"') for item in value.strip('()').split(',')]
+        return current in {_coerce(item, current) for item in values}
+    if op in COMPARISONS:
+        return COMPARISONS[op](current, _coerce(value, current))
+    return True
+
+
+class StubData:
+    """
+    Rows served by the stub. With `rollups=False` the dashboard stats row and
+    the monthly aggregation RPC are missing, so the app takes its fallback
+    paths and aggregates the raw rows in Python.
+    """
+
+    def __init__(self, campaigns=100, months=12, rollups=True):
+        self.campaigns = make_campaigns(campaigns)
+        self.performance = make_performance(self.campaigns, months)
+        self.rollups = rollups
+        self.stats = {
+            "id": 1,
+            "total_campaigns": len(self.campaigns),
+            "active_campaigns": sum(1 for c in self.campaigns if c["status"] == "Active"),
+            "paused_campaigns": 0,
+            "completed_campaigns": 0,
+            "draft_campaigns": 0,
+            "total_budget": sum(c["budget"] for c in self.campaigns),
+            "spend_sum": sum(p["spend"] for p in self.performance),
+            "revenue_sum": sum(p["revenue"] for p in self.performance),
+        }
+        monthly = {}
+        for row in self.performance:
+            month = monthly.setdefault(row["month"], {"month": row["month"], "impressions": 0, "clicks": 0,
+                                                      "conversions": 0, "spend": 0.0, "revenue": 0.0})
+            for field in ("impressions", "clicks", "conversions", "spend", "revenue"):
+                month[field] += row[field]
+        self.monthly = sorted(monthly.values(), key=lambda row: row["month"])
+        # Lifetime totals the KPI triggers keep on each campaign, and the breakdown grouped over them
+        campaigns = {c["id"]: c for c in self.campaigns}
+        for c in self.campaigns:
+            c["total_spend"] = c["total_revenue"] = 0.0
+        for row in self.performance:
+            campaigns[row["campaign_id"]]["total_spend"] += row["spend"]
+            campaigns[row["campaign_id"]]["total_revenue"] += row["revenue"]
+        breakdown = {}
+        for c in self.campaigns:
+            for dimension in ("platform", "status"):
+                group = breakdown.setdefault((dimension, c[dimension]), {
+                    "dimension": dimension, "value": c[dimension], "campaigns": 0, "budget": 0.0, "spend": 0.0,
+                    "revenue": 0.0,
+                })
+                group["campaigns"] += 1
+                group["budget"] += c["budget"]
+                group["spend"] += c["total_spend"]
+                group["revenue"] += c["total_revenue"]
+        self.breakdown = sorted(breakdown.values(), key=lambda row: (row["dimension"], row["value"]))
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def rows(self, resource):
+        if resource == 'campaigns_campaign':
+            return self.campaigns
+        if resource == 'campaigns_monthlyperformance':
+            return self.performance
+        if resource == 'campaigns_dashboardstats' and self.rollups:
+            return [self.stats]
+        return None
+
+    def rpc(self, function):
+        if function == 'dashboard_monthly_performance' and self.rollups:
+            return self.monthly
+        if function == 'dashboard_breakdown' and self.rollups:
+            return self.breakdown
+        if function == 'apply_dashboard_stats_delta':
+            return None
+        return NOT_FOUND
+
+    def _index(self, resource, column):
+        # Equality lookups on id / campaign_id would otherwise scan up to 1M rows per request
+        key = (resource, column)
+        if key not in self._indexes:
+            with self._lock:
+                if key not in self._indexes:
+                    index = {}
+                    for row in self.rows(resource):
+                        index.setdefault(str(row[column]), []).append(row)
+                    self._indexes[key] = index
+        return self._indexes[key]
+
+    def select(self, resource, params):
+        rows = self.rows(resource)
+        if rows is None:
+            return None
+        filters = [(column, value) for column, value in params if column not in RESERVED_PARAMS]
+        for position, (column, condition) in enumerate(filters):
+            op, _, value = condition.partition('.')
+            if column in ('id', 'campaign_id') and op in ('eq', 'in'):
+                # Start from the indexed rows, then apply the other filters
+                index = self._index(resource, column)
+                keys = [item.strip().strip('"') for item in value.strip('()').split(',')] if op == 'in' else [value]
+                rows = [row for key in dict.fromkeys(keys) for row in index.get(key, [])]
+                del filters[position]
+                break
+        for column, condition in filters:
+            rows = [row for row in rows if _matches(row, column, condition)]
+
+        options = dict(params)
+        offset = int(options.get('offset', 0))
+        if 'limit' in options:
+            return rows[offset:offset + int(options['limit'])]
+        return rows[offset:]
+
+
+def make_handler(data, delay):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def respond(self):
+            time.sleep(delay)
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length)) if length else None
+
+            url = urlsplit(self.path)
+            params = parse_qsl(url.query, keep_blank_values=True)
+            match = re.match(r'^/rest/v1/(rpc/)?([a-z_]+)', url.path)
+            result = NOT_FOUND
+            if url.path.rstrip('/') == '/search':
+                result = {"status": "OK", "data": []}
+            elif match and match.group(1):
+                result = data.rpc(match.group(2))
+            elif match and (rows := data.select(match.group(2), params)) is not None:
+                if self.command == 'POST':
+                    # Insert/upsert: echo what was sent, as `Prefer: return=representation` would
+                    result = payload if isinstance(payload, list) else [payload]
+                elif self.command == 'PATCH':
+                    result = [{**row, **(payload or {})} for row in rows]
+                else:
+                    result = rows
+
+            if result is NOT_FOUND:
+                # Unknown tables and RPC functions behave like a schema without them
+                result = {"code": "PGRST202", "message": "Not found in the stub", "details": None, "hint": None}
+                status = 404
+            else:
+                status = 200
+
+            encoded = json.dumps(result).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        do_GET = do_POST = do_PATCH = do_DELETE = respond
+
+    return Handler
+
+
+def start_stub(delay=0.05, campaigns=100, months=12, port=0, rollups=True):
+    """Start the stub in a background thread; returns (server, base URL)."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(StubData(campaigns, months, rollups), delay))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
@@ -0,0 +1,77 @@
+"""
+Compare the sync (gunicorn threads, WSGI) and async (uvicorn worker, ASGI)
+servers on the upstream-bound read endpoints.
+
+Supabase is replaced by a local PostgREST stub that sleeps `--delay` seconds
+per request, so the numbers measure how well each server overlaps waiting on
+the network rather than the speed of a remote database.
+
+    python benchmarks/wsgi_vs_asgi.py --requests 500 --concurrency 64 --json results.json
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from harness import run_load, start_server, stop_server  # noqa: E402
+from stub_upstream import start_stub  # noqa: E402
+
+PATHS = ('/api/dashboard/stats/', '/api/dashboard/performance/')
+
+SERVERS = {
+    'wsgi': ['--worker-class', 'gthread', '--threads', '8', 'config.wsgi:application'],
+    'asgi': ['--worker-class', 'uvicorn_worker.UvicornWorker', 'config.asgi:application'],
+}
+
+
+def start(kind, upstream_url, workers, pool_size):
+    env = {
+        'SUPABASE_URL': upstream_url,
+        'SUPABASE_SERVICE_ROLE_KEY': 'benchmark',
+        'SUPABASE_POOL_SIZE': str(pool_size),
+        'CAMPAIGNS_CACHE_BACKEND': 'none',
+        'CAMPAIGNS_ASYNC_VIEWS': str(kind == 'asgi'),
+        'DEBUG': 'False',
+    }
+    return start_server(SERVERS[kind][-1], env, workers, SERVERS[kind][:-1], probe=PATHS[0])
+
+
+def run_path(base_url, path, total, concurrency):
+    return run_load(base_url, lambda _: ('GET', path, {}), total, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--delay', type=float, default=0.05, help='simulated upstream latency in seconds')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--pool-size', type=int, default=32, help='SUPABASE_POOL_SIZE for each worker')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    stub, upstream_url = start_stub(delay=args.delay)
+    results = {'delay_s': args.delay, 'concurrency': args.concurrency, 'workers': args.workers,
+               'pool_size': args.pool_size, 'servers': {}}
+    try:
+        for kind in SERVERS:
+            process, base_url = start(kind, upstream_url, args.workers, args.pool_size)
+            try:
+                results['servers'][kind] = {path: run_path(base_url, path, args.requests, args.concurrency) for path in PATHS}
+            finally:
+                stop_server(process)
+    finally:
+        stub.shutdown()
+
+    for kind, paths in results['servers'].items():
+        for path, stats in paths.items():
+            print(f"{kind:5} {path:32} {stats['throughput_rps']:>8} req/s  "
+                  f"p50 {stats['p50_ms']}ms  p95 {stats['p95_ms']}ms  p99 {stats['p99_ms']}ms  errors {stats['errors']}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
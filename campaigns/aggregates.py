@@ -0,0 +1,133 @@
+import logging
+from datetime import date
+
+
+from . import supabase_client
+from .analytics import PerformanceFrame
+from .pagination import MAX_ROWS, afetch_all, iter_keyset
+from .tracing import traced
+
+logger = logging.getLogger(__name__)
+
+PERFORMANCE_TABLE = 'campaigns_monthlyperformance'
+PERFORMANCE_COUNTERS = ('impressions', 'clicks', 'conversions')
+PERFORMANCE_AMOUNTS = ('spend', 'revenue')
+
+
+def parse_month(value):
+    # Accept "YYYY-MM" as well as full "YYYY-MM-DD" dates
+    if len(value) == 7:
+        value = f'{value}-01'
+    return date.fromisoformat(value)
+
+
+def _parse_date_param(value):
+    try:
+        return parse_month(value)
+    except ValueError:
+        raise ValueError("Dates must be formatted as YYYY-MM or YYYY-MM-DD")
+
+
+def parse_performance_filters(params):
+    """
+    Read the optional `from`, `to`, `platform` and `campaign_id` query params.
+    Raises ValueError on malformed dates.
+    """
+    filters = {}
+    if date_from := params.get('from'):
+        filters['from'] = _parse_date_param(date_from).isoformat()
+    if date_to := params.get('to'):
+        filters['to'] = _parse_date_param(date_to).isoformat()
+    if platform := params.get('platform'):
+        filters['platform'] = platform
+    if campaign_id := params.get('campaign_id'):
+        filters['campaign_id'] = campaign_id
+    return filters
+
+
+def empty_month(month):
+    return {
+        "name": month,
+        "impressions": 0,
+        "clicks": 0,
+        "conversions": 0,
+        "spend": 0.0,
+        "revenue": 0.0
+    }
+
+
+@traced('aggregate')
+def aggregate_by_month(rows):
+    # In-Python fallback: sums every metric per month, sorted by month
+    months, totals = PerformanceFrame(rows, ('month',), PERFORMANCE_COUNTERS + PERFORMANCE_AMOUNTS).sum_by('month')
+    result = [empty_month(month) for month in months]
+    for field in PERFORMANCE_COUNTERS:
+        for row, value in zip(result, totals[field]):
+            row[field] = int(value)
+    for field in PERFORMANCE_AMOUNTS:
+        for row, value in zip(result, totals[field]):
+            row[field] = value
+    return result
+
+
+def format_month_row(row):
+    result = empty_month(row['month'])
+    for field in PERFORMANCE_COUNTERS:
+        result[field] = int(row.get(field) or 0)
+    for field in PERFORMANCE_AMOUNTS:
+        result[field] = float(row.get(field) or 0.0)
+    return result
+
+
+def monthly_performance_rpc(supabase, filters):
+    # One row per month, summed by the `dashboard_monthly_performance` function in schema.sql
+    return supabase.rpc('dashboard_monthly_performance', {
+        'p_from': filters.get('from'),
+        'p_to': filters.get('to'),
+        'p_platform': filters.get('platform'),
+        'p_campaign_id': filters.get('campaign_id'),
+    })
+
+
+def monthly_performance_rows(supabase, filters, columns=('month',)):
+    # Raw rows for the in-Python fallback; works with the sync and async clients
+    columns = ','.join(columns + PERFORMANCE_COUNTERS + PERFORMANCE_AMOUNTS)
+    if 'platform' in filters:
+        columns += ',campaigns_campaign!inner(platform)'
+
+    query = supabase.table(PERFORMANCE_TABLE).select(columns)
+    if 'from' in filters:
+        query = query.gte('month', filters['from'])
+    if 'to' in filters:
+        query = query.lte('month', filters['to'])
+    if 'campaign_id' in filters:
+        query = query.eq('campaign_id', filters['campaign_id'])
+    if 'platform' in filters:
+        query = query.eq('campaigns_campaign.platform', filters['platform'])
+    return query
+
+
+def fetch_monthly_performance(supabase, filters, chunk_size=MAX_ROWS):
+    """
+    Monthly totals across campaigns. Aggregation runs in Postgres when the
+    RPC function is installed; otherwise the rows are read in pages and
+    summed here.
+    """
+    try:
+        return [format_month_row(row) for row in monthly_performance_rpc(supabase, filters).execute().data]
+    except supabase_client.APIError as e:
+        logger.warning("dashboard_monthly_performance RPC unavailable, aggregating in Python: %s", e.message)
+    return aggregate_by_month(list(iter_keyset(
+        lambda: monthly_performance_rows(supabase, filters, ('id', 'month')), 'id', chunk_size
+    )))
+
+
+async def afetch_monthly_performance(supabase, filters, chunk_size=MAX_ROWS):
+    # fetch_monthly_performance() for the async client
+    try:
+        return [format_month_row(row) for row in (await monthly_performance_rpc(supabase, filters).execute()).data]
+    except supabase_client.APIError as e:
+        logger.warning("dashboard_monthly_performance RPC unavailable, aggregating in Python: %s", e.message)
+    return aggregate_by_month(await afetch_all(
+        lambda: monthly_performance_rows(supabase, filters, ('id', 'month')), 'id', chunk_size
+    ))
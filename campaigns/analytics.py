@@ -0,0 +1,177 @@
+"""
+Columnar analytics over performance rows. PerformanceFrame turns a list of
+row dicts into one float column per metric plus integer codes per grouping
+key, so group-bys run as NumPy bincounts and the series helpers (weighted
+ROI, month-over-month change, moving averages, trend scores) as array
+operations. NumPy is optional: without it the same functions run as plain
+Python loops and return the same values.
+"""
+import math
+from operator import itemgetter
+
+_numpy = None
+
+
+def get_numpy():
+    # Imported on first use, keeping it off the cold-start path; None when not installed
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def _factorize(values, np):
+    # Sorted distinct values, and each value's index among them
+    index = {}
+    add = index.setdefault
+    if np is None:
+        codes = [add(value, len(index)) for value in values]
+    else:
+        codes = np.fromiter((add(value, len(index)) for value in values), dtype=np.intp, count=len(values))
+    labels = sorted(index)
+    rank = [0] * len(labels)
+    for position, label in enumerate(labels):
+        rank[index[label]] = position
+    if np is None:
+        return labels, [rank[code] for code in codes]
+    return labels, np.asarray(rank, dtype=np.intp)[codes]
+
+
+def _column(rows, metric, np):
+    # One metric of every row as floats, missing and null values as zero
+    if np is None:
+        return [float(row.get(metric) or 0) for row in rows]
+    try:
+        values = np.fromiter(map(itemgetter(metric), rows), dtype=float, count=len(rows))
+    except KeyError:
+        values = np.array([row.get(metric) for row in rows], dtype=float)
+    # Nulls arrive as NaN
+    return np.nan_to_num(values, copy=False)
+
+
+class PerformanceFrame:
+    """
+    `rows` as columns: for each of `keys`, its sorted distinct values
+    (`labels[key]`) and every row's index into them (`codes[key]`); for each
+    of `metrics`, every row's value as a float (`columns[metric]`), with
+    missing and null values as zero.
+    """
+
+    def __init__(self, rows, keys, metrics):
+        self.np = np = get_numpy()
+        rows = rows if isinstance(rows, list) else list(rows)
+        self.size = len(rows)
+        self.labels, self.codes = {}, {}
+        for key in keys:
+            self.labels[key], self.codes[key] = _factorize(list(map(itemgetter(key), rows)), np)
+        self.columns = {metric: _column(rows, metric, np) for metric in metrics}
+
+    def sum_by(self, key, label=None, labels=None):
+        """
+        Metric totals per value of `key`: (labels, {metric: [total per label]}).
+        `label` maps each distinct value to its group (e.g. the month a date
+        falls in). `labels` fixes the groups and their order: absent groups
+        are zero and values outside them are dropped.
+        """
+        groups = self.labels[key]
+        if label is not None:
+            groups = [label(value) for value in groups]
+        if labels is None:
+            labels = sorted(set(groups))
+        position = {group: index for index, group in enumerate(labels)}
+        # Values outside `labels` land in one extra bucket that is cut off
+        target = [position.get(group, len(labels)) for group in groups]
+        size = len(labels) + 1
+
+        np = self.np
+        if np is not None:
+            codes = np.asarray(target, dtype=np.intp)[self.codes[key]]
+            return labels, {
+                metric: np.bincount(codes, weights=column, minlength=size)[:-1].tolist()
+                for metric, column in self.columns.items()
+            }
+
+        codes = [target[code] for code in self.codes[key]]
+        totals = {}
+        for metric, column in self.columns.items():
+            sums = [0.0] * size
+            for code, value in zip(codes, column):
+                sums[code] += value
+            totals[metric] = sums[:-1]
+        return labels, totals
+
+
+def weighted_roi(spend, revenue):
+    """
+    ROI of each group as a percentage of its own spend, (revenue - spend) /
+    spend * 100 rounded to 2 places; 0 without spend. Summing spend and
+    revenue before dividing weights every row by its spend.
+    """
+    np = get_numpy()
+    if np is None:
+        return [round((r - s) / s * 100, 2) if s > 0 else 0.0 for s, r in zip(spend, revenue)]
+    spend, revenue = np.asarray(spend, dtype=float), np.asarray(revenue, dtype=float)
+    divisor = np.where(spend > 0, spend, 1.0)
+    return np.round(np.where(spend > 0, (revenue - spend) / divisor * 100, 0.0), 2).tolist()
+
+
+def _optional(values):
+    # NaN marks a missing value
+    return [None if math.isnan(value) else round(value, 2) for value in values.tolist()]
+
+
+def month_over_month(values):
+    # Percentage change of each value from the previous one; None for the first and after a zero
+    np = get_numpy()
+    if np is None:
+        return [None] * min(1, len(values)) + [
+            round((value - previous) / previous * 100, 2) if previous > 0 else None
+            for previous, value in zip(values, values[1:])
+        ]
+    values = np.asarray(values, dtype=float)
+    previous = values[:-1]
+    divisor = np.where(previous > 0, previous, 1.0)
+    return [None] * min(1, len(values)) + _optional(np.where(previous > 0, (values[1:] - previous) / divisor * 100, np.nan))
+
+
+def moving_average(values, window):
+    # Trailing mean over `window` values; None until a full window is available
+    np = get_numpy()
+    if np is None:
+        return [None] * min(window - 1, len(values)) + [
+            round(sum(values[end - window:end]) / window, 2) for end in range(window, len(values) + 1)
+        ]
+    values = np.asarray(values, dtype=float)
+    # One shifted add per offset sums each window in order, like the loop
+    count = max(len(values) - window + 1, 0)
+    sums = sum(values[offset:offset + count] for offset in range(window))
+    return [None] * min(window - 1, len(values)) + _optional(sums / window)
+
+
+def trend_score(values):
+    """
+    Direction of `values` over evenly spaced periods: (score, growth). Growth
+    is the least-squares slope as a percentage of the mean value per period;
+    the 0-100 score maps it through tanh, so that a flat series scores 50
+    and steady 5% growth about 73.
+    """
+    n = len(values)
+    np = get_numpy()
+    if np is None:
+        mean = sum(values) / n if n else 0.0
+        centre = (n - 1) / 2
+        covariance = sum((x - centre) * (y - mean) for x, y in enumerate(values))
+        variance = sum((x - centre) ** 2 for x in range(n))
+    else:
+        y = np.asarray(values, dtype=float)
+        x = np.arange(n, dtype=float) - (n - 1) / 2
+        mean = float(y.mean()) if n else 0.0
+        covariance, variance = float(x @ (y - mean)), float(x @ x)
+    if n < 2 or mean <= 0:
+        return 50, 0.0
+    growth = covariance / variance / mean
+    return round(50 * (1 + math.tanh(growth * 10))), round(growth * 100, 2)
@@ -1,5 +1,10 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class CampaignsConfig(AppConfig):
     name = 'campaigns'
+
+    def ready(self):
+        from .jobs import start_worker
+        request_started.connect(start_worker, dispatch_uid='campaigns.jobs.start_worker')
@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from .cache import cache_response
+from .news import news_search_request
+from .periods import parse_period_filters
+from .renderers import JSONResponse
+from .repository import get_repository
+from .rollups import format_stats
+from .views import news_response
+
+# Async counterparts of the upstream-bound read views, served when ASYNC_VIEWS
+# is on (i.e. under ASGI). They share the sync views' response cache, ETags
+# and repository; its async methods run independent queries concurrently, and
+# a worker keeps serving other requests while waiting on Supabase.
+
+class AsyncDashboardStatsView(View):
+    @cache_response('dashboard')
+    async def get(self, request):
+        repository = get_repository()
+        stats, breakdown = await asyncio.gather(repository.adashboard_stats(), repository.astats_breakdown())
+        return JSONResponse(format_stats(stats, breakdown))
+
+
+class AsyncDashboardPerformanceView(View):
+    @cache_response('dashboard')
+    async def get(self, request):
+        try:
+            filters = parse_period_filters(request.GET)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status=400)
+
+        if 'granularity' in filters:
+            return JSONResponse(await get_repository().aperiod_performance(filters))
+        return JSONResponse(await get_repository().amonthly_performance(filters))
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncNewsSearchView(View):
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({"error": "Request body must be JSON"}, status=400)
+        querystring, headers = news_search_request(data)
+
+        # The proxy's cache, coalescing and rate limit are shared with the sync view, so it runs in a thread
+        data, code, headers = await sync_to_async(news_response, thread_sensitive=False)(querystring, headers)
+        response = JsonResponse(data, status=code, safe=False)
+        for name, value in (headers or {}).items():
+            response[name] = value
+        return response
@@ -0,0 +1,216 @@
+import uuid
+from datetime import date, datetime
+
+from django.conf import settings
+
+from . import supabase_client
+from .rollups import campaign_stats_delta, merge_deltas, performance_stats_delta
+from .serializers import CampaignSerializer
+
+CAMPAIGN_TABLE = 'campaigns_campaign'
+PERFORMANCE_TABLE = 'campaigns_monthlyperformance'
+OPERATIONS = ('create', 'upsert', 'delete')
+
+
+def prepare_campaign(data):
+    # Convert date/datetime/UUID objects to strings for JSON serialization
+    for key, value in data.items():
+        if isinstance(value, (date, datetime)):
+            data[key] = value.isoformat()
+        if isinstance(value, uuid.UUID):
+            data[key] = str(value)
+    data.setdefault('status', 'Draft')
+    return data
+
+
+def _error(op, index, errors, pk=None):
+    return {"op": op, "index": index, "id": pk, "status": "error", "errors": errors}
+
+
+def _validate_campaigns(items):
+    """
+    Validate a list of campaigns with CampaignSerializer(many=True).
+    Returns {index: validated data} for valid items and {index: errors} for the rest.
+    """
+    serializer = CampaignSerializer(data=items, many=True)
+    if serializer.is_valid():
+        return dict(enumerate(serializer.validated_data)), {}
+
+    # Older DRF versions return a list aligned with the input, newer ones a dict keyed by index
+    errors = serializer.errors
+    pairs = errors.items() if isinstance(errors, dict) else enumerate(errors)
+    errors = {int(index): item_errors for index, item_errors in pairs if item_errors}
+    valid = [index for index in range(len(items)) if index not in errors]
+    # DRF drops all validated data when any item fails, so re-run on the valid subset
+    serializer = CampaignSerializer(data=[items[index] for index in valid], many=True)
+    serializer.is_valid(raise_exception=True)
+    return dict(zip(valid, serializer.validated_data)), errors
+
+
+def _parse_uuid(value):
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
+
+
+def validate_operations(payload):
+    """
+    Split a bulk payload into prepared create/upsert rows and delete ids.
+    Returns (operations, errors); each operation and error is tagged with its
+    op name and index in the request so results can be reported per item.
+    Raises ValueError if the payload itself is malformed.
+    """
+    if not isinstance(payload, dict) or not any(op in payload for op in OPERATIONS):
+        raise ValueError("Expected an object with 'create', 'upsert' and/or 'delete' lists")
+    for op in OPERATIONS:
+        if not isinstance(payload.get(op, []), list):
+            raise ValueError(f"'{op}' must be a list")
+
+    total = sum(len(payload.get(op, [])) for op in OPERATIONS)
+    max_operations = getattr(settings, 'CAMPAIGN_BULK_MAX_OPERATIONS', 10000)
+    if total > max_operations:
+        raise ValueError(f"At most {max_operations} operations are allowed per request")
+
+    operations = {op: [] for op in OPERATIONS}
+    errors = []
+
+    valid, invalid = _validate_campaigns(payload.get('create', []))
+    for index, data in valid.items():
+        data = prepare_campaign(data)
+        data.setdefault('id', str(uuid.uuid4()))
+        data.setdefault('created_at', datetime.now().isoformat())
+        operations['create'].append((index, data))
+    errors.extend(_error('create', index, item_errors) for index, item_errors in invalid.items())
+
+    upserts = payload.get('upsert', [])
+    ids = [_parse_uuid(item.get('id')) if isinstance(item, dict) else None for item in upserts]
+    valid, invalid = _validate_campaigns(upserts)
+    for index, data in valid.items():
+        if ids[index] is None:
+            errors.append(_error('upsert', index, {"id": ["A valid campaign id is required."]}))
+            continue
+        operations['upsert'].append((index, {**prepare_campaign(data), 'id': ids[index]}))
+    errors.extend(_error('upsert', index, item_errors, ids[index]) for index, item_errors in invalid.items())
+
+    for index, value in enumerate(payload.get('delete', [])):
+        if pk := _parse_uuid(value):
+            operations['delete'].append((index, pk))
+        else:
+            errors.append(_error('delete', index, {"id": ["A valid campaign id is required."]}, value))
+
+    return operations, errors
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def chunk_errors(op, chunk, detail):
+    # Every item of a chunk whose write failed, reported with the backend's message
+    return [_error(op, index, {"detail": detail}, item if op == 'delete' else item['id']) for index, item in chunk]
+
+
+def execute_chunked(supabase, operations, chunk_size):
+    """
+    Run each operation type as batched PostgREST calls of `chunk_size` rows.
+    A failing chunk marks its items as errors and the remaining chunks still run.
+    Returns (results, rollup delta).
+    """
+    results = []
+    deltas = []
+
+    for chunk in chunks(operations['create'], chunk_size):
+        try:
+            rows = supabase.table(CAMPAIGN_TABLE).insert([data for _, data in chunk], default_to_null=False).execute().data
+        except supabase_client.APIError as e:
+            results.extend(chunk_errors('create', chunk, e.message))
+            continue
+        deltas.append(campaign_stats_delta([], rows))
+        results.extend({"op": "create", "index": index, "id": data['id'], "status": "created"} for index, data in chunk)
+
+    for chunk in chunks(operations['upsert'], chunk_size):
+        ids = [data['id'] for _, data in chunk]
+        try:
+            before = supabase.table(CAMPAIGN_TABLE).select('id,status,budget').in_('id', ids).execute().data
+            rows = supabase.table(CAMPAIGN_TABLE).upsert([data for _, data in chunk], on_conflict='id').execute().data
+        except supabase_client.APIError as e:
+            results.extend(chunk_errors('upsert', chunk, e.message))
+            continue
+        deltas.append(campaign_stats_delta(before, rows))
+        existing = {row['id'] for row in before}
+        results.extend(
+            {"op": "upsert", "index": index, "id": data['id'], "status": "updated" if data['id'] in existing else "created"}
+            for index, data in chunk
+        )
+
+    for chunk in chunks(operations['delete'], chunk_size):
+        ids = [pk for _, pk in chunk]
+        try:
+            # Monthly performance rows are removed by ON DELETE CASCADE, so capture their spend and revenue first
+            performances = supabase.table(PERFORMANCE_TABLE)\
+                .select('spend,revenue').in_('campaign_id', ids).execute().data
+            rows = supabase.table(CAMPAIGN_TABLE).delete().in_('id', ids).execute().data
+        except supabase_client.APIError as e:
+            results.extend(chunk_errors('delete', chunk, e.message))
+            continue
+        deltas.append(merge_deltas(campaign_stats_delta(rows, []), performance_stats_delta(performances, [])))
+        deleted = {row['id'] for row in rows}
+        results.extend(
+            {"op": "delete", "index": index, "id": pk, "status": "deleted" if pk in deleted else "not_found"}
+            for index, pk in chunk
+        )
+
+    return results, merge_deltas(*deltas)
+
+
+def execute_atomic(supabase, operations):
+    """
+    Apply every operation in one transaction via the `bulk_apply_campaigns`
+    function in schema.sql; any failure rolls back the whole request.
+    Returns (results, rollup delta). Raises APIError on failure.
+    """
+    upsert_ids = [data['id'] for _, data in operations['upsert']]
+    delete_ids = [pk for _, pk in operations['delete']]
+
+    before = []
+    if upsert_ids:
+        before = supabase.table(CAMPAIGN_TABLE).select('id,status,budget').in_('id', upsert_ids).execute().data
+    performances = []
+    if delete_ids:
+        performances = supabase.table(PERFORMANCE_TABLE)\
+            .select('spend,revenue').in_('campaign_id', delete_ids).execute().data
+
+    applied = supabase.rpc('bulk_apply_campaigns', {
+        'p_create': [data for _, data in operations['create']],
+        'p_upsert': [data for _, data in operations['upsert']],
+        'p_delete': delete_ids,
+    }).execute().data
+
+    existing = {row['id'] for row in before}
+    deleted = {row['id'] for row in applied['deleted']}
+    results = [{"op": "create", "index": index, "id": data['id'], "status": "created"} for index, data in operations['create']]
+    results.extend(
+        {"op": "upsert", "index": index, "id": data['id'], "status": "updated" if data['id'] in existing else "created"}
+        for index, data in operations['upsert']
+    )
+    results.extend(
+        {"op": "delete", "index": index, "id": pk, "status": "deleted" if pk in deleted else "not_found"}
+        for index, pk in operations['delete']
+    )
+
+    delta = merge_deltas(
+        campaign_stats_delta([], applied['created']),
+        campaign_stats_delta(before, applied['upserted']),
+        campaign_stats_delta(applied['deleted'], []),
+        performance_stats_delta(performances, []),
+    )
+    return results, delta
+
+
+def summarize(results):
+    summary = {"created": 0, "updated": 0, "deleted": 0, "not_found": 0, "error": 0}
+    for result in results:
+        summary[result['status']] += 1
+    return summary
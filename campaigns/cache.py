@@ -0,0 +1,346 @@
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+from .renderers import JSONResponse, dumps
+
+DEFAULT_CACHE_SETTINGS = {
+    'BACKEND': 'local',
+    'TTL': 30,
+    'MAX_ENTRIES': 1024,
+    'ALIAS': 'default',
+    'IDEMPOTENCY_TTL': 86400,
+    'IDEMPOTENCY_MAX_ENTRIES': 10000,
+}
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# Seconds a claimed key stays claimed, so a worker that dies mid-request does not block it for the whole TTL
+IDEMPOTENCY_CLAIM_TTL = 60
+
+
+class LocalBackend:
+    """In-process LRU cache with per-entry TTL. Safe to share between request threads."""
+
+    shared = False
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generations = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        # Set `key` only if it holds no live entry; True when it was set
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                return False
+            self._set(key, value, ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _set(self, key, value, ttl):
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def generations(self, scopes):
+        with self._lock:
+            return [self._generations.get(scope, 0) for scope in scopes]
+
+    def bump(self, scopes):
+        with self._lock:
+            for scope in scopes:
+                self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+class SharedBackend:
+    """Any Django cache (Redis, Memcached, ...), so invalidations reach every worker."""
+
+    shared = True
+
+    def __init__(self, alias, ttl, prefix='response'):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.cache.get(f'{self.prefix}:{key}')
+
+    def set(self, key, value, ttl=None):
+        self.cache.set(f'{self.prefix}:{key}', value, self.ttl if ttl is None else ttl)
+
+    def add(self, key, value, ttl=None):
+        # Atomic in Redis (SET NX) and Memcached
+        return self.cache.add(f'{self.prefix}:{key}', value, self.ttl if ttl is None else ttl)
+
+    def delete(self, key):
+        self.cache.delete(f'{self.prefix}:{key}')
+
+    def generations(self, scopes):
+        keys = [f'generation:{scope}' for scope in scopes]
+        values = self.cache.get_many(keys)
+        return [values.get(key, 0) for key in keys]
+
+    def bump(self, scopes):
+        for scope in scopes:
+            key = f'generation:{scope}'
+            # Generations never expire; an evicted one restarts at a fresh value
+            if not self.cache.add(key, int(time.time() * 1000), None):
+                self.cache.incr(key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class NullBackend:
+    shared = False
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def add(self, key, value, ttl=None):
+        return True
+
+    def delete(self, key):
+        pass
+
+    def generations(self, scopes):
+        return [0] * len(scopes)
+
+    def bump(self, scopes):
+        pass
+
+    def clear(self):
+        pass
+
+
+_backend = None
+_idempotency_store = None
+_backend_lock = threading.Lock()
+
+
+def cache_options():
+    return {**DEFAULT_CACHE_SETTINGS, **getattr(settings, 'CAMPAIGNS_CACHE', {})}
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                options = cache_options()
+                if options['BACKEND'] == 'django':
+                    _backend = SharedBackend(options['ALIAS'], options['TTL'])
+                elif options['BACKEND'] == 'none':
+                    _backend = NullBackend()
+                else:
+                    _backend = LocalBackend(options['MAX_ENTRIES'], options['TTL'])
+    return _backend
+
+
+def get_idempotency_store():
+    # Idempotency-Key records, apart from the responses so read traffic cannot evict them before their TTL
+    global _idempotency_store
+    if _idempotency_store is None:
+        with _backend_lock:
+            if _idempotency_store is None:
+                options = cache_options()
+                if options['BACKEND'] == 'django':
+                    _idempotency_store = SharedBackend(options['ALIAS'], options['IDEMPOTENCY_TTL'], 'idempotency')
+                elif options['BACKEND'] == 'none':
+                    _idempotency_store = NullBackend()
+                else:
+                    _idempotency_store = LocalBackend(options['IDEMPOTENCY_MAX_ENTRIES'], options['IDEMPOTENCY_TTL'])
+    return _idempotency_store
+
+
+def reset_backend():
+    global _backend, _idempotency_store
+    with _backend_lock:
+        _backend = None
+        _idempotency_store = None
+
+
+def invalidate(*scopes):
+    """
+    Drop every cached response that depends on any of `scopes`. Entries are
+    keyed by their scopes' generation numbers, so bumping a generation makes
+    them unreachable; the LRU/TTL reclaims them later.
+    """
+    get_backend().bump(scopes)
+
+
+def make_etag(data):
+    return '"' + hashlib.sha1(dumps(data, sort_keys=True)).hexdigest() + '"'
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+def _cache_key(request, scopes, generations):
+    # request.GET rather than query_params, so DRF and plain Django views share entries
+    params = sorted((key, value) for key in request.GET for value in request.GET.getlist(key))
+    versions = ','.join(f'{scope}@{generation}' for scope, generation in zip(scopes, generations))
+    raw = f"{request.path.rstrip('/')}?{params}|{versions}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _lookup(backend, request, scopes, kwargs):
+    # (cache key, cached (data, etag) or None) for a request
+    scope_names = [scope(**kwargs) if callable(scope) else scope for scope in scopes]
+    key = _cache_key(request, scope_names, backend.generations(scope_names))
+    return key, backend.get(key)
+
+
+def _conditional(request, cached, response_class):
+    data, etag = cached
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request, etag):
+        return response_class(None, status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return response_class(data, headers=headers)
+
+
+def cache_response(*scopes):
+    """
+    Cache successful GET responses of a view method, keyed by path, normalized
+    query params and the generations of `scopes`. A scope is a string, or a
+    callable receiving the URL kwargs (e.g. `lambda pk: f'campaign:{pk}'`).
+    Adds an ETag and answers a matching If-None-Match with 304. Wraps DRF
+    methods returning Response, and async Django methods returning
+    renderers.JSONResponse; both kinds share the cached entries.
+    """
+    def decorator(method):
+        if iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(view, request, *args, **kwargs):
+                if request.method != 'GET':
+                    return await method(view, request, *args, **kwargs)
+
+                backend = get_backend()
+                key, cached = await _off_loop(backend, _lookup, backend, request, scopes, kwargs)
+                if cached is None:
+                    response = await method(view, request, *args, **kwargs)
+                    if response.status_code != status.HTTP_200_OK:
+                        return response
+                    cached = (response.data, make_etag(response.data))
+                    await _off_loop(backend, backend.set, key, cached)
+                return _conditional(request, cached, JSONResponse)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method != 'GET':
+                return method(view, request, *args, **kwargs)
+
+            backend = get_backend()
+            key, cached = _lookup(backend, request, scopes, kwargs)
+            if cached is None:
+                response = method(view, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cached = (response.data, make_etag(response.data))
+                backend.set(key, cached)
+            return _conditional(request, cached, Response)
+        return wrapper
+    return decorator
+
+
+async def _off_loop(backend, function, *args):
+    # A shared backend does network I/O, so it runs in a thread rather than on the event loop
+    if backend.shared:
+        return await sync_to_async(function, thread_sensitive=False)(*args)
+    return function(*args)
+
+
+def idempotent(method):
+    """
+    Answer a write retried with the same Idempotency-Key header from the
+    stored response of the first attempt instead of running it again. Keys
+    are scoped to the method and path and kept for IDEMPOTENCY_TTL seconds;
+    reusing one with a different body is refused with 422. The first attempt
+    claims its key atomically, and a retry arriving while it still runs gets
+    409. Only successful responses are stored, so a failed attempt can be
+    retried as is.
+    """
+    @functools.wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or not idempotency_key:
+            return method(view, request, *args, **kwargs)
+
+        store = get_idempotency_store()
+        raw = f"{request.method} {request.path.rstrip('/')}|{idempotency_key}"
+        key = hashlib.sha1(raw.encode()).hexdigest()
+        fingerprint = hashlib.sha1(dumps(request.data, sort_keys=True)).hexdigest()
+
+        # (fingerprint, None, None) marks a claimed key whose first attempt is still running
+        if not store.add(key, (fingerprint, None, None), IDEMPOTENCY_CLAIM_TTL):
+            stored = store.get(key)
+            stored_fingerprint, status_code, data = stored or (fingerprint, None, None)
+            if stored_fingerprint != fingerprint:
+                return Response(
+                    {"error": f"{IDEMPOTENCY_HEADER} was already used with a different request body"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if status_code is None:
+                return Response(
+                    {"error": f"A request with this {IDEMPOTENCY_HEADER} is still in progress"},
+                    status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'},
+                )
+            return Response(data, status=status_code, headers={'Idempotent-Replayed': 'true'})
+
+        response = None
+        try:
+            response = method(view, request, *args, **kwargs)
+        finally:
+            # A failed or raising attempt releases the claim, so it can be retried as is
+            if response is not None and status.is_success(response.status_code):
+                store.set(key, (fingerprint, response.status_code, response.data), cache_options()['IDEMPOTENCY_TTL'])
+            else:
+                store.delete(key)
+        return response
+    return wrapper
@@ -0,0 +1,133 @@
+import uuid
+from datetime import date
+
+from .aggregates import PERFORMANCE_AMOUNTS, PERFORMANCE_COUNTERS, PERFORMANCE_TABLE
+from .periods import ROLLUP_TABLE, parse_period_filters, period_start, roi
+from .tracing import traced
+
+COMPARE_METRICS = PERFORMANCE_COUNTERS + PERFORMANCE_AMOUNTS
+
+# Months between consecutive periods of each granularity
+PERIOD_MONTHS = {'month': 1, 'quarter': 3, 'year': 12}
+
+# Longest explicit from/to window, in periods; the zero-filled series span all of it
+MAX_PERIODS = 600
+
+
+def period_column(filters):
+    # Monthly rows are keyed by `month`, rollup rows by `period_start`
+    return 'period_start' if 'granularity' in filters else 'month'
+
+
+def periods_between(first, last, granularity):
+    """ISO dates of every period from the one containing `first` through `last`."""
+    step = PERIOD_MONTHS[granularity]
+    current = period_start(first, granularity)
+    periods = []
+    while current <= last:
+        periods.append(current.isoformat())
+        months = current.month - 1 + step
+        current = date(current.year + months // 12, months % 12 + 1, 1)
+    return periods
+
+
+def parse_compare_params(params, max_ids):
+    """
+    Campaign ids from `ids` (comma-separated, or repeated) in request order,
+    plus the parse_period_filters() window. Returns (ids, filters); raises ValueError.
+    """
+    ids = []
+    for value in params.getlist('ids'):
+        for part in filter(None, (part.strip() for part in value.split(','))):
+            try:
+                ids.append(str(uuid.UUID(part)))
+            except ValueError:
+                raise ValueError(f"Invalid campaign id: {part}")
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValueError("ids is required: a comma-separated list of campaign ids")
+    if len(ids) > max_ids:
+        raise ValueError(f"At most {max_ids} campaigns can be compared at once")
+
+    filters = parse_period_filters(params)
+    # One window for every campaign; platform/campaign_id do not apply
+    filters.pop('platform', None)
+    filters.pop('campaign_id', None)
+    if 'from' in filters and 'to' in filters:
+        granularity = filters.get('granularity', 'month')
+        first, last = date.fromisoformat(filters['from']), date.fromisoformat(filters['to'])
+        spanned = ((last.year - first.year) * 12 + last.month - first.month) // PERIOD_MONTHS[granularity] + 1
+        if spanned > MAX_PERIODS:
+            raise ValueError(f"The from/to window may span at most {MAX_PERIODS} periods")
+    return ids, filters
+
+
+def compare_query(supabase, ids, filters):
+    # Monthly (or rollup) rows of all `ids` in the window, as one `in` filter
+    column = period_column(filters)
+    columns = ','.join(('id', 'campaign_id', column) + COMPARE_METRICS)
+    if 'granularity' in filters:
+        query = supabase.table(ROLLUP_TABLE).select(columns).eq('granularity', filters['granularity'])
+    else:
+        query = supabase.table(PERFORMANCE_TABLE).select(columns)
+    query = query.in_('campaign_id', ids)
+    if 'from' in filters:
+        query = query.gte(column, filters['from'])
+    if 'to' in filters:
+        query = query.lte(column, filters['to'])
+    return query
+
+
+def _totals(metrics):
+    totals = {field: sum(metrics[field]) for field in COMPARE_METRICS}
+    totals['roi'] = roi(totals['spend'], totals['revenue'])
+    return totals
+
+
+@traced('aggregate')
+def build_comparison(ids, rows, filters):
+    """
+    The compare response: the shared list of `periods`, and per campaign (in
+    `ids` order) one list per metric aligned with it, zero where the campaign
+    has no row for a period, plus its totals over the window.
+    """
+    granularity = filters.get('granularity', 'month')
+    column = period_column(filters)
+
+    if rows or ('from' in filters and 'to' in filters):
+        seen = [row[column] for row in rows]
+        first = date.fromisoformat(filters.get('from') or min(seen))
+        last = date.fromisoformat(filters.get('to') or max(seen))
+        periods = periods_between(first, last, granularity)
+    else:
+        periods = []
+    position = {period: index for index, period in enumerate(periods)}
+
+    series = {
+        pk: {
+            **{field: [0] * len(periods) for field in PERFORMANCE_COUNTERS},
+            **{field: [0.0] * len(periods) for field in PERFORMANCE_AMOUNTS},
+        }
+        for pk in ids
+    }
+    # Rows may carry any day of their month; map each distinct value to its period once
+    indexes = {}
+    for row in rows:
+        value = row[column]
+        if value not in indexes:
+            indexes[value] = position.get(period_start(date.fromisoformat(value[:10]), granularity).isoformat())
+        metrics = series.get(row['campaign_id'])
+        index = indexes[value]
+        if metrics is None or index is None:
+            continue
+        for field in PERFORMANCE_COUNTERS:
+            metrics[field][index] += int(row.get(field) or 0)
+        for field in PERFORMANCE_AMOUNTS:
+            metrics[field][index] += float(row.get(field) or 0.0)
+
+    campaigns = []
+    for pk in ids:
+        metrics = series[pk]
+        metrics['roi'] = [roi(spend, revenue) for spend, revenue in zip(metrics['spend'], metrics['revenue'])]
+        campaigns.append({'id': pk, 'series': metrics, 'totals': _totals(metrics)})
+    return {'granularity': granularity, 'periods': periods, 'campaigns': campaigns}
@@ -0,0 +1,160 @@
+import csv
+import io
+import json
+import uuid
+import zlib
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+from .aggregates import PERFORMANCE_TABLE, parse_month
+from .pagination import CAMPAIGN_FIELDS, iter_keyset, parse_fields
+from .search import substring_search
+
+CAMPAIGN_TABLE = 'campaigns_campaign'
+PERFORMANCE_FIELDS = ('id', 'campaign_id', 'month', 'impressions', 'clicks', 'conversions', 'spend', 'revenue', 'roi')
+
+# Flush buffered CSV/NDJSON output once it holds this many characters
+FLUSH_SIZE = 64 * 1024
+
+
+class CSVRenderer(BaseRenderer):
+    # Lets DRF negotiate `?format=csv` / `Accept: text/csv`; exports stream their own body
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, default=str).encode() if data is not None else b''
+
+
+class NDJSONRenderer(CSVRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+def campaign_export(repository, params):
+    """
+    Returns (columns, rows) for the campaigns export. Supports the list view's
+    status, platform and search filters plus `from`/`to` (campaigns running in the window).
+    Raises ValueError on invalid fields or dates.
+    """
+    columns = parse_fields(params.get('fields'), required=('id',))
+    columns = list(CAMPAIGN_FIELDS) if columns == '*' else columns.split(',')
+    filters = {
+        'status': params.get('status'),
+        'platform': params.get('platform'),
+        'search': params.get('search'),
+        'from': parse_month(params['from']).isoformat() if params.get('from') else None,
+        'to': parse_month(params['to']).isoformat() if params.get('to') else None,
+    }
+    filters = {key: value for key, value in filters.items() if value}
+    return columns, repository.export_campaigns(columns, filters)
+
+
+def performance_export(repository, params):
+    """
+    Returns (columns, rows) for the monthly performance export, filtered by
+    `campaign_id`, `from`/`to` months and the owning campaign's status and platform.
+    Raises ValueError on an invalid campaign id or dates.
+    """
+    filters = {
+        'campaign_id': parse_campaign_id(params['campaign_id']) if params.get('campaign_id') else None,
+        'from': parse_month(params['from']).isoformat() if params.get('from') else None,
+        'to': parse_month(params['to']).isoformat() if params.get('to') else None,
+        'status': params.get('status'),
+        'platform': params.get('platform'),
+    }
+    filters = {key: value for key, value in filters.items() if value}
+    return list(PERFORMANCE_FIELDS), repository.export_performance(filters)
+
+
+def parse_campaign_id(value):
+    # Rejected here rather than by the backend, whose error would only surface mid-stream
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        raise ValueError(f"Invalid campaign_id: {value!r}")
+
+
+def campaign_export_rows(supabase, columns, filters):
+    # The Supabase side of campaign_export, fetched in EXPORT_CHUNK_SIZE keyset pages
+    def build_query():
+        query = supabase.table(CAMPAIGN_TABLE).select(','.join(columns))
+        if 'status' in filters:
+            query = query.eq('status', filters['status'])
+        if 'platform' in filters:
+            query = query.eq('platform', filters['platform'])
+        if 'search' in filters:
+            query = substring_search(query, filters['search'])
+        if 'from' in filters:
+            query = query.gte('end_date', filters['from'])
+        if 'to' in filters:
+            query = query.lte('start_date', filters['to'])
+        return query
+
+    return iter_keyset(build_query, 'id', settings.EXPORT_CHUNK_SIZE)
+
+
+def performance_export_rows(supabase, filters):
+    # The Supabase side of performance_export; the campaign filters go through an inner join
+    select = ','.join(PERFORMANCE_FIELDS)
+    if 'status' in filters or 'platform' in filters:
+        select += ',campaigns_campaign!inner(status,platform)'
+
+    def build_query():
+        query = supabase.table(PERFORMANCE_TABLE).select(select)
+        if 'campaign_id' in filters:
+            query = query.eq('campaign_id', filters['campaign_id'])
+        if 'from' in filters:
+            query = query.gte('month', filters['from'])
+        if 'to' in filters:
+            query = query.lte('month', filters['to'])
+        if 'status' in filters:
+            query = query.eq('campaigns_campaign.status', filters['status'])
+        if 'platform' in filters:
+            query = query.eq('campaigns_campaign.platform', filters['platform'])
+        return query
+
+    for row in iter_keyset(build_query, 'id', settings.EXPORT_CHUNK_SIZE):
+        row.pop('campaigns_campaign', None)
+        yield row
+
+
+def csv_chunks(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= FLUSH_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def ndjson_chunks(rows):
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps(row, default=str, separators=(',', ':')) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= FLUSH_SIZE:
+            yield ''.join(lines)
+            lines, size = [], 0
+    yield ''.join(lines)
+
+
+def encode(chunks, compress=False):
+    # Encode to UTF-8 and optionally gzip on the fly
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    for chunk in chunks:
+        data = chunk.encode()
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
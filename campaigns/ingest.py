@@ -0,0 +1,272 @@
+import contextvars
+import csv
+import json
+import logging
+import queue
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import connection
+
+from .aggregates import parse_month
+from .periods import roi
+from .repository import RepositoryError
+from .tracing import trace_queries
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('impressions', 'clicks', 'conversions')
+AMOUNT_FIELDS = ('spend', 'revenue')
+CONTENT_TYPES = ('text/csv', 'application/x-ndjson', 'application/jsonl', 'application/x-jsonlines')
+
+# Seconds between checks that the writer thread is still there while waiting on the full queue
+HANDOVER_TIMEOUT = 1.0
+
+
+class IngestSummary:
+    """Counters shared by the parsing thread and the writer thread."""
+
+    def __init__(self, max_errors):
+        self._lock = threading.Lock()
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = 0
+        self.errors = []
+        self.campaign_ids = set()
+        self.failure = None
+
+    def reject(self, line, reason):
+        with self._lock:
+            self.rejected += 1
+            if len(self.errors) < self.max_errors:
+                self.errors.append({"line": line, "reason": reason})
+
+    def fail(self, reason):
+        # The ingest stops at the first failure that is not about particular lines
+        with self._lock:
+            if self.failure is None:
+                self.failure = reason
+
+    def written(self, inserted, updated, campaign_ids):
+        with self._lock:
+            self.inserted += inserted
+            self.updated += updated
+            self.campaign_ids.update(campaign_ids)
+
+    def as_dict(self):
+        summary = {
+            "accepted": self.inserted + self.updated,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "errors_truncated": self.rejected > len(self.errors),
+        }
+        if self.failure is not None:
+            summary["error"] = self.failure
+        return summary
+
+
+def parse_lines(lines, content_type):
+    """
+    Yield (line number, dict or None) for each record in an NDJSON or CSV body,
+    reading it line by line so the whole payload is never held in memory.
+    A None record means the line could not be parsed.
+    """
+    text = (line.decode('utf-8-sig', errors='replace') for line in lines)
+
+    if content_type.startswith('text/csv'):
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, None
+            continue
+        yield number, record if isinstance(record, dict) else None
+
+
+def _column(batch, field, convert):
+    # Convert one column of the batch; failures are recorded per line
+    values, failures = [], {}
+    for line, record in batch:
+        try:
+            value = convert(record.get(field) or 0)
+            if value < 0:
+                raise ValueError
+            values.append(value)
+        except (TypeError, ValueError):
+            values.append(None)
+            failures[line] = f"'{field}' must be a non-negative {'integer' if convert is _integer else 'number'}"
+    return values, failures
+
+
+def _integer(value):
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError
+    return int(number)
+
+
+def _campaign_id(value):
+    return str(uuid.UUID(str(value)))
+
+
+def _month(value):
+    return parse_month(str(value)).isoformat()
+
+
+def validate_batch(repository, batch, summary, known_campaigns):
+    """
+    Validate a batch column by column and return the records ready to upsert.
+    Rejected lines are recorded on `summary`. `known_campaigns` caches the
+    existence check across batches.
+    """
+    parsed = []
+    for line, record in batch:
+        if record is None:
+            summary.reject(line, "Malformed record")
+        else:
+            parsed.append((line, record))
+
+    columns, failures = {}, {}
+    for field, convert in (('campaign_id', _campaign_id), ('month', _month)):
+        values = []
+        for line, record in parsed:
+            try:
+                values.append(convert(record[field]))
+            except (KeyError, TypeError, ValueError):
+                values.append(None)
+                failures.setdefault(line, f"'{field}' is missing or invalid")
+        columns[field] = values
+    for field in COUNTER_FIELDS:
+        columns[field], column_failures = _column(parsed, field, _integer)
+        for line, reason in column_failures.items():
+            failures.setdefault(line, reason)
+    for field in AMOUNT_FIELDS:
+        columns[field], column_failures = _column(parsed, field, float)
+        for line, reason in column_failures.items():
+            failures.setdefault(line, reason)
+
+    unknown = {pk for pk in columns['campaign_id'] if pk and pk not in known_campaigns}
+    lookup_error = None
+    if unknown:
+        try:
+            found = repository.existing_campaign_ids(unknown)
+            known_campaigns.update({pk: pk in found for pk in unknown})
+        except RepositoryError as e:
+            lookup_error = f"Could not verify campaign: {e.message}"
+
+    # Within one upsert a (campaign, month) pair may appear only once; the last line wins
+    records = {}
+    for position, (line, _) in enumerate(parsed):
+        if line in failures:
+            summary.reject(line, failures[line])
+            continue
+        if columns['campaign_id'][position] not in known_campaigns:
+            summary.reject(line, lookup_error)
+            continue
+        if not known_campaigns[columns['campaign_id'][position]]:
+            summary.reject(line, "Campaign does not exist")
+            continue
+
+        record = {field: columns[field][position] for field in columns}
+        record['roi'] = roi(record['spend'], record['revenue'])
+
+        key = (record['campaign_id'], record['month'])
+        if key in records:
+            summary.reject(records[key][0], f"Superseded by line {line}")
+        records[key] = (line, record)
+
+    return list(records.values())
+
+
+def write_batch(repository, batch, summary):
+    if not batch:
+        return
+    records = [record for _, record in batch]
+    try:
+        # The rows replaced tell updates from inserts
+        _, before = repository.upsert_performance(records)
+    except RepositoryError as e:
+        for line, _ in batch:
+            summary.reject(line, e.message)
+        return
+    summary.written(len(records) - len(before), len(before), sorted({record['campaign_id'] for record in records}))
+
+
+def _writer(repository, pending, summary):
+    try:
+        with trace_queries():
+            # Drains the queue up to the sentinel whatever happens, so the parsing thread never waits on it forever
+            while (batch := pending.get()) is not None:
+                if summary.failure is None:
+                    try:
+                        write_batch(repository, batch, summary)
+                        continue
+                    except Exception:
+                        logger.exception("Performance ingest stopped: a batch could not be written")
+                        summary.fail("Ingest stopped: the database could not be written")
+                for line, _ in batch:
+                    summary.reject(line, summary.failure)
+    finally:
+        # The ORM backend opens a connection for this thread
+        connection.close()
+
+
+def _hand_over(pending, batch, writer):
+    # Queue `batch` for the writer; False when the writer thread has gone away
+    while writer.is_alive():
+        try:
+            pending.put(batch, timeout=HANDOVER_TIMEOUT)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def ingest(repository, lines, content_type):
+    """
+    Parse, validate and upsert monthly performance records for any number of
+    campaigns. Batches are handed to a writer thread through a bounded queue:
+    when the database falls behind, parsing (and reading the request body)
+    blocks instead of buffering the payload in memory. A write failure other
+    than a rejected batch stops the ingest; it is set as `summary.failure`.
+    """
+    batch_size = settings.INGEST_BATCH_SIZE
+    summary = IngestSummary(settings.INGEST_MAX_ERRORS)
+    pending = queue.Queue(maxsize=settings.INGEST_MAX_PENDING_BATCHES)
+    known_campaigns = {}
+
+    # The writer runs in a copy of this context, so its queries count towards the request's trace
+    writer = threading.Thread(
+        target=contextvars.copy_context().run, args=(_writer, repository, pending, summary), daemon=True
+    )
+    writer.start()
+    try:
+        batch = []
+        for line, record in parse_lines(lines, content_type):
+            batch.append((line, record))
+            if len(batch) >= batch_size:
+                # Once writing has stopped, the rest of the body is not read
+                if summary.failure is not None:
+                    break
+                if not _hand_over(pending, validate_batch(repository, batch, summary, known_campaigns), writer):
+                    break
+                batch = []
+        if batch and summary.failure is None:
+            _hand_over(pending, validate_batch(repository, batch, summary, known_campaigns), writer)
+    finally:
+        if not _hand_over(pending, None, writer):
+            summary.fail("Ingest stopped: the database could not be written")
+        writer.join()
+
+    return summary
@@ -0,0 +1,122 @@
+from datetime import date
+
+from .aggregates import PERFORMANCE_AMOUNTS, PERFORMANCE_COUNTERS, parse_performance_filters
+from .analytics import PerformanceFrame, month_over_month, moving_average, trend_score, weighted_roi
+from .compare import periods_between
+from .tracing import traced
+
+INSIGHT_METRICS = PERFORMANCE_COUNTERS + PERFORMANCE_AMOUNTS + ('roi',)
+DEFAULT_METRIC = 'clicks'
+
+# Months in the trailing moving average
+DEFAULT_WINDOW = 3
+MAX_WINDOW = 12
+
+TOP_CAMPAIGNS = 5
+
+# Growth (% of the mean per month) beyond which a series counts as rising or falling
+FLAT_GROWTH = 1.0
+
+# Cost per click below which competition counts as low, then medium; above the last it is high
+COMPETITION_CPC = ((1.0, 'Low'), (3.0, 'Medium'))
+
+
+def parse_insights_params(params):
+    """
+    The parse_performance_filters() filters plus the `metric` to trend and
+    the moving-average `window` in months. Returns (filters, metric, window);
+    raises ValueError.
+    """
+    filters = parse_performance_filters(params)
+    metric = params.get('metric') or DEFAULT_METRIC
+    if metric not in INSIGHT_METRICS:
+        raise ValueError(f"metric must be one of: {', '.join(INSIGHT_METRICS)}")
+    try:
+        window = int(params.get('window') or DEFAULT_WINDOW)
+    except ValueError:
+        window = 0
+    if not 1 <= window <= MAX_WINDOW:
+        raise ValueError(f"window must be an integer between 1 and {MAX_WINDOW}")
+    return filters, metric, window
+
+
+def _month(value):
+    # Rows may carry any day of their month
+    return f'{value[:7]}-01'
+
+
+def _values(totals, metric):
+    # One metric's totals as response values; ROI is weighted by spend
+    if metric == 'roi':
+        return weighted_roi(totals['spend'], totals['revenue'])
+    if metric in PERFORMANCE_COUNTERS:
+        return [int(value) for value in totals[metric]]
+    return [round(value, 2) for value in totals[metric]]
+
+
+def _compact(value):
+    # 2400000 -> '2.4M', as the search_volume label was written
+    for divisor, suffix in ((1e9, 'B'), (1e6, 'M'), (1e3, 'K')):
+        if value >= divisor:
+            return f'{value / divisor:.1f}{suffix}'
+    return f'{value:.0f}'
+
+
+def _competition(spend, clicks):
+    cpc = spend / clicks if clicks else 0.0
+    return next((label for limit, label in COMPETITION_CPC if cpc < limit), 'High')
+
+
+@traced('aggregate')
+def build_insights(rows, metric, window, filters):
+    """
+    Trends of `metric` across the monthly performance `rows`: its total per
+    month over the window (zero-filled), each month's change from the one
+    before and trailing moving average, a trend score over the whole series,
+    the window's totals and the campaigns leading on `metric`. The original
+    response's `search_volume` (mean monthly impressions), `competition`
+    (banded cost per click) and month-name `name` labels are kept.
+    """
+    frame = PerformanceFrame(rows, ('month', 'campaign_id'), PERFORMANCE_COUNTERS + PERFORMANCE_AMOUNTS)
+
+    seen = frame.labels['month']
+    if seen or ('from' in filters and 'to' in filters):
+        first = date.fromisoformat(_month(filters.get('from') or seen[0]))
+        last = date.fromisoformat(filters.get('to') or seen[-1][:10])
+        months = periods_between(first, last, 'month')
+    else:
+        months = []
+    months, by_month = frame.sum_by('month', label=_month, labels=months)
+
+    series = _values(by_month, metric)
+    score, growth = trend_score(series)
+    changes = month_over_month(series)
+    averages = moving_average(series, window)
+
+    sums = {field: [sum(by_month[field], 0.0)] for field in PERFORMANCE_COUNTERS + PERFORMANCE_AMOUNTS}
+    totals = {field: _values(sums, field)[0] for field in INSIGHT_METRICS}
+
+    campaigns, by_campaign = frame.sum_by('campaign_id')
+    values = _values(by_campaign, metric)
+    rois = weighted_roi(by_campaign['spend'], by_campaign['revenue'])
+    leaders = sorted(range(len(campaigns)), key=lambda index: (-values[index], campaigns[index]))[:TOP_CAMPAIGNS]
+
+    return {
+        'metric': metric,
+        'trend_score': score,
+        'growth': growth,
+        'trend': 'up' if growth > FLAT_GROWTH else 'down' if growth < -FLAT_GROWTH else 'flat',
+        'search_volume': f"{_compact(totals['impressions'] / len(months) if months else 0)}/month",
+        'competition': _competition(totals['spend'], totals['clicks']),
+        'interest_over_time': [
+            {
+                'name': date.fromisoformat(month).strftime('%b'), 'month': month,
+                'value': value, 'change': change, 'moving_average': average,
+            }
+            for month, value, change, average in zip(months, series, changes, averages)
+        ],
+        'totals': totals,
+        'top_campaigns': [
+            {'id': campaigns[index], metric: values[index], 'roi': rois[index]} for index in leaders
+        ],
+    }
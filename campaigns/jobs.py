@@ -0,0 +1,316 @@
+"""
+Database-backed background jobs. The API queues a Job row and answers with
+its id; workers (`python manage.py run_jobs`, or threads started in each web
+process by its first request when JOBS['WORKERS'] is set) claim due jobs with a conditional
+UPDATE, so any number of them can share the table on Postgres or SQLite.
+A failed attempt is retried after a jittered exponential backoff until
+`max_attempts` is reached. A claim is a lease: a job whose worker died is
+taken over once `locked_until` has passed.
+"""
+import logging
+import os
+import random
+import re
+import socket
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import invalidate
+from .ingest import CONTENT_TYPES as INGEST_CONTENT_TYPES, ingest
+from .models import Job
+from .repository import get_repository
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_SETTINGS = {
+    'WORKERS': 0,
+    'POLL_INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 3,
+    'BACKOFF': 5.0,
+    'MAX_BACKOFF': 600.0,
+    'LEASE': 900,
+}
+
+# Names given by stage_upload(); a payload cannot point a job at any other file in storage
+UPLOAD_NAME = re.compile(r'ingest/[0-9a-f-]{36}\.upload')
+
+# Due jobs read per claim attempt; the first one still unclaimed is taken
+CLAIM_CANDIDATES = 5
+
+HANDLERS = {}
+CLEANUPS = {}
+
+
+class JobFailed(Exception):
+    """A failure that retrying cannot fix: the job fails without further attempts."""
+
+
+def job_options():
+    return {**DEFAULT_JOB_SETTINGS, **getattr(settings, 'JOBS', {})}
+
+
+def handler(kind, cleanup=None):
+    # Registers the function that runs jobs of `kind`; it receives the payload and returns a JSON result.
+    # `cleanup(payload)` runs once the job has succeeded or finally failed.
+    def register(function):
+        HANDLERS[kind] = function
+        if cleanup is not None:
+            CLEANUPS[kind] = cleanup
+        return function
+    return register
+
+
+@handler('rebuild_dashboard_stats')
+def rebuild_dashboard_stats(payload):
+    stats = get_repository().rebuild_dashboard_stats()
+    invalidate('dashboard')
+    return stats
+
+
+def stage_upload(stream):
+    """
+    Copy a request body into the default storage chunk by chunk and return
+    its name, so a queued job refers to the body rather than holding it.
+    """
+    return default_storage.save(f'ingest/{uuid.uuid4()}.upload', File(stream))
+
+
+def staged_upload(payload):
+    # The payload's staged body, if it names one
+    upload = payload.get('upload')
+    return upload if isinstance(upload, str) and UPLOAD_NAME.fullmatch(upload) else None
+
+
+def delete_upload(payload):
+    if staged_upload(payload):
+        default_storage.delete(staged_upload(payload))
+
+
+@handler('ingest_performance', cleanup=delete_upload)
+def ingest_performance(payload):
+    if payload.get('content_type') not in INGEST_CONTENT_TYPES:
+        raise JobFailed(f"content_type must be one of: {', '.join(INGEST_CONTENT_TYPES)}")
+    upload = staged_upload(payload)
+    if upload is None or not default_storage.exists(upload):
+        raise JobFailed("The uploaded body is no longer available")
+    # Streamed from storage line by line, like the synchronous ingest streams the request
+    with default_storage.open(upload, 'rb') as body:
+        summary = ingest(get_repository(), body, payload['content_type'])
+    if summary.campaign_ids:
+        invalidate(
+            'campaigns', 'dashboard',
+            *(f'campaign:{pk}' for pk in summary.campaign_ids),
+            *(f'performance:{pk}' for pk in summary.campaign_ids)
+        )
+    if summary.failure is not None:
+        # Retried from the start; the batches already written are upserted again
+        raise RuntimeError(summary.failure)
+    return summary.as_dict()
+
+
+def enqueue(kind, payload=None, max_attempts=None):
+    """Queue a job of a registered `kind` to run as soon as a worker is free. Raises ValueError."""
+    if kind not in HANDLERS:
+        raise ValueError(f"kind must be one of: {', '.join(sorted(HANDLERS))}")
+    options = job_options()
+    job = Job.objects.create(
+        kind=kind, payload=payload or {}, max_attempts=max_attempts or options['MAX_ATTEMPTS'],
+        run_after=timezone.now(),
+    )
+    if options['WORKERS']:
+        get_worker().start()
+    return job
+
+
+def format_job(job):
+    # The job as returned by /api/jobs; the payload is internal to the handler and left out
+    return {
+        'id': str(job.id),
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'run_after': job.run_after.isoformat(),
+        'result': job.result,
+        'error': job.error or None,
+        'created_at': job.created_at.isoformat(),
+        'updated_at': job.updated_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def clean_up(job):
+    # Runs the kind's cleanup for a job that will not run again; a failure there does not change the job
+    cleanup = CLEANUPS.get(job.kind)
+    if cleanup is None:
+        return
+    try:
+        cleanup(job.payload)
+    except Exception:
+        logger.exception("Cleanup of job %s (%s) failed", job.pk, job.kind)
+
+
+def retry_delay(attempts, backoff, max_backoff):
+    # Full jitter over an exponential ceiling, so jobs that failed together do not retry together
+    return random.uniform(0, min(max_backoff, backoff * 2 ** (attempts - 1)))
+
+
+class JobWorker:
+    """
+    Claims and runs due jobs. `run_once()` handles a single job in the calling
+    thread; `start()` runs `threads` polling loops in the background until
+    `stop()`.
+    """
+
+    def __init__(self, threads=1, poll_interval=1.0, backoff=5.0, max_backoff=600.0, lease=900, name=None,
+                 clock=timezone.now):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def claim(self, worker):
+        """The next due job, marked running under `worker`'s lease, or None."""
+        now = self.clock()
+        due = Q(status='queued', run_after__lte=now) | Q(status='running', locked_until__lt=now)
+        candidates = Job.objects.filter(due).order_by('run_after')
+        candidates = candidates.values_list('pk', 'status', 'attempts', 'max_attempts')
+        for pk, state, attempts, max_attempts in candidates[:CLAIM_CANDIDATES]:
+            # Matching the attempt count too means two workers never take over the same expired lease
+            job = Job.objects.filter(pk=pk, status=state, attempts=attempts)
+            if state == 'running' and attempts >= max_attempts:
+                # Its last attempt took its worker down; running it again would likely do the same
+                if job.update(status='failed', error='Worker lost', locked_until=None, updated_at=now,
+                              finished_at=now):
+                    clean_up(Job.objects.get(pk=pk))
+                continue
+            claimed = job.update(
+                status='running', attempts=attempts + 1, locked_by=worker,
+                locked_until=now + timedelta(seconds=self.lease), updated_at=now,
+            )
+            if claimed:
+                return Job.objects.get(pk=pk)
+        return None
+
+    def run_once(self, worker=None):
+        """Claim one due job and run it to success, a retry or failure. Returns the job, or None when idle."""
+        worker = worker or self.name
+        job = self.claim(worker)
+        if job is None:
+            return None
+
+        owned = Job.objects.filter(pk=job.pk, locked_by=worker, attempts=job.attempts)
+        try:
+            run = HANDLERS.get(job.kind)
+            if run is None:
+                raise JobFailed(f"No handler for job kind {job.kind!r}")
+            result = run(job.payload)
+        except Exception as e:
+            now = self.clock()
+            logger.warning("Job %s (%s) attempt %s failed: %s", job.pk, job.kind, job.attempts, e)
+            error = str(e) if isinstance(e, JobFailed) else f'{type(e).__name__}: {e}'
+            if isinstance(e, JobFailed) or job.attempts >= job.max_attempts:
+                changes = {'status': 'failed', 'finished_at': now}
+            else:
+                delay = retry_delay(job.attempts, self.backoff, self.max_backoff)
+                changes = {'status': 'queued', 'run_after': now + timedelta(seconds=delay)}
+            updated = owned.update(error=error, locked_until=None, updated_at=now, **changes)
+        else:
+            now = self.clock()
+            updated = owned.update(
+                status='succeeded', result=result, error='', locked_until=None, updated_at=now, finished_at=now
+            )
+        if not updated:
+            logger.warning("Job %s outlived its lease and was taken over by another worker", job.pk)
+        job.refresh_from_db()
+        if updated and job.status in ('succeeded', 'failed'):
+            clean_up(job)
+        return job
+
+    def run_pending(self):
+        # Run due jobs until none is left; returns how many ran
+        count = 0
+        while self.run_once() is not None:
+            count += 1
+        return count
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            for index in range(self.threads):
+                thread = threading.Thread(target=self._loop, args=(f'{self.name}/{index}',), daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        # Finishes the running jobs; the polling loops exit before claiming another
+        self._stopping.set()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def _loop(self, worker):
+        try:
+            while not self._stopping.is_set():
+                try:
+                    job = self.run_once(worker)
+                except Exception:
+                    logger.exception("Job worker %s could not claim a job", worker)
+                    job = None
+                if job is None:
+                    self._stopping.wait(self.poll_interval)
+        finally:
+            # Each loop thread has its own database connection
+            connection.close()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                options = job_options()
+                _worker = JobWorker(
+                    threads=options['WORKERS'] or 1, poll_interval=options['POLL_INTERVAL'],
+                    backoff=options['BACKOFF'], max_backoff=options['MAX_BACKOFF'], lease=options['LEASE'],
+                )
+    return _worker
+
+
+def start_worker(**kwargs):
+    """
+    request_started receiver connected in CampaignsConfig.ready(): starts the
+    in-process job threads with the first request each serving process handles,
+    so a preloading gunicorn master or a management command never runs them.
+    """
+    if job_options()['WORKERS']:
+        get_worker().start()
+
+
+def reset_worker():
+    global _worker
+    with _worker_lock:
+        worker, _worker = _worker, None
+    if worker is not None:
+        worker.stop()
@@ -0,0 +1,174 @@
+# Lifetime KPIs denormalized onto campaigns_campaign. Database triggers keep
+# them in step with campaigns_monthlyperformance, so every write path (the
+# performance PUT, ingest, the ORM) updates them without extra round trips.
+
+TOTAL_FIELDS = ('total_impressions', 'total_clicks', 'total_conversions', 'total_spend', 'total_revenue')
+RATIO_FIELDS = ('ctr', 'conversion_rate', 'cpc', 'cpa')
+
+# Lifetime spend and ROI are mirrored into the existing amount_spent and roi columns
+LIFETIME_FIELDS = ('amount_spent', 'roi')
+
+# Maintained by the triggers; read-only through the API
+KPI_FIELDS = TOTAL_FIELDS + RATIO_FIELDS + LIFETIME_FIELDS
+
+ORDERING_FIELDS = ('created_at', 'ctr', 'conversion_rate', 'cpc', 'cpa', 'roi', 'amount_spent', 'total_revenue')
+NULLABLE_ORDERING_FIELDS = ('roi',)
+RANGE_FIELDS = ORDERING_FIELDS[1:]
+
+PERFORMANCE_COLUMNS = ('impressions', 'clicks', 'conversions', 'spend', 'revenue')
+
+
+def parse_ordering(param):
+    """
+    `ordering=ctr` / `ordering=-ctr` -> (column, descending). Defaults to
+    newest first. Raises ValueError on unsupported columns.
+    """
+    if not param:
+        return 'created_at', True
+    column = param.lstrip('-')
+    if column not in ORDERING_FIELDS:
+        raise ValueError(f"ordering must be one of: {', '.join(ORDERING_FIELDS)} (prefix with '-' for descending)")
+    return column, param.startswith('-')
+
+
+def parse_kpi_ranges(params):
+    """
+    Read `min_<kpi>` / `max_<kpi>` query params into [(column, op, value)].
+    Raises ValueError on non-numeric bounds.
+    """
+    ranges = []
+    for column in RANGE_FIELDS:
+        for prefix, op in (('min', 'gte'), ('max', 'lte')):
+            if (value := params.get(f'{prefix}_{column}')) is not None:
+                try:
+                    ranges.append((column, op, float(value)))
+                except ValueError:
+                    raise ValueError(f"{prefix}_{column} must be a number")
+    return ranges
+
+
+def apply_kpi_ranges(query, ranges):
+    for column, op, value in ranges:
+        query = getattr(query, op)(column, value)
+    return query
+
+
+def _derived(row=''):
+    # Ratios, amount_spent and roi from the totals of `row` (a trigger record prefix or the updated row)
+    spend, revenue = f'{row}total_spend', f'{row}total_revenue'
+    impressions, clicks, conversions = f'{row}total_impressions', f'{row}total_clicks', f'{row}total_conversions'
+    return {
+        'ctr': f'CASE WHEN {impressions} > 0 THEN {clicks} * 100.0 / {impressions} ELSE 0 END',
+        'conversion_rate': f'CASE WHEN {clicks} > 0 THEN {conversions} * 100.0 / {clicks} ELSE 0 END',
+        'cpc': f'CASE WHEN {clicks} > 0 THEN {spend} / {clicks} ELSE 0 END',
+        'cpa': f'CASE WHEN {conversions} > 0 THEN {spend} / {conversions} ELSE 0 END',
+        'amount_spent': spend,
+        'roi': f'CASE WHEN {spend} > 0 THEN ({revenue} - {spend}) * 100.0 / {spend} ELSE 0 END',
+    }
+
+
+def _add_totals(sign, source):
+    # SET clause adding `sign` x the performance columns of `source` to the campaign totals
+    return ', '.join(
+        f'{total} = {total} {sign} {source}{column}' for total, column in zip(TOTAL_FIELDS, PERFORMANCE_COLUMNS)
+    )
+
+
+def _postgres_delta(source):
+    return (
+        f"UPDATE campaigns_campaign c SET {_add_totals('+', 'd.')} FROM ("
+        f"SELECT campaign_id, {', '.join(f'sum({column}) AS {column}' for column in PERFORMANCE_COLUMNS)} "
+        f"FROM ({source}) changes GROUP BY campaign_id) d WHERE c.id = d.campaign_id;"
+    )
+
+
+def _postgres_rows(table, sign=''):
+    columns = (f'{sign}{column} AS {column}' if sign else column for column in PERFORMANCE_COLUMNS)
+    return f"SELECT campaign_id, {', '.join(columns)} FROM {table}"
+
+
+POSTGRES_KPI_SQL = [
+    # Ratios are derived whenever a write changes the totals
+    "CREATE OR REPLACE FUNCTION campaigns_campaign_derive_kpis() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+    + ' '.join(f'NEW.{column} := {expression};' for column, expression in _derived('NEW.').items())
+    + " RETURN NEW; END; $$",
+    "DROP TRIGGER IF EXISTS campaigns_campaign_derive_kpis ON campaigns_campaign",
+    f"CREATE TRIGGER campaigns_campaign_derive_kpis BEFORE UPDATE OF {', '.join(TOTAL_FIELDS)} "
+    "ON campaigns_campaign FOR EACH ROW EXECUTE FUNCTION campaigns_campaign_derive_kpis()",
+    # Statement-level: one UPDATE per campaign per statement, however many months an upsert touches
+    "CREATE OR REPLACE FUNCTION campaigns_performance_kpis() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+    f"IF TG_OP = 'INSERT' THEN {_postgres_delta(_postgres_rows('new_rows'))} "
+    f"ELSIF TG_OP = 'DELETE' THEN {_postgres_delta(_postgres_rows('old_rows', '-'))} "
+    f"ELSE {_postgres_delta(_postgres_rows('new_rows') + ' UNION ALL ' + _postgres_rows('old_rows', '-'))} "
+    "END IF; RETURN NULL; END; $$",
+    "DROP TRIGGER IF EXISTS campaigns_performance_kpis_insert ON campaigns_monthlyperformance",
+    "DROP TRIGGER IF EXISTS campaigns_performance_kpis_update ON campaigns_monthlyperformance",
+    "DROP TRIGGER IF EXISTS campaigns_performance_kpis_delete ON campaigns_monthlyperformance",
+    "CREATE TRIGGER campaigns_performance_kpis_insert AFTER INSERT ON campaigns_monthlyperformance "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION campaigns_performance_kpis()",
+    "CREATE TRIGGER campaigns_performance_kpis_update AFTER UPDATE ON campaigns_monthlyperformance "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION campaigns_performance_kpis()",
+    "CREATE TRIGGER campaigns_performance_kpis_delete AFTER DELETE ON campaigns_monthlyperformance "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION campaigns_performance_kpis()",
+    # NULL roi (no performance yet) sorts lowest; one index serves both directions
+    "CREATE INDEX IF NOT EXISTS campaigns_campaign_roi_id ON campaigns_campaign (roi NULLS FIRST, id)",
+]
+
+SQLITE_KPI_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS campaigns_campaign_derive_kpis "
+    f"AFTER UPDATE OF {', '.join(TOTAL_FIELDS)} ON campaigns_campaign BEGIN "
+    f"UPDATE campaigns_campaign SET {', '.join(f'{column} = {expression}' for column, expression in _derived().items())} "
+    "WHERE id = new.id; END",
+    "CREATE TRIGGER IF NOT EXISTS campaigns_performance_kpis_ai AFTER INSERT ON campaigns_monthlyperformance BEGIN "
+    f"UPDATE campaigns_campaign SET {_add_totals('+', 'new.')} WHERE id = new.campaign_id; END",
+    "CREATE TRIGGER IF NOT EXISTS campaigns_performance_kpis_ad AFTER DELETE ON campaigns_monthlyperformance BEGIN "
+    f"UPDATE campaigns_campaign SET {_add_totals('-', 'old.')} WHERE id = old.campaign_id; END",
+    "CREATE TRIGGER IF NOT EXISTS campaigns_performance_kpis_au AFTER UPDATE ON campaigns_monthlyperformance BEGIN "
+    f"UPDATE campaigns_campaign SET {_add_totals('-', 'old.')} WHERE id = old.campaign_id; "
+    f"UPDATE campaigns_campaign SET {_add_totals('+', 'new.')} WHERE id = new.campaign_id; END",
+    # SQLite already sorts NULL lowest
+    "CREATE INDEX IF NOT EXISTS campaigns_campaign_roi_id ON campaigns_campaign (roi, id)",
+]
+
+# Recompute every campaign's totals from its performance rows (the triggers then derive the ratios)
+BACKFILL_SQL = (
+    "UPDATE campaigns_campaign SET "
+    + ', '.join(
+        f'{total} = COALESCE((SELECT SUM(p.{column}) FROM campaigns_monthlyperformance p '
+        f'WHERE p.campaign_id = campaigns_campaign.id), 0)'
+        for total, column in zip(TOTAL_FIELDS, PERFORMANCE_COLUMNS)
+    )
+    + " WHERE id IN (SELECT campaign_id FROM campaigns_monthlyperformance)"
+)
+
+
+def install_kpi_triggers(schema_editor):
+    """
+    Create the KPI triggers for the current database and backfill the totals.
+    Like the search index, SQLite loses the campaigns_campaign trigger when
+    Django remakes the table, so later migrations call this again.
+    """
+    vendor = schema_editor.connection.vendor
+    statements = SQLITE_KPI_SQL if vendor == 'sqlite' else POSTGRES_KPI_SQL if vendor == 'postgresql' else []
+    for statement in statements:
+        schema_editor.execute(statement)
+    if statements:
+        schema_editor.execute(BACKFILL_SQL)
+
+
+def remove_kpi_triggers(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for name in ('campaigns_campaign_derive_kpis', 'campaigns_performance_kpis_ai',
+                     'campaigns_performance_kpis_ad', 'campaigns_performance_kpis_au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    elif vendor == 'postgresql':
+        for suffix in ('insert', 'update', 'delete'):
+            schema_editor.execute(
+                f"DROP TRIGGER IF EXISTS campaigns_performance_kpis_{suffix} ON campaigns_monthlyperformance"
+            )
+        schema_editor.execute("DROP TRIGGER IF EXISTS campaigns_campaign_derive_kpis ON campaigns_campaign")
+        schema_editor.execute("DROP FUNCTION IF EXISTS campaigns_performance_kpis()")
+        schema_editor.execute("DROP FUNCTION IF EXISTS campaigns_campaign_derive_kpis()")
+    if vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP INDEX IF EXISTS campaigns_campaign_roi_id")
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from campaigns.repository import get_repository
+from campaigns.rollups import STATS_COLUMNS
+
+
+class Command(BaseCommand):
+    help = "Rebuild the dashboard stats rollup from the campaign and performance tables and report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only report drift; exit with an error if the rollup is out of date.",
+        )
+
+    def handle(self, *args, **options):
+        # Whichever data backend CAMPAIGNS_DATA_BACKEND selects, like the API and the job
+        repository = get_repository()
+        current = repository.stored_dashboard_stats()
+        if options['check']:
+            expected = repository.source_dashboard_stats()
+        else:
+            expected = repository.rebuild_dashboard_stats()
+
+        drift = {}
+        for column in STATS_COLUMNS:
+            stored = (current or {}).get(column) or 0
+            if abs(float(stored) - float(expected[column])) > 1e-6:
+                drift[column] = (stored, expected[column])
+
+        if current is None:
+            self.stdout.write("Rollup row is missing.")
+        for column, (stored, actual) in drift.items():
+            self.stdout.write(f"{column}: stored={stored} actual={actual}")
+
+        if options['check']:
+            if current is None or drift:
+                raise CommandError("Dashboard stats rollup has drifted.")
+            self.stdout.write(self.style.SUCCESS("Dashboard stats rollup is up to date."))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt dashboard stats rollup ({len(drift)} drifted columns)."))
@@ -0,0 +1,41 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from campaigns.jobs import JobWorker, job_options
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (see campaigns/jobs.py) until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=None,
+            help="Jobs run at once (default: JOBS['WORKERS'], at least 1).",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Run the jobs that are due now, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        settings = job_options()
+        worker = JobWorker(
+            threads=options['threads'] or settings['WORKERS'] or 1, poll_interval=settings['POLL_INTERVAL'],
+            backoff=settings['BACKOFF'], max_backoff=settings['MAX_BACKOFF'], lease=settings['LEASE'],
+        )
+
+        if options['once']:
+            count = worker.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} jobs."))
+            return
+
+        stopped = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stopped.set())
+        worker.start()
+        self.stdout.write(f"Running jobs with {worker.threads} threads as {worker.name}.")
+        stopped.wait()
+        self.stdout.write("Stopping; waiting for running jobs to finish.")
+        worker.stop()
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:02
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def seed_stats(apps, schema_editor):
+    # Create the single rollup row from the current tables; the write paths only apply deltas to it
+    DashboardStats = apps.get_model('campaigns', 'DashboardStats')
+    Campaign = apps.get_model('campaigns', 'Campaign')
+    MonthlyPerformance = apps.get_model('campaigns', 'MonthlyPerformance')
+    stats = Campaign.objects.aggregate(
+        total_campaigns=Count('id'),
+        active_campaigns=Count('id', filter=Q(status='Active')),
+        paused_campaigns=Count('id', filter=Q(status='Paused')),
+        completed_campaigns=Count('id', filter=Q(status='Completed')),
+        draft_campaigns=Count('id', filter=Q(status='Draft')),
+        total_budget=Sum('budget'),
+    )
+    stats.update(MonthlyPerformance.objects.aggregate(roi_sum=Sum('roi'), roi_count=Count('id')))
+    stats['total_budget'] = float(stats['total_budget'] or 0)
+    stats['roi_sum'] = float(stats['roi_sum'] or 0)
+    DashboardStats.objects.update_or_create(pk=1, defaults=stats)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0002_monthlyperformance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('total_campaigns', models.IntegerField(default=0)),
+                ('active_campaigns', models.IntegerField(default=0)),
+                ('paused_campaigns', models.IntegerField(default=0)),
+                ('completed_campaigns', models.IntegerField(default=0)),
+                ('draft_campaigns', models.IntegerField(default=0)),
+                ('total_budget', models.FloatField(default=0.0)),
+                ('roi_sum', models.FloatField(default=0.0)),
+                ('roi_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='monthlyperformance',
+            options={},
+        ),
+        migrations.AddIndex(
+            model_name='monthlyperformance',
+            index=models.Index(fields=['campaign'], name='campaigns_m_campaig_6ba198_idx'),
+        ),
+        migrations.RunPython(seed_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from campaigns.search import install_search_index, remove_search_index
+
+
+def forwards(apps, schema_editor):
+    install_search_index(schema_editor)
+
+
+def backwards(apps, schema_editor):
+    remove_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0003_dashboardstats'),
+    ]
+
+    operations = [
+        # pg_trgm GIN indexes on Postgres, an FTS5 trigram table on SQLite
+        migrations.RunPython(forwards, backwards),
+    ]
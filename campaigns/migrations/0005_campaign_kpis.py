@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:22
+
+from django.db import migrations, models
+
+from campaigns.kpis import install_kpi_triggers, remove_kpi_triggers
+from campaigns.search import install_search_index
+
+
+def forwards(apps, schema_editor):
+    # Adding the columns remakes campaigns_campaign on SQLite, dropping the FTS triggers
+    install_search_index(schema_editor)
+    install_kpi_triggers(schema_editor)
+
+
+def backwards(apps, schema_editor):
+    remove_kpi_triggers(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0004_campaign_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='conversion_rate',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='cpa',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='cpc',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='ctr',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='total_clicks',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='total_conversions',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='total_impressions',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='total_revenue',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='total_spend',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['ctr', 'id'], name='campaigns_campaign_ctr_id'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['conversion_rate', 'id'], name='campaigns_campaign_cvr_id'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['cpc', 'id'], name='campaigns_campaign_cpc_id'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['cpa', 'id'], name='campaigns_campaign_cpa_id'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['amount_spent', 'id'], name='campaigns_campaign_spent_id'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['total_revenue', 'id'], name='campaigns_campaign_revenue_id'),
+        ),
+        # Triggers keeping the totals in step with monthly performance, plus a backfill
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:24
+
+from django.db import migrations, models
+
+# Dashboard aggregation filters and groups monthly performance by month and
+# sums the metric columns; carrying them in the index allows index-only scans.
+# SQLite has no INCLUDE, so there they become trailing key columns.
+POSTGRES_MONTH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS campaigns_perf_month_idx ON campaigns_monthlyperformance (month) "
+    "INCLUDE (campaign_id, impressions, clicks, conversions, spend, revenue, roi)"
+)
+SQLITE_MONTH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS campaigns_perf_month_idx ON campaigns_monthlyperformance "
+    "(month, campaign_id, impressions, clicks, conversions, spend, revenue, roi)"
+)
+
+
+def create_month_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute(POSTGRES_MONTH_INDEX if vendor == 'postgresql' else SQLITE_MONTH_INDEX)
+
+
+def drop_month_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute("DROP INDEX IF EXISTS campaigns_perf_month_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0005_campaign_kpis'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['-created_at', '-id'], name='campaigns_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='campaigns_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['status', 'platform', '-created_at', '-id'], name='campaigns_status_platform_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['platform', '-created_at', '-id'], name='campaigns_platform_created_idx'),
+        ),
+        migrations.RunPython(create_month_index, drop_month_index),
+    ]
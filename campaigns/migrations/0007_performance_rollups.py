@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from campaigns.periods import install_rollup_triggers, remove_rollup_triggers
+
+
+def forwards(apps, schema_editor):
+    install_rollup_triggers(schema_editor)
+
+
+def backwards(apps, schema_editor):
+    remove_rollup_triggers(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0006_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerformanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('quarter', 'quarter'), ('year', 'year')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('months', models.IntegerField(default=0)),
+                ('impressions', models.BigIntegerField(default=0)),
+                ('clicks', models.BigIntegerField(default=0)),
+                ('conversions', models.BigIntegerField(default=0)),
+                ('spend', models.FloatField(default=0.0)),
+                ('revenue', models.FloatField(default=0.0)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance_rollups', to='campaigns.campaign')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'period_start'], name='campaigns_rollup_window_idx')],
+                'constraints': [models.UniqueConstraint(fields=('campaign', 'granularity', 'period_start'), name='campaigns_rollup_period_uniq')],
+            },
+        ),
+        # Triggers keeping the rollups in step with monthly performance, plus a backfill
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_sums(apps, schema_editor):
+    # A built rollup row starts from the current totals; the write paths keep it in step from here
+    DashboardStats = apps.get_model('campaigns', 'DashboardStats')
+    MonthlyPerformance = apps.get_model('campaigns', 'MonthlyPerformance')
+    totals = MonthlyPerformance.objects.aggregate(spend_sum=Sum('spend'), revenue_sum=Sum('revenue'))
+    DashboardStats.objects.update(**{column: float(value or 0) for column, value in totals.items()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0007_performance_rollups'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='dashboardstats',
+            name='roi_count',
+        ),
+        migrations.RemoveField(
+            model_name='dashboardstats',
+            name='roi_sum',
+        ),
+        migrations.AddField(
+            model_name='dashboardstats',
+            name='revenue_sum',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='dashboardstats',
+            name='spend_sum',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(backfill_sums, migrations.RunPython.noop),
+    ]
@@ -39,6 +39,36 @@ class Campaign(models.Model):
     roi = models.FloatField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Lifetime totals and KPIs, maintained from monthly performance by the
+    # triggers in campaigns/kpis.py (which also sync amount_spent and roi)
+    total_impressions = models.BigIntegerField(default=0)
+    total_clicks = models.BigIntegerField(default=0)
+    total_conversions = models.BigIntegerField(default=0)
+    total_spend = models.FloatField(default=0.0)
+    total_revenue = models.FloatField(default=0.0)
+    ctr = models.FloatField(default=0.0)
+    conversion_rate = models.FloatField(default=0.0)
+    cpc = models.FloatField(default=0.0)
+    cpa = models.FloatField(default=0.0)
+
+    class Meta:
+        # The list endpoint's filters followed by its default keyset order, so
+        # a page is an index range scan with no sort. Keyset pagination for
+        # `ordering=<kpi>` walks (kpi, id); the roi index needs NULLS FIRST and
+        # is created by install_kpi_triggers
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='campaigns_created_id_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='campaigns_status_created_idx'),
+            models.Index(fields=['status', 'platform', '-created_at', '-id'], name='campaigns_status_platform_idx'),
+            models.Index(fields=['platform', '-created_at', '-id'], name='campaigns_platform_created_idx'),
+            models.Index(fields=['ctr', 'id'], name='campaigns_campaign_ctr_id'),
+            models.Index(fields=['conversion_rate', 'id'], name='campaigns_campaign_cvr_id'),
+            models.Index(fields=['cpc', 'id'], name='campaigns_campaign_cpc_id'),
+            models.Index(fields=['cpa', 'id'], name='campaigns_campaign_cpa_id'),
+            models.Index(fields=['amount_spent', 'id'], name='campaigns_campaign_spent_id'),
+            models.Index(fields=['total_revenue', 'id'], name='campaigns_campaign_revenue_id'),
+        ]
+
 class MonthlyPerformance(models.Model):
     campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='monthly_performances')
     month = models.DateField()
@@ -64,3 +94,89 @@ class MonthlyPerformance(models.Model):
 
     def __str__(self):
         return f"{self.campaign.name} - {self.month}"
+
+class PerformanceRollup(models.Model):
+    # Quarterly and yearly totals per campaign, maintained from monthly
+    # performance by the triggers in campaigns/periods.py
+    GRANULARITY_CHOICES = [
+        ('quarter', 'quarter'),
+        ('year', 'year'),
+    ]
+
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='performance_rollups')
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    period_start = models.DateField()
+    months = models.IntegerField(default=0)
+    impressions = models.BigIntegerField(default=0)
+    clicks = models.BigIntegerField(default=0)
+    conversions = models.BigIntegerField(default=0)
+    spend = models.FloatField(default=0.0)
+    revenue = models.FloatField(default=0.0)
+
+    class Meta:
+        # The unique key serves one campaign's window; the index serves the
+        # dashboard's window across campaigns
+        constraints = [
+            models.UniqueConstraint(
+                fields=['campaign', 'granularity', 'period_start'], name='campaigns_rollup_period_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'period_start'], name='campaigns_rollup_window_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign_id} - {self.granularity} {self.period_start}"
+
+class DashboardStats(models.Model):
+    # Single-row rollup kept up to date by the campaign and performance write paths
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    total_campaigns = models.IntegerField(default=0)
+    active_campaigns = models.IntegerField(default=0)
+    paused_campaigns = models.IntegerField(default=0)
+    completed_campaigns = models.IntegerField(default=0)
+    draft_campaigns = models.IntegerField(default=0)
+    total_budget = models.FloatField(default=0.0)
+    spend_sum = models.FloatField(default=0.0)
+    revenue_sum = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard stats ({self.total_campaigns} campaigns)"
+
+
+class Job(models.Model):
+    # Background work queued by the API and run by campaigns/jobs.py workers
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # Not claimed before this time: the retry backoff
+    run_after = models.DateTimeField()
+    # The worker running the job, and until when its claim holds before another worker may take it over
+    locked_by = models.CharField(max_length=128, blank=True, default='')
+    locked_until = models.DateTimeField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        # Workers look for due queued jobs and expired claims; the list endpoint pages by created_at
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='campaigns_job_due_idx'),
+            models.Index(fields=['-created_at'], name='campaigns_job_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.id} ({self.status})"
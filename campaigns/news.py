@@ -0,0 +1,347 @@
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+DEFAULT_NEWS_SETTINGS = {
+    'URL': 'https://real-time-news-data.p.rapidapi.com/search',
+    'TIMEOUT': 10.0,
+    'TTL': 300,
+    'STALE_TTL': 3600,
+    'MAX_ENTRIES': 256,
+    'RATE': 1.0,
+    'BURST': 5,
+    'RATE_WAIT': 2.0,
+    'RETRIES': 2,
+    'BACKOFF': 0.5,
+    'FAILURE_THRESHOLD': 5,
+    'RESET_TIMEOUT': 30,
+}
+
+QUERY_DEFAULTS = (
+    ('query', 'Football'),
+    ('limit', '10'),
+    ('time_published', 'anytime'),
+    ('country', 'US'),
+    ('lang', 'en'),
+)
+
+# Upstream answers worth retrying; other 4xx are the caller's fault
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class NewsUnavailable(Exception):
+    """The upstream call failed and nothing usable is cached."""
+
+    def __init__(self, message, details="No response", status=None, retry_after=None):
+        super().__init__(message)
+        self.details = details
+        self.status = status
+        self.retry_after = retry_after
+
+
+def news_search_request(data):
+    # Query string and headers for the RapidAPI news search
+    querystring = {field: data.get(field, default) for field, default in QUERY_DEFAULTS}
+    headers = {
+        "x-rapidapi-host": os.environ.get("RAPIDAPI_HOST", "real-time-news-data.p.rapidapi.com"),
+        "x-rapidapi-key": os.environ.get("RAPIDAPI_KEY")
+    }
+    return querystring, headers
+
+
+def cache_key(querystring):
+    # The news search is case-insensitive, so "football " and "Football" share an entry
+    query = ' '.join(str(querystring['query']).split()).lower()
+    return (query, *(str(querystring[field]).strip().lower() for field, _ in QUERY_DEFAULTS[1:]))
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=0):
+        """Take one token, waiting up to `timeout` seconds for it. Returns False on timeout."""
+        deadline = self.clock() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if self.clock() + wait > deadline:
+                return False
+            self.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed calls and rejects calls for
+    `reset_timeout` seconds; then lets a single trial call through, closing
+    again if it succeeds.
+    """
+
+    def __init__(self, threshold, reset_timeout, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'half-open' if self.clock() - self._opened_at >= self.reset_timeout else 'open'
+
+    def retry_after(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 0
+            return max(0, self.reset_timeout - (self.clock() - self._opened_at))
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self.clock() - self._opened_at < self.reset_timeout or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def release(self):
+        # The granted call never reached the upstream; let another one try
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.threshold:
+                self._opened_at = self.clock()
+            self._trial = False
+
+
+class _Call:
+    # One in-flight upstream fetch that identical requests wait on
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class NewsFetcher:
+    """
+    Proxy for the RapidAPI news search.
+
+    Results are cached per `cache_key` for `ttl` seconds. Identical searches
+    arriving while a fetch is in flight wait for that fetch instead of making
+    their own. Entries up to `stale_ttl` seconds past expiry are served at
+    once while a background refresh runs, and are also the fallback when the
+    upstream fails. Upstream calls are throttled by a token bucket, retried
+    with jittered exponential backoff and guarded by a circuit breaker.
+    """
+
+    def __init__(self, url, timeout=10.0, ttl=300, stale_ttl=3600, max_entries=256, rate=1.0, burst=5,
+                 rate_wait=2.0, retries=2, backoff=0.5, failure_threshold=5, reset_timeout=30,
+                 clock=time.monotonic, sleep=time.sleep, session=None):
+        self.url = url
+        self.timeout = timeout
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.rate_wait = rate_wait
+        self.retries = retries
+        self.backoff = backoff
+        self.clock = clock
+        self.sleep = sleep
+        self.session = session or _session()
+        self.bucket = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock=clock)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._counters = {'hits': 0, 'stale': 0, 'misses': 0, 'coalesced': 0, 'upstream_calls': 0, 'errors': 0}
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, 'entries': len(self._entries), 'circuit': self.breaker.state}
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def search(self, querystring, headers):
+        """
+        Returns (data, cache status), the status being one of HIT, MISS,
+        COALESCED or STALE. Raises NewsUnavailable when the upstream fails
+        and no cached copy is usable.
+        """
+        key = cache_key(querystring)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        age = self.clock() - entry[0] if entry else None
+
+        if entry and age < self.ttl:
+            self._count('hits')
+            return entry[1], 'HIT'
+        if entry and age < self.ttl + self.stale_ttl:
+            self._count('stale')
+            self._refresh_in_background(key, querystring, headers)
+            return entry[1], 'STALE'
+
+        try:
+            data, leader = self._single_flight(key, querystring, headers)
+        except NewsUnavailable:
+            if entry:
+                # Stale-if-error: anything we have beats an error page
+                self._count('stale')
+                return entry[1], 'STALE'
+            raise
+        self._count('misses' if leader else 'coalesced')
+        return data, 'MISS' if leader else 'COALESCED'
+
+    def _single_flight(self, key, querystring, headers):
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = self._fetch(querystring, headers)
+                with self._lock:
+                    self._entries[key] = (self.clock(), call.result)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            except NewsUnavailable as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result, leader
+
+    def _refresh_in_background(self, key, querystring, headers):
+        with self._lock:
+            if key in self._inflight:
+                return
+
+        def refresh():
+            try:
+                self._single_flight(key, querystring, headers)
+            except NewsUnavailable:
+                pass
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _fetch(self, querystring, headers):
+        import requests
+
+        if not self.breaker.allow():
+            self._count('errors')
+            raise NewsUnavailable("News search is temporarily unavailable", retry_after=self.breaker.retry_after())
+
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = random.uniform(0, self.backoff * 2 ** (attempt - 1))
+                if error.retry_after is not None:
+                    delay = max(delay, min(error.retry_after, self.backoff * 2 ** self.retries))
+                self.sleep(delay)
+            if not self.bucket.acquire(self.rate_wait):
+                if error is None:
+                    # Our own quota ran out; says nothing about the upstream's health
+                    self.breaker.release()
+                    self._count('errors')
+                    raise NewsUnavailable("News search rate limit reached", retry_after=1 / self.bucket.rate)
+                break
+
+            self._count('upstream_calls')
+            try:
+                response = self.session.get(self.url, headers=headers, params=querystring, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = NewsUnavailable(str(e))
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                retry_after = response.headers.get('Retry-After', '')
+                error = NewsUnavailable(
+                    f"{response.status_code} Error from news search", details=response.text,
+                    status=response.status_code, retry_after=float(retry_after) if retry_after.isdigit() else None
+                )
+                continue
+
+            # A 4xx means the request itself is bad; the upstream is healthy
+            self.breaker.record_success()
+            try:
+                response.raise_for_status()
+                return response.json()
+            except (requests.HTTPError, ValueError) as e:
+                self._count('errors')
+                raise NewsUnavailable(str(e), details=response.text, status=response.status_code)
+
+        self.breaker.record_failure()
+        self._count('errors')
+        raise error
+
+
+def _session():
+    # requests is imported on first use to keep it off the cold-start path
+    import requests
+    return requests.Session()
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                options = {**DEFAULT_NEWS_SETTINGS, **getattr(settings, 'NEWS_PROXY', {})}
+                _fetcher = NewsFetcher(**{name.lower(): value for name, value in options.items()})
+    return _fetcher
+
+
+def reset_fetcher():
+    global _fetcher
+    with _fetcher_lock:
+        _fetcher = None
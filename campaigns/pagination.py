@@ -0,0 +1,190 @@
+import base64
+import json
+import re
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+
+from .kpis import NULLABLE_ORDERING_FIELDS
+from .models import Campaign
+
+CAMPAIGN_FIELDS = tuple(field.attname for field in Campaign._meta.concrete_fields)
+
+# (column, descending); newest campaigns first unless `ordering` says otherwise
+DEFAULT_ORDERING = ('created_at', True)
+
+# PostgREST's default cap on the rows of one response
+MAX_ROWS = 1000
+
+# timestamptz as PostgREST renders it: the fraction loses its trailing zeros
+# (`.12345`), which datetime.fromisoformat only accepts from Python 3.11 on
+TIMESTAMP = re.compile(r'(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2})(?:\.(\d{1,6}))?(Z|[+-]\d{2}:\d{2})?')
+
+
+def cursor_fields(ordering=DEFAULT_ORDERING):
+    # Keyset columns; always selected so the next cursor can be built from the last row
+    return (ordering[0], 'id')
+
+
+def encode_cursor(row, ordering=DEFAULT_ORDERING):
+    payload = json.dumps([row[field] for field in cursor_fields(ordering)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def parse_timestamp(value):
+    """Parse a PostgREST timestamp on any supported Python. Raises ValueError."""
+    match = TIMESTAMP.fullmatch(value)
+    if not match:
+        raise ValueError(f"Invalid timestamp: {value}")
+    seconds, fraction, offset = match.groups()
+    offset = '+00:00' if offset == 'Z' else offset or ''
+    return datetime.fromisoformat(f"{seconds}.{(fraction or '').ljust(6, '0')}{offset}")
+
+
+def decode_cursor(cursor, ordering=DEFAULT_ORDERING):
+    column = ordering[0]
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        # Both values end up inside a PostgREST filter, so only accept well-formed ones
+        if column == 'created_at':
+            parse_timestamp(value)
+        elif value is not None or column not in NULLABLE_ORDERING_FIELDS:
+            value = float(value)
+        uuid.UUID(pk)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    return {column: value, 'id': pk}
+
+
+def parse_fields(param, required=()):
+    """
+    Turn a `fields=a,b,c` projection into a select() column list.
+    Raises ValueError on unknown fields.
+    """
+    if not param:
+        return '*'
+    fields = [field.strip() for field in param.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in CAMPAIGN_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    for field in required:
+        if field not in fields:
+            fields.append(field)
+    return ','.join(fields)
+
+
+def parse_limit(param):
+    max_limit = getattr(settings, 'CAMPAIGN_PAGE_MAX_LIMIT', 100)
+    if not param:
+        return min(settings.REST_FRAMEWORK.get('PAGE_SIZE') or max_limit, max_limit)
+    limit = int(param)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, max_limit)
+
+
+def apply_cursor(query, cursor, ordering=DEFAULT_ORDERING):
+    # Rows strictly after the cursor in (column, id) order; NULLs sort lowest
+    column, desc = ordering
+    value, pk = cursor[column], cursor['id']
+    op = 'lt' if desc else 'gt'
+    if value is None:
+        if desc:
+            return query.is_(column, 'null').lt('id', pk)
+        return query.or_(f'{column}.not.is.null,and({column}.is.null,id.gt.{pk})')
+
+    after = f'{column}.{op}."{value}",and({column}.eq."{value}",id.{op}.{pk})'
+    if desc and column in NULLABLE_ORDERING_FIELDS:
+        return query.or_(after + f',{column}.is.null')
+    # The redundant bound gives the planner an index condition to seek to; the or() alone is only a filter
+    return getattr(query, 'lte' if desc else 'gte')(column, value).or_(after)
+
+
+def order(query, ordering=DEFAULT_ORDERING):
+    column, desc = ordering
+    nullsfirst = not desc if column in NULLABLE_ORDERING_FIELDS else None
+    return query.order(column, desc=desc, nullsfirst=nullsfirst).order('id', desc=desc)
+
+
+def paginate(query, params, ordering=DEFAULT_ORDERING):
+    """
+    Keyset-paginate a campaigns select() query on (column, id), by default
+    (created_at, id) descending. Returns the rows of this page and the cursor
+    for the next one (None on the last page).
+    """
+    limit = parse_limit(params.get('limit'))
+    if cursor := params.get('cursor'):
+        query = apply_cursor(query, decode_cursor(cursor, ordering), ordering)
+
+    response = order(query, ordering).limit(limit + 1).execute()
+    rows = response.data[:limit]
+    next_cursor = encode_cursor(rows[-1], ordering) if len(response.data) > limit else None
+    return rows, next_cursor, response.count
+
+
+def encode_offset_cursor(offset):
+    return base64.urlsafe_b64encode(json.dumps({'offset': offset}).encode()).decode().rstrip('=')
+
+
+def decode_offset_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode()))['offset'])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def paginate_ranked(query, params):
+    """
+    Paginate a relevance-ordered query. Rank is not a stable keyset column,
+    so the cursor carries an offset instead; search result sets are small.
+    """
+    limit = parse_limit(params.get('limit'))
+    offset = decode_offset_cursor(params['cursor']) if params.get('cursor') else 0
+
+    response = query.range(offset, offset + limit).execute()
+    rows = response.data[:limit]
+    next_cursor = encode_offset_cursor(offset + limit) if len(response.data) > limit else None
+    return rows, next_cursor, response.count
+
+
+def iter_keyset(build_query, key, chunk_size):
+    """
+    Yield every row of a query, fetching `chunk_size` rows at a time ordered by
+    the indexed column `key`, so memory stays flat however large the table is.
+    """
+    last = None
+    while True:
+        query = build_query()
+        if last is not None:
+            query = query.gt(key, last)
+        rows = query.order(key).limit(chunk_size).execute().data
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][key]
+
+
+async def aiter_keyset(build_query, key, chunk_size):
+    # iter_keyset() for the async client
+    last = None
+    while True:
+        query = build_query()
+        if last is not None:
+            query = query.gt(key, last)
+        rows = (await query.order(key).limit(chunk_size).execute()).data
+        for row in rows:
+            yield row
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][key]
+
+
+async def afetch_all(build_query, key, chunk_size):
+    # Every row aiter_keyset() yields, as a list
+    return [row async for row in aiter_keyset(build_query, key, chunk_size)]
@@ -0,0 +1,283 @@
+import logging
+from datetime import date
+
+
+from . import supabase_client
+from .aggregates import (
+    PERFORMANCE_AMOUNTS, PERFORMANCE_COUNTERS, empty_month, format_month_row, parse_performance_filters
+)
+from .pagination import MAX_ROWS, afetch_all, iter_keyset
+from .tracing import traced
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLE = 'campaigns_performancerollup'
+
+# Performance is recorded per month, so months are the finest granularity;
+# quarters and years are precomputed in ROLLUP_TABLE
+GRANULARITIES = ('month', 'quarter', 'year')
+ROLLUP_GRANULARITIES = ('quarter', 'year')
+
+ROLLUP_METRICS = PERFORMANCE_COUNTERS + PERFORMANCE_AMOUNTS
+ROLLUP_FIELDS = ('campaign_id', 'granularity', 'period_start', 'months') + ROLLUP_METRICS
+
+
+def parse_granularity(value):
+    if value not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    return value
+
+
+def period_start(month, granularity):
+    # First day of the quarter or year containing `month`
+    if granularity == 'year':
+        return date(month.year, 1, 1)
+    if granularity == 'quarter':
+        return date(month.year, month.month - (month.month - 1) % 3, 1)
+    return month.replace(day=1)
+
+
+def parse_period_filters(params):
+    """
+    parse_performance_filters() plus the optional `granularity` param. For a
+    quarter or year, `from` moves back to the start of its period, so the
+    window covers whole periods. Raises ValueError.
+    """
+    filters = parse_performance_filters(params)
+    granularity = parse_granularity(params.get('granularity') or 'month')
+    if granularity != 'month':
+        filters['granularity'] = granularity
+        if 'from' in filters:
+            filters['from'] = period_start(date.fromisoformat(filters['from']), granularity).isoformat()
+    return filters
+
+
+def roi(spend, revenue):
+    return round((revenue - spend) / spend * 100, 2) if spend > 0 else 0.0
+
+
+def format_period_row(row):
+    # A campaign's rollup row as returned by /api/campaigns/<id>/performance?granularity=...
+    result = {
+        'campaign_id': row['campaign_id'],
+        'granularity': row['granularity'],
+        'period': row['period_start'],
+        'months': int(row.get('months') or 0),
+    }
+    for field in PERFORMANCE_COUNTERS:
+        result[field] = int(row.get(field) or 0)
+    for field in PERFORMANCE_AMOUNTS:
+        result[field] = float(row.get(field) or 0.0)
+    result['roi'] = roi(result['spend'], result['revenue'])
+    return result
+
+
+@traced('aggregate')
+def aggregate_by_period(rows):
+    # In-Python fallback: sums campaigns' rollup rows per period, sorted by period
+    aggregated = {}
+    for item in rows:
+        period = item['period_start']
+        if period not in aggregated:
+            aggregated[period] = empty_month(period)
+        for field in PERFORMANCE_COUNTERS:
+            aggregated[period][field] += item.get(field) or 0
+        for field in PERFORMANCE_AMOUNTS:
+            aggregated[period][field] += float(item.get(field) or 0.0)
+    return sorted(aggregated.values(), key=lambda row: row['name'])
+
+
+def rollup_query(supabase, columns, filters):
+    # Rollup rows of filters['granularity'] inside the from/to window; works with the sync and async clients
+    if 'platform' in filters:
+        columns += ',campaigns_campaign!inner(platform)'
+    query = supabase.table(ROLLUP_TABLE).select(columns).eq('granularity', filters['granularity'])
+    if 'from' in filters:
+        query = query.gte('period_start', filters['from'])
+    if 'to' in filters:
+        query = query.lte('period_start', filters['to'])
+    if 'campaign_id' in filters:
+        query = query.eq('campaign_id', filters['campaign_id'])
+    if 'platform' in filters:
+        query = query.eq('campaigns_campaign.platform', filters['platform'])
+    return query
+
+
+def period_performance_rpc(supabase, filters):
+    # One row per period, summed by the `dashboard_period_performance` function in schema.sql
+    return supabase.rpc('dashboard_period_performance', {
+        'p_granularity': filters['granularity'],
+        'p_from': filters.get('from'),
+        'p_to': filters.get('to'),
+        'p_platform': filters.get('platform'),
+        'p_campaign_id': filters.get('campaign_id'),
+    })
+
+
+def fetch_period_performance(supabase, filters, chunk_size=MAX_ROWS):
+    """
+    Totals per quarter or year across campaigns, from the rollup table. The
+    sum runs in Postgres when the RPC function is installed; otherwise the
+    campaigns' rollup rows for the window are read in pages and summed here.
+    """
+    try:
+        rows = period_performance_rpc(supabase, filters).execute().data
+        return [format_month_row({**row, 'month': row['period_start']}) for row in rows]
+    except supabase_client.APIError as e:
+        logger.warning("dashboard_period_performance RPC unavailable, aggregating in Python: %s", e.message)
+    columns = 'id,period_start,' + ','.join(ROLLUP_METRICS)
+    return aggregate_by_period(iter_keyset(lambda: rollup_query(supabase, columns, filters), 'id', chunk_size))
+
+
+async def afetch_period_performance(supabase, filters, chunk_size=MAX_ROWS):
+    # fetch_period_performance() for the async client
+    try:
+        rows = (await period_performance_rpc(supabase, filters).execute()).data
+        return [format_month_row({**row, 'month': row['period_start']}) for row in rows]
+    except supabase_client.APIError as e:
+        logger.warning("dashboard_period_performance RPC unavailable, aggregating in Python: %s", e.message)
+    columns = 'id,period_start,' + ','.join(ROLLUP_METRICS)
+    return aggregate_by_period(await afetch_all(lambda: rollup_query(supabase, columns, filters), 'id', chunk_size))
+
+
+# Triggers keeping ROLLUP_TABLE in step with campaigns_monthlyperformance.
+# Every write adds the change to the (campaign, granularity, period) rows it
+# touches; rows left without months are removed.
+
+def _postgres_changes(source):
+    # Per-period deltas of the transition-table rows in `source`
+    return (
+        "SELECT changes.campaign_id, g.granularity, date_trunc(g.granularity, changes.month)::date AS period_start, "
+        "sum(changes.months) AS months, "
+        + ', '.join(f'sum(changes.{column}) AS {column}' for column in ROLLUP_METRICS)
+        + f" FROM ({source}) changes CROSS JOIN (VALUES ('quarter'), ('year')) g(granularity) "
+        "GROUP BY 1, 2, 3"
+    )
+
+
+def _postgres_rows(table, sign=''):
+    columns = ', '.join(f'{sign}{column} AS {column}' for column in ROLLUP_METRICS)
+    return f"SELECT campaign_id, month, {sign}1 AS months, {columns} FROM {table}"
+
+
+def _postgres_apply(source):
+    fields = ', '.join(ROLLUP_FIELDS)
+    return (
+        f"INSERT INTO {ROLLUP_TABLE} ({fields}) SELECT d.* FROM ({_postgres_changes(source)}) d "
+        # A cascaded campaign delete has already removed the campaign and its rollup rows
+        "WHERE EXISTS (SELECT 1 FROM campaigns_campaign c WHERE c.id = d.campaign_id) "
+        "ON CONFLICT (campaign_id, granularity, period_start) DO UPDATE SET "
+        + ', '.join(f'{column} = {ROLLUP_TABLE}.{column} + EXCLUDED.{column}' for column in ('months',) + ROLLUP_METRICS)
+        + f"; DELETE FROM {ROLLUP_TABLE} r USING (SELECT DISTINCT campaign_id FROM ({source}) changes) d "
+        "WHERE r.campaign_id = d.campaign_id AND r.months <= 0;"
+    )
+
+
+POSTGRES_ROLLUP_SQL = [
+    # Statement-level, like the KPI triggers: one upsert per statement, however many months it touches
+    "CREATE OR REPLACE FUNCTION campaigns_performance_rollup() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+    f"IF TG_OP = 'INSERT' THEN {_postgres_apply(_postgres_rows('new_rows'))} "
+    f"ELSIF TG_OP = 'DELETE' THEN {_postgres_apply(_postgres_rows('old_rows', '-'))} "
+    f"ELSE {_postgres_apply(_postgres_rows('new_rows') + ' UNION ALL ' + _postgres_rows('old_rows', '-'))} "
+    "END IF; RETURN NULL; END; $$",
+    "DROP TRIGGER IF EXISTS campaigns_performance_rollup_insert ON campaigns_monthlyperformance",
+    "DROP TRIGGER IF EXISTS campaigns_performance_rollup_update ON campaigns_monthlyperformance",
+    "DROP TRIGGER IF EXISTS campaigns_performance_rollup_delete ON campaigns_monthlyperformance",
+    "CREATE TRIGGER campaigns_performance_rollup_insert AFTER INSERT ON campaigns_monthlyperformance "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION campaigns_performance_rollup()",
+    "CREATE TRIGGER campaigns_performance_rollup_update AFTER UPDATE ON campaigns_monthlyperformance "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION campaigns_performance_rollup()",
+    "CREATE TRIGGER campaigns_performance_rollup_delete AFTER DELETE ON campaigns_monthlyperformance "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION campaigns_performance_rollup()",
+]
+
+
+def _sqlite_period(granularity, month):
+    if granularity == 'year':
+        return f"date({month}, 'start of year')"
+    return f"date({month}, 'start of month', '-' || ((CAST(strftime('%m', {month}) AS INTEGER) - 1) % 3) || ' months')"
+
+
+def _sqlite_add(row):
+    fields = ', '.join(ROLLUP_FIELDS)
+    statements = []
+    for granularity in ROLLUP_GRANULARITIES:
+        values = ', '.join(
+            [f'{row}.campaign_id', f"'{granularity}'", _sqlite_period(granularity, f'{row}.month'), '1']
+            + [f'{row}.{column}' for column in ROLLUP_METRICS]
+        )
+        statements.append(
+            f"INSERT INTO {ROLLUP_TABLE} ({fields}) VALUES ({values}) "
+            "ON CONFLICT (campaign_id, granularity, period_start) DO UPDATE SET "
+            + ', '.join(f'{column} = {column} + excluded.{column}' for column in ('months',) + ROLLUP_METRICS)
+            + ";"
+        )
+    return ' '.join(statements)
+
+
+def _sqlite_remove(row):
+    statements = []
+    for granularity in ROLLUP_GRANULARITIES:
+        statements.append(
+            f"UPDATE {ROLLUP_TABLE} SET months = months - 1, "
+            + ', '.join(f'{column} = {column} - {row}.{column}' for column in ROLLUP_METRICS)
+            + f" WHERE campaign_id = {row}.campaign_id AND granularity = '{granularity}' "
+            f"AND period_start = {_sqlite_period(granularity, f'{row}.month')};"
+        )
+    statements.append(f"DELETE FROM {ROLLUP_TABLE} WHERE campaign_id = {row}.campaign_id AND months <= 0;")
+    return ' '.join(statements)
+
+
+SQLITE_ROLLUP_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS campaigns_performance_rollup_ai AFTER INSERT ON campaigns_monthlyperformance "
+    f"BEGIN {_sqlite_add('new')} END",
+    "CREATE TRIGGER IF NOT EXISTS campaigns_performance_rollup_ad AFTER DELETE ON campaigns_monthlyperformance "
+    f"BEGIN {_sqlite_remove('old')} END",
+    "CREATE TRIGGER IF NOT EXISTS campaigns_performance_rollup_au AFTER UPDATE ON campaigns_monthlyperformance "
+    f"BEGIN {_sqlite_remove('old')} {_sqlite_add('new')} END",
+]
+
+
+def _backfill_sql(vendor):
+    # Rebuild every rollup row from the monthly rows
+    fields = ', '.join(ROLLUP_FIELDS)
+    sums = ', '.join(f'SUM({column})' for column in ROLLUP_METRICS)
+    selects = []
+    for granularity in ROLLUP_GRANULARITIES:
+        period = (
+            f"date_trunc('{granularity}', month)::date" if vendor == 'postgresql'
+            else _sqlite_period(granularity, 'month')
+        )
+        selects.append(
+            f"SELECT campaign_id, '{granularity}', {period}, COUNT(*), {sums} "
+            f"FROM campaigns_monthlyperformance GROUP BY campaign_id, {period}"
+        )
+    return [f"DELETE FROM {ROLLUP_TABLE}", f"INSERT INTO {ROLLUP_TABLE} ({fields}) " + ' UNION ALL '.join(selects)]
+
+
+def install_rollup_triggers(schema_editor):
+    """
+    Create the rollup triggers for the current database and backfill the
+    rollup table. SQLite drops them when Django remakes the monthly
+    performance table, so migrations that alter it must call this again.
+    """
+    vendor = schema_editor.connection.vendor
+    statements = SQLITE_ROLLUP_SQL if vendor == 'sqlite' else POSTGRES_ROLLUP_SQL if vendor == 'postgresql' else []
+    for statement in statements:
+        schema_editor.execute(statement)
+    if statements:
+        for statement in _backfill_sql(vendor):
+            schema_editor.execute(statement)
+
+
+def remove_rollup_triggers(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS campaigns_performance_rollup_{suffix}")
+    elif vendor == 'postgresql':
+        for suffix in ('insert', 'update', 'delete'):
+            schema_editor.execute(
+                f"DROP TRIGGER IF EXISTS campaigns_performance_rollup_{suffix} ON campaigns_monthlyperformance"
+            )
+        schema_editor.execute("DROP FUNCTION IF EXISTS campaigns_performance_rollup()")
@@ -0,0 +1,61 @@
+import json
+
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Types orjson does not handle natively (Decimal, lazy translations, querysets,
+# other iterables) are converted the way DRF's encoder converts them
+_encoder = JSONEncoder()
+
+# U+2028/U+2029 are valid JSON but end a line in JavaScript; DRF escapes them too
+_LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def dumps(data, sort_keys=False, indent=False):
+    """Compact UTF-8 JSON bytes for `data`, via orjson when it is installed."""
+    if orjson is None:
+        return json.dumps(
+            data, cls=JSONEncoder, sort_keys=sort_keys, ensure_ascii=False, allow_nan=False,
+            indent=2 if indent else None, separators=(',', ': ') if indent else (',', ':'),
+        ).encode()
+
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(data, default=_encoder.default, option=option)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    DRF's JSONRenderer backed by orjson: several times faster on large row
+    lists. Any requested indent is rendered as two spaces.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type or '', renderer_context or {})
+        body = dumps(data, indent=bool(indent))
+        for separator, escaped in _LINE_SEPARATORS:
+            body = body.replace(separator, escaped)
+        return body
+
+
+class JSONResponse(HttpResponse):
+    """
+    `data` rendered like FastJSONRenderer, for the async views (DRF views are
+    sync only). Keeps `data` like DRF's Response so cache_response can store it.
+    """
+
+    def __init__(self, data, status=200, headers=None):
+        super().__init__(FastJSONRenderer().render(data), content_type='application/json', status=status,
+                         headers=headers)
+        self.data = data
@@ -0,0 +1,842 @@
+import functools
+import logging
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import DatabaseError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from . import supabase_client
+from .bulk import OPERATIONS as BULK_OPERATIONS, chunk_errors, chunks, execute_atomic, execute_chunked
+from .aggregates import (
+    PERFORMANCE_AMOUNTS, PERFORMANCE_COUNTERS, PERFORMANCE_TABLE, afetch_monthly_performance, fetch_monthly_performance,
+    format_month_row, monthly_performance_rows
+)
+from .compare import COMPARE_METRICS, compare_query, period_column
+from .export import campaign_export_rows, performance_export_rows
+from .kpis import NULLABLE_ORDERING_FIELDS, apply_kpi_ranges
+from .models import Campaign, DashboardStats, MonthlyPerformance, PerformanceRollup
+from .pagination import (
+    CAMPAIGN_FIELDS, DEFAULT_ORDERING, decode_cursor, decode_offset_cursor, encode_cursor, encode_offset_cursor,
+    iter_keyset, paginate, paginate_ranked, parse_limit
+)
+from .pagination import order as order_query
+from .periods import (
+    ROLLUP_FIELDS, ROLLUP_METRICS, afetch_period_performance, fetch_period_performance, format_period_row, rollup_query
+)
+from .rollups import (
+    BREAKDOWN_DIMENSIONS, STATS_COLUMNS, STATS_ROW_ID, STATUS_COLUMNS, acompute_stats_from_source, afetch_breakdown,
+    apply_stats_delta, aread_stats, campaign_stats_delta, compute_stats_from_source, fetch_breakdown, merge_deltas,
+    performance_stats_delta, read_stats, write_stats
+)
+from .search import ranked_search, search_queryset, substring_search
+from .supabase_client import get_async_supabase_client, get_supabase_client
+from .tracing import count_rows, count_upstream, phase
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGN_TABLE = 'campaigns_campaign'
+PERFORMANCE_FIELDS = tuple(field.attname for field in MonthlyPerformance._meta.concrete_fields)
+PERFORMANCE_METRICS = PERFORMANCE_COUNTERS + PERFORMANCE_AMOUNTS + ('roi',)
+
+
+class RepositoryError(Exception):
+    """A read or write failed in the backend; `message` is safe to return to the client."""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class Repository(ABC):
+    """
+    Data access for campaigns, their monthly performance and the dashboard
+    aggregates. Rows are JSON-ready dicts shaped like the PostgREST responses,
+    whichever backend produced them, and every write keeps the dashboard
+    stats rollup up to date.
+    """
+
+    @abstractmethod
+    def list_campaigns(self, params, columns, ordering, ranges, paginated, include_count):
+        """
+        Campaigns filtered by the list view's `status`, `platform` and `search`
+        params and the KPI `ranges`, projected to `columns`. A search without
+        an explicit `ordering` is ranked by relevance. Returns (rows, next
+        cursor, count). Raises ValueError on a bad `limit` or `cursor`.
+        """
+
+    @abstractmethod
+    def get_campaign(self, pk):
+        """The campaign row, or None."""
+
+    @abstractmethod
+    def create_campaign(self, data):
+        """Insert a validated campaign and return the stored row."""
+
+    @abstractmethod
+    def update_campaign(self, pk, data):
+        """Update the given columns and return the stored row, or None when the campaign is missing."""
+
+    @abstractmethod
+    def delete_campaign(self, pk):
+        """Delete a campaign and its monthly performance; True if it existed."""
+
+    @abstractmethod
+    def campaign_performance(self, pk, filters=None):
+        """
+        Performance of one campaign inside the parse_period_filters() window:
+        its monthly rows by month, or with a `granularity` filter its rollup
+        rows (see periods.format_period_row) by period.
+        """
+
+    @abstractmethod
+    def compare_performance(self, ids, filters):
+        """
+        Monthly rows of the campaigns `ids` inside the parse_period_filters()
+        window (rollup rows with a `granularity`), fetched together: dicts of
+        campaign_id, the compare.period_column() and compare.COMPARE_METRICS.
+        """
+
+    @abstractmethod
+    def existing_campaign_ids(self, ids):
+        """The subset of `ids` naming existing campaigns. Raises RepositoryError."""
+
+    @abstractmethod
+    def upsert_performance(self, records):
+        """
+        Insert or replace monthly performance records keyed on (campaign_id,
+        month), for any number of campaigns. Returns (stored rows, rows they
+        replaced). Raises RepositoryError.
+        """
+
+    @abstractmethod
+    def bulk_campaigns(self, operations, atomic, chunk_size):
+        """
+        Apply bulk.validate_operations() operations and return one result per
+        item. Atomic runs apply everything or nothing and raise RepositoryError;
+        otherwise each chunk of `chunk_size` items succeeds or fails on its own.
+        """
+
+    @abstractmethod
+    def export_campaigns(self, columns, filters):
+        """
+        Iterator over the `columns` of the campaigns matching export.campaign_export
+        filters, in id order, read EXPORT_CHUNK_SIZE rows at a time. Iteration
+        raises RepositoryError when a page cannot be read.
+        """
+
+    @abstractmethod
+    def export_performance(self, filters):
+        """Iterator over the monthly rows matching export.performance_export filters, like export_campaigns."""
+
+    @abstractmethod
+    def dashboard_stats(self):
+        """Rollup counters (see rollups.STATS_COLUMNS), computed from the tables when the rollup is not built."""
+
+    @abstractmethod
+    def stats_breakdown(self):
+        """Campaign count, budget, spend and revenue per platform and per status (see rollups.format_breakdown)."""
+
+    @abstractmethod
+    def stored_dashboard_stats(self):
+        """The rollup counters as stored, or None when the rollup is not built."""
+
+    @abstractmethod
+    def source_dashboard_stats(self):
+        """The rollup counters computed from the campaign and performance tables, without storing them."""
+
+    @abstractmethod
+    def rebuild_dashboard_stats(self):
+        """Recompute the rollup counters from the source tables and store them; returns the counters."""
+
+    @abstractmethod
+    def monthly_performance(self, filters):
+        """Totals per month across campaigns, for parse_performance_filters() filters."""
+
+    @abstractmethod
+    def period_performance(self, filters):
+        """Totals per quarter or year across campaigns, for parse_period_filters() filters with a granularity."""
+
+    @abstractmethod
+    def performance_rows(self, filters):
+        """
+        Every monthly row matching parse_performance_filters() filters, for the
+        analytics module: dicts of campaign_id, month and the metric columns.
+        """
+
+    # Async variants for the ASGI dashboard views. By default they run the sync
+    # method in Django's sync thread, which is where ORM queries have to run.
+
+    async def adashboard_stats(self):
+        return await sync_to_async(self.dashboard_stats)()
+
+    async def astats_breakdown(self):
+        return await sync_to_async(self.stats_breakdown)()
+
+    async def amonthly_performance(self, filters):
+        return await sync_to_async(self.monthly_performance)(filters)
+
+    async def aperiod_performance(self, filters):
+        return await sync_to_async(self.period_performance)(filters)
+
+
+def _filter_query(query, params, ranges=()):
+    if status_param := params.get('status'):
+        query = query.eq('status', status_param)
+    if platform_param := params.get('platform'):
+        query = query.eq('platform', platform_param)
+    return apply_kpi_ranges(query, ranges)
+
+
+class SupabaseRepository(Repository):
+    """Reads and writes through the PostgREST API of the Supabase project."""
+
+    @property
+    def client(self):
+        return get_supabase_client()
+
+    def list_campaigns(self, params, columns, ordering, ranges, paginated, include_count):
+        supabase = self.client
+        # Estimated counts come from the planner statistics instead of a full COUNT(*)
+        count = supabase_client.CountMethod.estimated if include_count else None
+
+        search_param = params.get('search')
+        search_description = params.get('search_description') == 'true'
+        # An explicit ordering takes precedence over relevance
+        if search_param and 'ordering' not in params:
+            try:
+                # Trigram-indexed search, ranked by relevance
+                query = ranked_search(supabase, search_param, columns, count, search_description)
+                query = _filter_query(query, params, ranges)
+                if not paginated:
+                    return query.execute().data, None, None
+                return paginate_ranked(query, params)
+            except supabase_client.APIError as e:
+                logger.warning("search_campaigns RPC unavailable, using ILIKE: %s", e.message)
+
+        query = _filter_query(supabase.table(CAMPAIGN_TABLE).select(columns, count=count), params, ranges)
+        if search_param:
+            query = substring_search(query, search_param, search_description)
+        if not paginated:
+            return order_query(query, ordering).execute().data, None, None
+        return paginate(query, params, ordering)
+
+    def get_campaign(self, pk):
+        response = self.client.table(CAMPAIGN_TABLE).select('*').eq('id', pk).execute()
+        return response.data[0] if response.data else None
+
+    def create_campaign(self, data):
+        supabase = self.client
+        response = supabase.table(CAMPAIGN_TABLE).insert(data).execute()
+        if not response.data:
+            return None
+        apply_stats_delta(supabase, campaign_stats_delta([], response.data))
+        return response.data[0]
+
+    def update_campaign(self, pk, data):
+        supabase = self.client
+        # Only status and budget feed the dashboard rollup
+        before = []
+        if 'status' in data or 'budget' in data:
+            before = supabase.table(CAMPAIGN_TABLE).select('status,budget').eq('id', pk).execute().data
+
+        response = supabase.table(CAMPAIGN_TABLE).update(data).eq('id', pk).execute()
+        if not response.data:
+            return None
+        if before:
+            apply_stats_delta(supabase, campaign_stats_delta(before, response.data))
+        return response.data[0]
+
+    def delete_campaign(self, pk):
+        supabase = self.client
+        # Monthly performance rows are removed by ON DELETE CASCADE, so capture their spend and revenue first
+        performances = supabase.table(PERFORMANCE_TABLE).select('spend,revenue').eq('campaign_id', pk).execute().data
+        response = supabase.table(CAMPAIGN_TABLE).delete().eq('id', pk).execute()
+        if not response.data:
+            return False
+        apply_stats_delta(supabase, merge_deltas(
+            campaign_stats_delta(response.data, []),
+            performance_stats_delta(performances, [])
+        ))
+        return True
+
+    def campaign_performance(self, pk, filters=None):
+        filters = {**(filters or {}), 'campaign_id': pk}
+        filters.pop('platform', None)
+        if 'granularity' in filters:
+            rows = rollup_query(self.client, ','.join(ROLLUP_FIELDS), filters).order('period_start').execute().data
+            return [format_period_row(row) for row in rows]
+
+        query = self.client.table(PERFORMANCE_TABLE).select('*').eq('campaign_id', pk)
+        if 'from' in filters:
+            query = query.gte('month', filters['from'])
+        if 'to' in filters:
+            query = query.lte('month', filters['to'])
+        return query.order('month').execute().data
+
+    def compare_performance(self, ids, filters):
+        # A single `in` query; keyset pages only when the rows exceed one PostgREST response
+        supabase = self.client
+        return list(iter_keyset(lambda: compare_query(supabase, ids, filters), 'id', settings.EXPORT_CHUNK_SIZE))
+
+    def existing_campaign_ids(self, ids):
+        try:
+            rows = self.client.table(CAMPAIGN_TABLE).select('id').in_('id', sorted(ids)).execute().data
+        except supabase_client.APIError as e:
+            raise RepositoryError(e.message)
+        return {row['id'] for row in rows}
+
+    def upsert_performance(self, records):
+        supabase = self.client
+        campaign_ids = sorted({record['campaign_id'] for record in records})
+        months = sorted({record['month'] for record in records})
+        keys = {(record['campaign_id'], record['month']) for record in records}
+
+        try:
+            # Existing rows among these keys tell updates from inserts and feed the stats rollup
+            existing = supabase.table(PERFORMANCE_TABLE)\
+                .select('campaign_id,month,spend,revenue')\
+                .in_('campaign_id', campaign_ids)\
+                .in_('month', months)\
+                .execute().data
+            before = [row for row in existing if (row['campaign_id'], row['month']) in keys]
+            rows = supabase.table(PERFORMANCE_TABLE).upsert(records, on_conflict='campaign_id, month').execute().data
+        except supabase_client.APIError as e:
+            raise RepositoryError(e.message)
+
+        apply_stats_delta(supabase, performance_stats_delta(before, rows))
+        return rows, before
+
+    def bulk_campaigns(self, operations, atomic, chunk_size):
+        supabase = self.client
+        if atomic:
+            try:
+                results, delta = execute_atomic(supabase, operations)
+            except supabase_client.APIError as e:
+                raise RepositoryError(e.message)
+        else:
+            results, delta = execute_chunked(supabase, operations, chunk_size)
+        apply_stats_delta(supabase, delta)
+        return results
+
+    def export_campaigns(self, columns, filters):
+        return _export_rows(campaign_export_rows(self.client, columns, filters), supabase_client.APIError)
+
+    def export_performance(self, filters):
+        return _export_rows(performance_export_rows(self.client, filters), supabase_client.APIError)
+
+    def dashboard_stats(self):
+        # Single-row rollup maintained by the write paths
+        if stats := self.stored_dashboard_stats():
+            return stats
+
+        # Rollup not built yet: scan the source tables in pages, as a rebuild would
+        return self.source_dashboard_stats()
+
+    def stored_dashboard_stats(self):
+        return read_stats(self.client)
+
+    def source_dashboard_stats(self):
+        return compute_stats_from_source(self.client, settings.EXPORT_CHUNK_SIZE)
+
+    def stats_breakdown(self):
+        return fetch_breakdown(self.client, settings.EXPORT_CHUNK_SIZE)
+
+    def rebuild_dashboard_stats(self):
+        stats = self.source_dashboard_stats()
+        write_stats(self.client, stats)
+        return stats
+
+    def monthly_performance(self, filters):
+        # Aggregated per month in the database (falls back to Python when the RPC is missing)
+        return fetch_monthly_performance(self.client, filters)
+
+    def period_performance(self, filters):
+        return fetch_period_performance(self.client, filters)
+
+    def performance_rows(self, filters):
+        supabase = self.client
+        columns = ('id', 'campaign_id', 'month')
+        return list(iter_keyset(
+            lambda: monthly_performance_rows(supabase, filters, columns), 'id', settings.EXPORT_CHUNK_SIZE
+        ))
+
+    # Through the async client, so an ASGI worker serves other requests while PostgREST answers
+
+    async def adashboard_stats(self):
+        supabase = await get_async_supabase_client()
+        if stats := await aread_stats(supabase):
+            return stats
+        return await acompute_stats_from_source(supabase, settings.EXPORT_CHUNK_SIZE)
+
+    async def astats_breakdown(self):
+        return await afetch_breakdown(await get_async_supabase_client(), settings.EXPORT_CHUNK_SIZE)
+
+    async def amonthly_performance(self, filters):
+        return await afetch_monthly_performance(await get_async_supabase_client(), filters)
+
+    async def aperiod_performance(self, filters):
+        return await afetch_period_performance(await get_async_supabase_client(), filters)
+
+
+def _json_value(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _json_row(row):
+    # values() rows carry UUID/date objects; PostgREST returns their string forms
+    return {column: _json_value(value) for column, value in row.items()}
+
+
+def _order(queryset, ordering=DEFAULT_ORDERING):
+    # Same order as pagination.order: (column, id), NULLs lowest
+    column, desc = ordering
+    expression = F(column)
+    if column in NULLABLE_ORDERING_FIELDS:
+        expression = expression.desc(nulls_last=True) if desc else expression.asc(nulls_first=True)
+    else:
+        expression = expression.desc() if desc else expression.asc()
+    return queryset.order_by(expression, '-id' if desc else 'id')
+
+
+def _after(cursor, ordering=DEFAULT_ORDERING):
+    # Q for the rows strictly after `cursor`; mirrors pagination.apply_cursor
+    column, desc = ordering
+    value, pk = cursor[column], cursor['id']
+    op = 'lt' if desc else 'gt'
+    if value is None:
+        if desc:
+            return Q(**{f'{column}__isnull': True, 'id__lt': pk})
+        return Q(**{f'{column}__isnull': False}) | Q(**{f'{column}__isnull': True, 'id__gt': pk})
+
+    after = Q(**{f'{column}__{op}': value}) | Q(**{column: value, f'id__{op}': pk})
+    if desc and column in NULLABLE_ORDERING_FIELDS:
+        return after | Q(**{f'{column}__isnull': True})
+    return Q(**{f'{column}__{op}e': value}) & after
+
+
+def _window(queryset, column, filters):
+    # Restrict `column` to the from/to window of parse_period_filters()
+    if 'from' in filters:
+        queryset = queryset.filter(**{f'{column}__gte': filters['from']})
+    if 'to' in filters:
+        queryset = queryset.filter(**{f'{column}__lte': filters['to']})
+    return queryset
+
+
+def _iter_keyset(queryset, chunk_size):
+    # ORM counterpart of pagination.iter_keyset: `queryset` (values() rows with an id) in id order, page by page
+    last = None
+    while True:
+        page = queryset.order_by('id')
+        if last is not None:
+            page = page.filter(id__gt=last)
+        rows = list(page[:chunk_size])
+        for row in rows:
+            yield _json_row(row)
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]['id']
+
+
+def _export_rows(rows, errors):
+    # Export pages are read lazily; a backend failure while paging surfaces as RepositoryError
+    try:
+        yield from rows
+    except errors as e:
+        raise RepositoryError(getattr(e, 'message', None) or str(e))
+
+
+def _performance_key(record):
+    # Canonical (campaign_id, month) strings, so request values match stored ones
+    month = MonthlyPerformance._meta.get_field('month').to_python(record['month'])
+    return str(uuid.UUID(str(record['campaign_id']))), month.isoformat()
+
+
+class OrmRepository(Repository):
+    """
+    Reads and writes the Django models directly, over DATABASES['default']
+    (e.g. a pooled Postgres, or SQLite for local load tests), skipping the
+    PostgREST hop. Writes and their rollup update share one transaction.
+    """
+
+    def list_campaigns(self, params, columns, ordering, ranges, paginated, include_count):
+        queryset = Campaign.objects.all()
+        if status_param := params.get('status'):
+            queryset = queryset.filter(status=status_param)
+        if platform_param := params.get('platform'):
+            queryset = queryset.filter(platform=platform_param)
+        for column, op, value in ranges:
+            queryset = queryset.filter(**{f'{column}__{op}': value})
+
+        search_param = params.get('search')
+        search_description = params.get('search_description') == 'true'
+        ranked = bool(search_param) and 'ordering' not in params
+        if ranked:
+            queryset = search_queryset(queryset, search_param, search_description)
+        elif search_param:
+            match = Q(name__icontains=search_param)
+            if search_description:
+                match |= Q(description__icontains=search_param)
+            queryset = queryset.filter(match)
+
+        fields = CAMPAIGN_FIELDS if columns == '*' else columns.split(',')
+        if not paginated:
+            queryset = queryset if ranked else _order(queryset, ordering)
+            return [_json_row(row) for row in queryset.values(*fields)], None, None
+
+        limit = parse_limit(params.get('limit'))
+        count = None
+        if include_count:
+            # Counted up to CAMPAIGN_COUNT_LIMIT rows, like the estimate PostgREST returns, not a full COUNT(*)
+            count = queryset.order_by()[:settings.CAMPAIGN_COUNT_LIMIT].count()
+        if ranked:
+            # Rank is not a stable keyset column; page by offset like paginate_ranked
+            offset = decode_offset_cursor(params['cursor']) if params.get('cursor') else 0
+            rows = [_json_row(row) for row in queryset.values(*fields)[offset:offset + limit + 1]]
+            next_cursor = encode_offset_cursor(offset + limit) if len(rows) > limit else None
+            return rows[:limit], next_cursor, count
+
+        if cursor := params.get('cursor'):
+            queryset = queryset.filter(_after(decode_cursor(cursor, ordering), ordering))
+        rows = [_json_row(row) for row in _order(queryset, ordering).values(*fields)[:limit + 1]]
+        next_cursor = encode_cursor(rows[limit - 1], ordering) if len(rows) > limit else None
+        return rows[:limit], next_cursor, count
+
+    def get_campaign(self, pk):
+        try:
+            row = Campaign.objects.filter(pk=pk).values(*CAMPAIGN_FIELDS).first()
+        except ValidationError:
+            return None
+        return _json_row(row) if row else None
+
+    def create_campaign(self, data):
+        with transaction.atomic():
+            campaign = Campaign.objects.create(**data)
+            # Re-read so dates and defaults come back in their stored form
+            row = self.get_campaign(campaign.pk)
+            self._apply_stats_delta(campaign_stats_delta([], [row]))
+        return row
+
+    def update_campaign(self, pk, data):
+        with transaction.atomic():
+            campaigns = Campaign.objects.filter(pk=pk)
+            before = []
+            if 'status' in data or 'budget' in data:
+                before = list(campaigns.select_for_update().values('status', 'budget'))
+            if not campaigns.update(**data):
+                return None
+            row = self.get_campaign(pk)
+            if before:
+                self._apply_stats_delta(campaign_stats_delta(before, [row]))
+        return row
+
+    def delete_campaign(self, pk):
+        with transaction.atomic():
+            try:
+                before = list(Campaign.objects.filter(pk=pk).values('status', 'budget'))
+            except ValidationError:
+                return False
+            if not before:
+                return False
+            performances = list(MonthlyPerformance.objects.filter(campaign_id=pk).values('spend', 'revenue'))
+            Campaign.objects.filter(pk=pk).delete()
+            self._apply_stats_delta(merge_deltas(
+                campaign_stats_delta(before, []),
+                performance_stats_delta(performances, [])
+            ))
+        return True
+
+    def campaign_performance(self, pk, filters=None):
+        filters = filters or {}
+        try:
+            if 'granularity' in filters:
+                rows = _window(
+                    PerformanceRollup.objects.filter(campaign_id=pk, granularity=filters['granularity']),
+                    'period_start', filters,
+                ).order_by('period_start').values(*ROLLUP_FIELDS)
+                return [format_period_row(_json_row(row)) for row in rows]
+            rows = _window(MonthlyPerformance.objects.filter(campaign_id=pk), 'month', filters)
+            return [_json_row(row) for row in rows.order_by('month').values(*PERFORMANCE_FIELDS)]
+        except ValidationError:
+            return []
+
+    def compare_performance(self, ids, filters):
+        column = period_column(filters)
+        if 'granularity' in filters:
+            queryset = PerformanceRollup.objects.filter(granularity=filters['granularity'])
+        else:
+            queryset = MonthlyPerformance.objects.all()
+        rows = _window(queryset.filter(campaign_id__in=ids), column, filters).values('campaign_id', column, *COMPARE_METRICS)
+        return [_json_row(row) for row in rows]
+
+    def existing_campaign_ids(self, ids):
+        try:
+            return {str(pk) for pk in Campaign.objects.filter(pk__in=ids).values_list('pk', flat=True)}
+        except (DatabaseError, ValidationError) as e:
+            raise RepositoryError(str(e))
+
+    def upsert_performance(self, records):
+        try:
+            keys = [_performance_key(record) for record in records]
+            performances = [
+                MonthlyPerformance(**{**record, 'campaign_id': campaign_id, 'month': month})
+                for record, (campaign_id, month) in zip(records, keys)
+            ]
+            with transaction.atomic():
+                stored = MonthlyPerformance.objects.filter(
+                    campaign_id__in={campaign_id for campaign_id, _ in keys},
+                    month__in={month for _, month in keys},
+                )
+                existing = {
+                    (row['campaign_id'], row['month']): row
+                    for row in map(_json_row, stored.values('campaign_id', 'month', 'spend', 'revenue'))
+                }
+                # One INSERT ... ON CONFLICT (campaign_id, month) DO UPDATE for the whole batch
+                MonthlyPerformance.objects.bulk_create(
+                    performances, update_conflicts=True, unique_fields=['campaign', 'month'],
+                    update_fields=list(PERFORMANCE_METRICS),
+                )
+                written = {
+                    (row['campaign_id'], row['month']): row
+                    for row in map(_json_row, stored.values(*PERFORMANCE_FIELDS))
+                }
+                before = [existing[key] for key in dict.fromkeys(keys) if key in existing]
+                rows = [written[key] for key in dict.fromkeys(keys)]
+                self._apply_stats_delta(performance_stats_delta(before, rows))
+        except (DatabaseError, ValidationError, KeyError) as e:
+            raise RepositoryError(str(e))
+        return rows, before
+
+    def bulk_campaigns(self, operations, atomic, chunk_size):
+        if atomic:
+            try:
+                with transaction.atomic():
+                    return self._apply_bulk(operations)
+            except (DatabaseError, ValidationError) as e:
+                raise RepositoryError(str(e))
+
+        results = []
+        for op in BULK_OPERATIONS:
+            for chunk in chunks(operations[op], chunk_size):
+                try:
+                    with transaction.atomic():
+                        results.extend(self._apply_bulk({op: chunk}))
+                except (DatabaseError, ValidationError) as e:
+                    results.extend(chunk_errors(op, chunk, str(e)))
+        return results
+
+    def _apply_bulk(self, operations):
+        # The ORM counterpart of bulk_apply_campaigns; the caller holds the transaction
+        results, deltas = [], []
+
+        if creates := operations.get('create'):
+            Campaign.objects.bulk_create([Campaign(**data) for _, data in creates])
+            deltas.append(campaign_stats_delta([], [data for _, data in creates]))
+            results.extend(
+                {"op": "create", "index": index, "id": data['id'], "status": "created"} for index, data in creates
+            )
+
+        if upserts := operations.get('upsert'):
+            ids = [data['id'] for _, data in upserts]
+            before = list(Campaign.objects.select_for_update().filter(pk__in=ids).values('id', 'status', 'budget'))
+            existing = {str(row['id']) for row in before}
+            for _, data in upserts:
+                if data['id'] in existing:
+                    fields = {column: value for column, value in data.items() if column != 'id'}
+                    Campaign.objects.filter(pk=data['id']).update(**fields)
+            Campaign.objects.bulk_create([Campaign(**data) for _, data in upserts if data['id'] not in existing])
+            after = list(Campaign.objects.filter(pk__in=ids).values('status', 'budget'))
+            deltas.append(campaign_stats_delta(before, after))
+            results.extend(
+                {"op": "upsert", "index": index, "id": data['id'], "status": "updated" if data['id'] in existing else "created"}
+                for index, data in upserts
+            )
+
+        if deletes := operations.get('delete'):
+            ids = [pk for _, pk in deletes]
+            before = list(Campaign.objects.filter(pk__in=ids).values('id', 'status', 'budget'))
+            performances = list(MonthlyPerformance.objects.filter(campaign_id__in=ids).values('spend', 'revenue'))
+            Campaign.objects.filter(pk__in=ids).delete()
+            deltas.append(merge_deltas(campaign_stats_delta(before, []), performance_stats_delta(performances, [])))
+            deleted = {str(row['id']) for row in before}
+            results.extend(
+                {"op": "delete", "index": index, "id": pk, "status": "deleted" if pk in deleted else "not_found"}
+                for index, pk in deletes
+            )
+
+        self._apply_stats_delta(merge_deltas(*deltas))
+        return results
+
+    def export_campaigns(self, columns, filters):
+        queryset = Campaign.objects.all()
+        if 'status' in filters:
+            queryset = queryset.filter(status=filters['status'])
+        if 'platform' in filters:
+            queryset = queryset.filter(platform=filters['platform'])
+        if 'search' in filters:
+            queryset = queryset.filter(name__icontains=filters['search'])
+        if 'from' in filters:
+            queryset = queryset.filter(end_date__gte=filters['from'])
+        if 'to' in filters:
+            queryset = queryset.filter(start_date__lte=filters['to'])
+        return _export_rows(_iter_keyset(queryset.values(*columns), settings.EXPORT_CHUNK_SIZE), DatabaseError)
+
+    def export_performance(self, filters):
+        queryset = _window(MonthlyPerformance.objects.all(), 'month', filters)
+        if 'campaign_id' in filters:
+            queryset = queryset.filter(campaign_id=filters['campaign_id'])
+        if 'status' in filters:
+            queryset = queryset.filter(campaign__status=filters['status'])
+        if 'platform' in filters:
+            queryset = queryset.filter(campaign__platform=filters['platform'])
+        return _export_rows(_iter_keyset(queryset.values(*PERFORMANCE_FIELDS), settings.EXPORT_CHUNK_SIZE), DatabaseError)
+
+    def dashboard_stats(self):
+        if stats := self.stored_dashboard_stats():
+            return stats
+
+        # Rollup not built yet: aggregate in the database rather than fetching rows
+        return self.source_dashboard_stats()
+
+    def stored_dashboard_stats(self):
+        return DashboardStats.objects.filter(pk=STATS_ROW_ID).values(*STATS_COLUMNS).first()
+
+    def source_dashboard_stats(self):
+        campaigns = Campaign.objects.aggregate(
+            total_campaigns=Count('id'),
+            total_budget=Sum('budget'),
+            **{column: Count('id', filter=Q(status=name)) for name, column in STATUS_COLUMNS.items()},
+        )
+        performances = MonthlyPerformance.objects.aggregate(spend_sum=Sum('spend'), revenue_sum=Sum('revenue'))
+        return {column: value or 0 for column, value in {**campaigns, **performances}.items()}
+
+    def rebuild_dashboard_stats(self):
+        stats = self.source_dashboard_stats()
+        DashboardStats.objects.update_or_create(pk=STATS_ROW_ID, defaults=stats)
+        return stats
+
+    def stats_breakdown(self):
+        # One GROUP BY per dimension over the KPI totals the triggers keep on each campaign
+        totals = {
+            'campaigns': Count('id'), 'budget': Sum('budget'), 'spend': Sum('total_spend'),
+            'revenue': Sum('total_revenue'),
+        }
+        return [
+            {'dimension': dimension, 'value': row.pop(dimension), **row}
+            for dimension in BREAKDOWN_DIMENSIONS
+            for row in Campaign.objects.values(dimension).annotate(**totals).order_by(dimension)
+        ]
+
+    def monthly_performance(self, filters):
+        return self._totals(MonthlyPerformance.objects.all(), 'month', filters)
+
+    def period_performance(self, filters):
+        queryset = PerformanceRollup.objects.filter(granularity=filters['granularity'])
+        return self._totals(queryset, 'period_start', filters)
+
+    def performance_rows(self, filters):
+        try:
+            queryset = self._matching(MonthlyPerformance.objects.all(), 'month', filters)
+        except ValidationError:
+            return []
+        return [_json_row(row) for row in queryset.values('campaign_id', 'month', *COMPARE_METRICS)]
+
+    def _matching(self, queryset, column, filters):
+        # Rows in the `column` window of `filters`, for its platform and campaign. Raises ValidationError
+        queryset = _window(queryset, column, filters)
+        if 'platform' in filters:
+            queryset = queryset.filter(campaign__platform=filters['platform'])
+        if 'campaign_id' in filters:
+            queryset = queryset.filter(campaign_id=filters['campaign_id'])
+        return queryset
+
+    def _totals(self, queryset, column, filters):
+        # Metric sums per `column` value across the campaigns matching `filters`
+        try:
+            queryset = self._matching(queryset, column, filters)
+        except ValidationError:
+            return []
+
+        rows = queryset.values(column).annotate(**{field: Sum(field) for field in ROLLUP_METRICS}).order_by(column)
+        return [format_month_row({**_json_row(row), 'month': _json_value(row[column])}) for row in rows]
+
+    def _apply_stats_delta(self, delta):
+        # Same as rollups.apply_stats_delta; a no-op until the rollup row is built
+        if any(delta.values()):
+            DashboardStats.objects.filter(pk=STATS_ROW_ID).update(
+                updated_at=timezone.now(),
+                **{column: F(column) + value for column, value in delta.items() if value},
+            )
+
+
+class TracedRepository:
+    """
+    Wraps a Repository so each call's own time counts as the `decode` phase of
+    the request trace (its round trips count as `upstream`) and the rows it
+    returns are added to the trace's row count.
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    def __getattr__(self, name):
+        method = getattr(self.repository, name)
+        if not callable(method):
+            return method
+
+        if iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def atraced(*args, **kwargs):
+                with phase('decode'):
+                    result = await method(*args, **kwargs)
+                count_upstream(rows=count_rows(result))
+                return result
+            return atraced
+
+        @functools.wraps(method)
+        def traced(*args, **kwargs):
+            with phase('decode'):
+                result = method(*args, **kwargs)
+            count_upstream(rows=count_rows(result))
+            return result
+        return traced
+
+
+BACKENDS = {
+    'supabase': SupabaseRepository,
+    'orm': OrmRepository,
+}
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def get_repository():
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                backend = getattr(settings, 'CAMPAIGNS_DATA_BACKEND', 'supabase')
+                if backend not in BACKENDS:
+                    raise ImproperlyConfigured(
+                        f"CAMPAIGNS_DATA_BACKEND must be one of: {', '.join(BACKENDS)}"
+                    )
+                _repository = TracedRepository(BACKENDS[backend]())
+    return _repository
+
+
+def reset_repository():
+    global _repository
+    with _repository_lock:
+        _repository = None
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+
+from . import supabase_client
+from .pagination import MAX_ROWS, afetch_all, iter_keyset
+from .periods import roi
+from .tracing import traced
+
+logger = logging.getLogger(__name__)
+
+STATS_TABLE = 'campaigns_dashboardstats'
+STATS_ROW_ID = 1
+
+STATUS_COLUMNS = {
+    'Active': 'active_campaigns',
+    'Paused': 'paused_campaigns',
+    'Completed': 'completed_campaigns',
+    'Draft': 'draft_campaigns',
+}
+
+# Running spend and revenue sums give the spend-weighted ROI without reading any performance rows
+STATS_COLUMNS = ('total_campaigns',) + tuple(STATUS_COLUMNS.values()) + ('total_budget', 'spend_sum', 'revenue_sum')
+
+# Campaign columns the stats breakdowns are grouped by
+BREAKDOWN_DIMENSIONS = ('platform', 'status')
+BREAKDOWN_COLUMNS = ('campaigns', 'budget', 'spend', 'revenue')
+
+
+def empty_stats():
+    return {column: 0 for column in STATS_COLUMNS}
+
+
+def campaign_stats_delta(before, after):
+    """
+    Rollup delta for replacing the campaigns in `before` with those in `after`.
+    Both are lists of campaign dicts carrying at least `status` and `budget`.
+    """
+    delta = empty_stats()
+    for campaigns, sign in ((before, -1), (after, 1)):
+        for campaign in campaigns:
+            delta['total_campaigns'] += sign
+            if column := STATUS_COLUMNS.get(campaign.get('status')):
+                delta[column] += sign
+            delta['total_budget'] += sign * float(campaign.get('budget') or 0)
+    return delta
+
+
+def performance_stats_delta(before, after):
+    # Same as campaign_stats_delta, for monthly performance rows carrying `spend` and `revenue`
+    delta = empty_stats()
+    for rows, sign in ((before, -1), (after, 1)):
+        for row in rows:
+            delta['spend_sum'] += sign * float(row.get('spend') or 0)
+            delta['revenue_sum'] += sign * float(row.get('revenue') or 0)
+    return delta
+
+
+def merge_deltas(*deltas):
+    merged = empty_stats()
+    for delta in deltas:
+        for column, value in delta.items():
+            merged[column] += value
+    return merged
+
+
+def apply_stats_delta(supabase, delta):
+    """
+    Atomically add `delta` to the rollup row via the `apply_dashboard_stats_delta`
+    function. Failures are logged rather than raised: the write that produced the
+    delta has already succeeded, and `rebuild_dashboard_stats` repairs any drift.
+    """
+    if not any(delta.values()):
+        return
+    try:
+        supabase.rpc('apply_dashboard_stats_delta', {'delta': delta}).execute()
+    except supabase_client.APIError as e:
+        logger.warning("Failed to update dashboard stats rollup: %s", e.message)
+
+
+def stats_query(supabase):
+    return supabase.table(STATS_TABLE).select('*').eq('id', STATS_ROW_ID)
+
+
+def read_stats(supabase):
+    # Returns the rollup row, or None when the table is missing or not yet built
+    try:
+        response = stats_query(supabase).execute()
+    except supabase_client.APIError:
+        return None
+    return response.data[0] if response.data else None
+
+
+async def aread_stats(supabase):
+    # read_stats() for the async client
+    try:
+        response = await stats_query(supabase).execute()
+    except supabase_client.APIError:
+        return None
+    return response.data[0] if response.data else None
+
+
+def weighted_roi(spend, revenue):
+    # ROI of summed spend and revenue, so every month counts in proportion to its spend
+    return roi(float(spend or 0), float(revenue or 0))
+
+
+def format_stats(stats, breakdown=None):
+    result = {
+        "total_campaigns": stats.get('total_campaigns') or 0,
+        "active_campaigns": stats.get('active_campaigns') or 0,
+        "total_budget": float(stats.get('total_budget') or 0),
+        "total_spend": float(stats.get('spend_sum') or 0),
+        "total_revenue": float(stats.get('revenue_sum') or 0),
+        "avg_roi": weighted_roi(stats.get('spend_sum'), stats.get('revenue_sum')),
+    }
+    if breakdown is not None:
+        result.update(format_breakdown(breakdown))
+    return result
+
+
+def format_breakdown(rows):
+    """
+    `by_platform` and `by_status` lists from breakdown rows (dimension, value
+    and the BREAKDOWN_COLUMNS sums), each with its spend-weighted ROI.
+    """
+    result = {f'by_{dimension}': [] for dimension in BREAKDOWN_DIMENSIONS}
+    for row in sorted(rows, key=lambda row: (row['dimension'], row['value'] or '')):
+        result[f"by_{row['dimension']}"].append({
+            row['dimension']: row['value'],
+            "campaigns": int(row.get('campaigns') or 0),
+            "budget": float(row.get('budget') or 0),
+            "spend": float(row.get('spend') or 0),
+            "revenue": float(row.get('revenue') or 0),
+            "roi": weighted_roi(row.get('spend'), row.get('revenue')),
+        })
+    return result
+
+
+@traced('aggregate')
+def compute_breakdown(campaigns):
+    """
+    Breakdown rows summed in one pass over campaign dicts carrying platform,
+    status, budget, total_spend and total_revenue; only the running sums are kept.
+    """
+    sums = {}
+    for campaign in campaigns:
+        for dimension in BREAKDOWN_DIMENSIONS:
+            key = (dimension, campaign.get(dimension))
+            if key not in sums:
+                sums[key] = {'dimension': dimension, 'value': key[1], 'campaigns': 0, 'budget': 0.0, 'spend': 0.0,
+                             'revenue': 0.0}
+            row = sums[key]
+            row['campaigns'] += 1
+            row['budget'] += float(campaign.get('budget') or 0)
+            row['spend'] += float(campaign.get('total_spend') or 0)
+            row['revenue'] += float(campaign.get('total_revenue') or 0)
+    return list(sums.values())
+
+
+def breakdown_query(supabase):
+    # The campaign columns compute_breakdown() reads
+    return supabase.table('campaigns_campaign').select('id,platform,status,budget,total_spend,total_revenue')
+
+
+def breakdown_rows(supabase, chunk_size):
+    return iter_keyset(lambda: breakdown_query(supabase), 'id', chunk_size)
+
+
+def fetch_breakdown(supabase, chunk_size=MAX_ROWS):
+    """
+    Per-platform and per-status sums, grouped in Postgres by the
+    `dashboard_breakdown` function (a few rows whatever the table size).
+    Without it, campaigns are streamed in pages and summed here.
+    """
+    try:
+        return supabase.rpc('dashboard_breakdown', {}).execute().data
+    except supabase_client.APIError as e:
+        logger.warning("dashboard_breakdown RPC unavailable, summing campaigns in Python: %s", e.message)
+    return compute_breakdown(breakdown_rows(supabase, chunk_size))
+
+
+async def afetch_breakdown(supabase, chunk_size=MAX_ROWS):
+    # fetch_breakdown() for the async client
+    try:
+        return (await supabase.rpc('dashboard_breakdown', {}).execute()).data
+    except supabase_client.APIError as e:
+        logger.warning("dashboard_breakdown RPC unavailable, summing campaigns in Python: %s", e.message)
+    return compute_breakdown(await afetch_all(lambda: breakdown_query(supabase), 'id', chunk_size))
+
+
+@traced('aggregate')
+def compute_stats(campaigns, performances):
+    return merge_deltas(campaign_stats_delta([], campaigns), performance_stats_delta([], performances))
+
+
+def compute_stats_from_source(supabase, chunk_size=MAX_ROWS):
+    # Both tables streamed in keyset pages by id (PostgREST caps each response at 1000 rows by default)
+    campaigns = iter_keyset(lambda: supabase.table('campaigns_campaign').select('id,status,budget'), 'id', chunk_size)
+    performances = iter_keyset(
+        lambda: supabase.table('campaigns_monthlyperformance').select('id,spend,revenue'), 'id', chunk_size
+    )
+    return compute_stats(campaigns, performances)
+
+
+async def acompute_stats_from_source(supabase, chunk_size=MAX_ROWS):
+    # compute_stats_from_source() for the async client; both tables are read concurrently
+    campaigns, performances = await asyncio.gather(
+        afetch_all(lambda: supabase.table('campaigns_campaign').select('id,status,budget'), 'id', chunk_size),
+        afetch_all(lambda: supabase.table('campaigns_monthlyperformance').select('id,spend,revenue'), 'id', chunk_size),
+    )
+    return compute_stats(campaigns, performances)
+
+
+def write_stats(supabase, stats):
+    row = {'id': STATS_ROW_ID, **stats, 'updated_at': datetime.now(timezone.utc).isoformat()}
+    supabase.table(STATS_TABLE).upsert(row).execute()
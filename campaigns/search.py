@@ -0,0 +1,120 @@
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_FUNCTION = 'search_campaigns'
+FTS_TABLE = 'campaigns_campaign_fts'
+
+# The trigram tokenizer (and pg_trgm) cannot index terms shorter than this
+MIN_TRIGRAM_LENGTH = 3
+
+
+def ranked_search(supabase, term, columns='*', count=None, include_description=False):
+    """
+    Campaigns matching `term`, best match first, via the `search_campaigns`
+    function in schema.sql (backed by pg_trgm GIN indexes). The returned
+    builder accepts further PostgREST filters.
+    """
+    params = {'p_term': term, 'p_include_description': include_description}
+    return supabase.rpc(SEARCH_FUNCTION, params, count=count).select(columns)
+
+
+def _quote(value):
+    # Double-quote a value for use inside a PostgREST or=() filter
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _fts_quote(value):
+    # FTS5 string literal: embedded double quotes are doubled
+    return '"' + value.replace('"', '""') + '"'
+
+
+def substring_search(query, term, include_description=False):
+    # Unranked fallback used when the search function is not installed
+    if include_description:
+        return query.or_(f'name.ilike.{_quote(f"%{term}%")},description.ilike.{_quote(f"%{term}%")}')
+    return query.ilike('name', f'%{term}%')
+
+
+def search_queryset(queryset, term, include_description=False):
+    """
+    ORM equivalent of ranked_search for local databases: FTS5 with the trigram
+    tokenizer on SQLite, pg_trgm similarity on Postgres. Matching is substring
+    based on both, the same as the ILIKE filter it replaces.
+    """
+    match = Q(name__icontains=term)
+    if include_description:
+        match |= Q(description__icontains=term)
+
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'postgresql':
+        # Plain ILIKE rather than icontains' UPPER() so the gin_trgm_ops indexes apply
+        where, rank = f'{table}.name ILIKE %s', f'similarity({table}.name, %s)'
+        if include_description:
+            where = f'({table}.name ILIKE %s OR {table}.description ILIKE %s)'
+            rank = f"GREATEST(similarity({table}.name, %s), similarity(COALESCE({table}.description, ''), %s) * 0.5)"
+        terms = [term, term] if include_description else [term]
+        return queryset.filter(RawSQL(where, [f'%{t}%' for t in terms], output_field=BooleanField()))\
+            .annotate(rank=RawSQL(rank, terms)).order_by('-rank', '-created_at', '-id')
+
+    if connection.vendor != 'sqlite' or len(term) < MIN_TRIGRAM_LENGTH:
+        return queryset.filter(match).order_by('-created_at', '-id')
+
+    # Both the match and its bm25 rank are subqueries on the FTS table, so
+    # ordering and any slice run in SQLite rather than over every match in Python
+    columns = '{name description}' if include_description else 'name'
+    query = [f'{columns} : {_fts_quote(term)}']
+    matches = RawSQL(
+        f'{table}.rowid IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)', query,
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f'(SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.rowid)', query
+    )
+    return queryset.filter(matches).annotate(rank=rank).order_by('rank', '-created_at', '-id')
+
+SQLITE_FTS_SQL = [
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "name, description, content='campaigns_campaign', content_rowid='rowid', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON campaigns_campaign BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.rowid, new.name, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON campaigns_campaign BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+    "VALUES ('delete', old.rowid, old.name, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description ON campaigns_campaign BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+    "VALUES ('delete', old.rowid, old.name, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.rowid, new.name, new.description); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+POSTGRES_TRGM_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS campaigns_campaign_name_trgm ON campaigns_campaign USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS campaigns_campaign_description_trgm "
+    "ON campaigns_campaign USING gin (description gin_trgm_ops)",
+]
+
+
+def install_search_index(schema_editor):
+    """
+    Create the search index for the current database. SQLite drops triggers
+    when Django remakes a table, so migrations that alter campaigns_campaign
+    call this again afterwards.
+    """
+    vendor = schema_editor.connection.vendor
+    statements = SQLITE_FTS_SQL if vendor == 'sqlite' else POSTGRES_TRGM_SQL if vendor == 'postgresql' else []
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def remove_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS campaigns_campaign_name_trgm")
+        schema_editor.execute("DROP INDEX IF EXISTS campaigns_campaign_description_trgm")
@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from .kpis import KPI_FIELDS
 from .models import Campaign
 
 class CampaignSerializer(serializers.ModelSerializer):
     class Meta:
         model = Campaign
         fields = '__all__'
+        # Maintained from monthly performance by database triggers
+        read_only_fields = KPI_FIELDS
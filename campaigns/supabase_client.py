@@ -1,13 +1,246 @@
+import asyncio
 import os
-from supabase import create_client, Client
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING
 
-def get_supabase_client() -> Client:
+import httpx
+
+from .tracing import AsyncTracedTransport, TracedTransport, phase
+
+if TYPE_CHECKING:
+    from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+
+# The app only talks to Supabase's PostgREST API (`.table()` and `.rpc()`), so
+# it uses the postgrest client directly rather than supabase.create_client,
+# which also builds (and imports) the auth, storage, realtime and functions
+# clients. postgrest itself is imported when the first client is built, or
+# when APIError / CountMethod are first looked up on this module.
+
+
+def __getattr__(name):
+    if name == "APIError":
+        from postgrest.exceptions import APIError
+        return APIError
+    if name == "CountMethod":
+        from postgrest.types import CountMethod
+        return CountMethod
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _headers(key):
+    # What supabase.create_client sends to PostgREST for an API key
+    return {"apiKey": key, "Authorization": f"Bearer {key}"}
+
+
+def create_client(url, key, http_client):
+    from postgrest import SyncPostgrestClient
+    return SyncPostgrestClient(f"{url.rstrip('/')}/rest/v1", headers=_headers(key), http_client=http_client)
+
+
+def acreate_client(url, key, http_client):
+    from postgrest import AsyncPostgrestClient
+    return AsyncPostgrestClient(f"{url.rstrip('/')}/rest/v1", headers=_headers(key), http_client=http_client)
+
+
+def _get_credentials():
     url = os.environ.get("SUPABASE_URL")
-    
+
     # Use service role key if available, otherwise fallback to anon key
     key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY") or os.environ.get("SUPABASE_ANON_KEY")
-    
+
     if not url or not key:
         raise ValueError("Supabase URL and Key must be set in environment variables.")
-        
-    return create_client(url, key)
+
+    return url, key
+
+
+class SupabaseClientRegistry:
+    """
+    Holds one Supabase client per worker process, backed by a keep-alive
+    httpx connection pool shared by all request threads.
+
+    The client is rebuilt when the process forks (gunicorn workers must not
+    share sockets with the master), when the credentials in the environment
+    change, or when the periodic health check finds the pool closed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client = None
+        self._http_client = None
+        self._credentials = None
+        self._pid = None
+        self._last_check = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+
+    def get(self) -> 'SyncPostgrestClient':
+        credentials = _get_credentials()
+        client = self._client
+
+        # Fast path: the lock is only held to count the hit while the pooled client is still valid
+        if client is not None and self._is_valid(credentials):
+            with self._lock:
+                self.hits += 1
+            return client
+
+        with self._lock:
+            if self._client is not None and self._is_valid(credentials):
+                self.hits += 1
+                return self._client
+
+            if self._client is not None:
+                self.reconnects += 1
+                self._close()
+            self.misses += 1
+            self._client = self._build(*credentials)
+            self._credentials = credentials
+            self._pid = os.getpid()
+            self._last_check = time.monotonic()
+            return self._client
+
+    def reset(self):
+        with self._lock:
+            self._close()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reconnects": self.reconnects,
+            "pool_size": _pool_size(),
+            "connected": self._client is not None,
+        }
+
+    def _is_valid(self, credentials):
+        if self._pid != os.getpid() or self._credentials != credentials:
+            return False
+
+        interval = float(os.environ.get("SUPABASE_HEALTHCHECK_INTERVAL", "30"))
+        now = time.monotonic()
+        if now - self._last_check < interval:
+            return True
+
+        healthy = self._http_client is not None and not self._http_client.is_closed
+        if healthy:
+            self._last_check = now
+        return healthy
+
+    def _build(self, url, key):
+        self._http_client = httpx.Client(transport=TracedTransport(limits=_pool_limits()), timeout=_timeout())
+        return create_client(url, key, self._http_client)
+
+    def _close(self):
+        # After a fork the parent's sockets are still referenced here; only the
+        # owning process may close them, the child just drops its references.
+        if self._http_client is not None and self._pid == os.getpid():
+            self._http_client.close()
+        self._client = None
+        self._http_client = None
+        self._credentials = None
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._client = None
+        self._http_client = None
+        self._credentials = None
+        self._pid = None
+
+
+class AsyncSupabaseClientRegistry:
+    """
+    Async counterpart of SupabaseClientRegistry for the ASGI views. httpx async
+    pools are bound to the event loop that created them, so there is one client
+    per running loop (normally one per worker) instead of one per process.
+    """
+
+    def __init__(self):
+        self._clients = weakref.WeakKeyDictionary()
+        self._locks = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+
+    async def get(self) -> 'AsyncPostgrestClient':
+        loop = asyncio.get_running_loop()
+        credentials = _get_credentials()
+
+        # Fast path: nothing is awaited between the check and the return, so no other task interleaves
+        if (client := self._current(loop, credentials)) is not None:
+            self.hits += 1
+            return client
+
+        # Closing a stale pool yields to the loop; the lock keeps the tasks waiting meanwhile from each
+        # building a client of their own
+        async with self._locks.setdefault(loop, asyncio.Lock()):
+            if (client := self._current(loop, credentials)) is not None:
+                self.hits += 1
+                return client
+
+            if (entry := self._clients.get(loop)) is not None:
+                self.reconnects += 1
+                await entry[2].aclose()
+            self.misses += 1
+            http_client = httpx.AsyncClient(transport=AsyncTracedTransport(limits=_pool_limits()), timeout=_timeout())
+            client = acreate_client(*credentials, http_client)
+            self._clients[loop] = (credentials, client, http_client)
+            return client
+
+    def _current(self, loop, credentials):
+        # This loop's client, unless the credentials changed or its pool was closed
+        entry = self._clients.get(loop)
+        if entry is None:
+            return None
+        entry_credentials, client, http_client = entry
+        return client if entry_credentials == credentials and not http_client.is_closed else None
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reconnects": self.reconnects,
+            "pool_size": _pool_size(),
+            "connected": len(self._clients),
+        }
+
+    def _after_fork(self):
+        self._clients = weakref.WeakKeyDictionary()
+        self._locks = weakref.WeakKeyDictionary()
+
+
+def _pool_size():
+    return int(os.environ.get("SUPABASE_POOL_SIZE", "10"))
+
+
+def _pool_limits():
+    pool_size = _pool_size()
+    return httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=float(os.environ.get("SUPABASE_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+def _timeout():
+    return float(os.environ.get("SUPABASE_TIMEOUT", "30"))
+
+
+registry = SupabaseClientRegistry()
+async_registry = AsyncSupabaseClientRegistry()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=registry._after_fork)
+    os.register_at_fork(after_in_child=async_registry._after_fork)
+
+
+def get_supabase_client() -> 'SyncPostgrestClient':
+    with phase('client'):
+        return registry.get()
+
+
+async def get_async_supabase_client() -> 'AsyncPostgrestClient':
+    with phase('client'):
+        return await async_registry.get()
@@ -1,4 +1,1626 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import logging
+import os
+import pstats
+import runpy
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
+
+import httpx
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from postgrest.exceptions import APIError
+
+from . import analytics, cache, supabase_client, tracing
+from .bulk import execute_chunked, validate_operations
+from .export import PERFORMANCE_FIELDS as PERFORMANCE_EXPORT_FIELDS
+from .async_views import AsyncDashboardPerformanceView, AsyncDashboardStatsView
+from .aggregates import aggregate_by_month, fetch_monthly_performance, parse_performance_filters
+from .repository import OrmRepository, Repository, SupabaseRepository, reset_repository
+from .renderers import FastJSONRenderer
+from .pagination import decode_cursor, encode_cursor, paginate, parse_fields, parse_timestamp
+from .jobs import JobFailed, JobWorker, enqueue, get_worker, reset_worker
+from .models import Campaign, DashboardStats, Job, MonthlyPerformance, PerformanceRollup
+from .news import NewsFetcher, NewsUnavailable, TokenBucket, reset_fetcher
+from .periods import fetch_period_performance, parse_period_filters, period_start
+from .search import search_queryset
+from .rollups import (
+    campaign_stats_delta, compute_stats, empty_stats, fetch_breakdown, format_breakdown, format_stats, merge_deltas,
+    performance_stats_delta
+)
+from .insights import build_insights
+from .supabase_client import AsyncSupabaseClientRegistry, SupabaseClientRegistry
+from .writes import PerformanceWriter, performance_record
+
+SUPABASE_ENV = {"SUPABASE_URL": "https://example.supabase.co", "SUPABASE_SERVICE_ROLE_KEY": "service-key"}
+
 
 class CampaignTests(TestCase):
-    pass
+    def create_campaign(self, name, **kwargs):
+        fields = {
+            "platform": "Email", "budget": 100, "start_date": "2026-01-01",
+            "end_date": "2026-12-31", "goal": "Sales", **kwargs
+        }
+        return Campaign.objects.create(name=name, **fields)
+
+    def test_search_ranks_matches_and_tracks_updates(self):
+        exact = self.create_campaign("Sale")
+        partial = self.create_campaign("Summer Sale Extravaganza")
+        self.create_campaign("Winter Promo", description="Clearance sale")
+
+        results = list(search_queryset(Campaign.objects.all(), "sale"))
+        self.assertEqual([c.pk for c in results], [exact.pk, partial.pk])
+
+        with_description = search_queryset(Campaign.objects.all(), "sale", include_description=True)
+        self.assertEqual(with_description.count(), 3)
+
+        partial.name = "Autumn"
+        partial.save()
+        exact.delete()
+        self.assertFalse(search_queryset(Campaign.objects.all(), "sale").exists())
+
+    def test_search_ranks_and_slices_in_the_database(self):
+        for index in range(5):
+            self.create_campaign(f"Sale {index:02d} extravaganza")
+        with CaptureQueriesContext(connection) as queries:
+            results = list(search_queryset(Campaign.objects.all(), "sale")[:2])
+        self.assertEqual(len(results), 2)
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]["sql"].upper()
+        self.assertIn("LIMIT 2", sql)
+        self.assertNotIn("CASE", sql)
+
+    def test_short_search_terms_fall_back_to_substring_match(self):
+        self.create_campaign("TV spot")
+        self.assertEqual(search_queryset(Campaign.objects.all(), "tv").count(), 1)
+
+    def test_kpis_follow_monthly_performance(self):
+        campaign = self.create_campaign("Spring", amount_spent=0.0)
+        january = MonthlyPerformance.objects.create(
+            campaign=campaign, month="2026-01-01", impressions=1000, clicks=50, conversions=5, spend=100, revenue=150
+        )
+        MonthlyPerformance.objects.create(
+            campaign=campaign, month="2026-02-01", impressions=1000, clicks=150, conversions=15, spend=300, revenue=450
+        )
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.total_impressions, campaign.total_clicks, campaign.total_conversions), (2000, 200, 20))
+        self.assertEqual((campaign.ctr, campaign.conversion_rate, campaign.cpc, campaign.cpa), (10.0, 10.0, 2.0, 20.0))
+        self.assertEqual((campaign.amount_spent, campaign.total_revenue, campaign.roi), (400.0, 600.0, 50.0))
+
+        january.spend = 300
+        january.save()
+        MonthlyPerformance.objects.filter(month="2026-02-01").delete()
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.total_clicks, campaign.amount_spent, campaign.cpc), (50, 300.0, 6.0))
+        self.assertEqual(campaign.roi, -50.0)
+
+
+@override_settings(CAMPAIGNS_DATA_BACKEND="orm")
+class OrmRepositoryTests(TestCase):
+    campaign = {
+        "name": "Orm", "platform": "Email", "status": "Active", "budget": 100,
+        "start_date": "2026-01-01", "end_date": "2026-12-31", "goal": "Sales",
+    }
+
+    def setUp(self):
+        cache.reset_backend()
+        reset_repository()
+        self.addCleanup(reset_repository)
+        self.client = APIClient()
+
+    def test_migrations_seed_the_stats_row(self):
+        # The write paths only apply deltas, so the row must exist before the first write
+        self.assertEqual(DashboardStats.objects.get(pk=1).total_campaigns, 0)
+        self.client.post("/api/campaigns/", self.campaign, format="json")
+        self.assertEqual(DashboardStats.objects.get(pk=1).total_campaigns, 1)
+
+    def test_campaign_crud_and_keyset_pages(self):
+        ids = [self.client.post("/api/campaigns/", {**self.campaign, "name": f"Orm {i}"}).json()["id"] for i in range(5)]
+        self.client.patch(f"/api/campaigns/{ids[0]}/", {"status": "Paused", "budget": 50})
+
+        seen, cursor = [], None
+        while True:
+            page = self.client.get("/api/campaigns/", {"limit": 2, **({"cursor": cursor} if cursor else {})}).json()
+            seen += [row["id"] for row in page["results"]]
+            if not (cursor := page["next"]):
+                break
+        self.assertEqual(seen, ids[::-1])
+        with override_settings(CAMPAIGN_COUNT_LIMIT=3), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get("/api/campaigns/?limit=2&include_count=true").json()["count"], 3)
+        self.assertTrue(any("COUNT(*)" in query["sql"] and "LIMIT 3" in query["sql"] for query in queries))
+        self.assertEqual(self.client.get("/api/campaigns/?status=Paused").json()[0]["budget"], 50.0)
+        self.assertEqual(self.client.get("/api/campaigns/?search=orm 3&limit=1").json()["results"][0]["id"], ids[3])
+
+        self.assertEqual(self.client.delete(f"/api/campaigns/{ids[1]}/").status_code, 204)
+        self.assertEqual(self.client.get(f"/api/campaigns/{ids[1]}/").status_code, 404)
+        self.assertEqual(self.client.get("/api/campaigns/not-a-uuid/").status_code, 404)
+        stats = self.client.get("/api/dashboard/stats").json()
+        self.assertEqual((stats["total_campaigns"], stats["active_campaigns"], stats["total_budget"]), (4, 3, 350.0))
+
+    def test_incomplete_backend_cannot_be_created(self):
+        class CampaignsOnly(Repository):
+            def get_campaign(self, pk):
+                return None
+
+        with self.assertRaises(TypeError):
+            CampaignsOnly()
+
+    async def test_async_dashboard_views_read_the_local_database(self):
+        campaign = await Campaign.objects.acreate(**self.campaign)
+        await MonthlyPerformance.objects.acreate(campaign=campaign, month="2026-01-01", spend=10, revenue=15)
+        with mock.patch("campaigns.repository.get_async_supabase_client") as supabase:
+            response = await AsyncDashboardPerformanceView.as_view()(
+                AsyncRequestFactory().get("/api/dashboard/performance/")
+            )
+        supabase.assert_not_called()
+        self.assertEqual([(row["name"], row["spend"]) for row in json.loads(response.content)], [("2026-01-01", 10.0)])
+        self.assertIn("ETag", response)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_bulk_writes_and_exports_use_the_local_database(self):
+        kept = self.client.post("/api/campaigns/", self.campaign).json()["id"]
+        gone = self.client.post("/api/campaigns/", {**self.campaign, "name": "Gone"}).json()["id"]
+        new = str(uuid.uuid4())
+        with mock.patch("campaigns.repository.get_supabase_client") as supabase:
+            response = self.client.post("/api/campaigns/bulk", {
+                "create": [{**self.campaign, "name": f"Bulk {i}"} for i in range(3)],
+                "upsert": [{**self.campaign, "id": kept, "status": "Paused"}, {**self.campaign, "id": new}],
+                "delete": [gone, str(uuid.uuid4())],
+                "chunk_size": 2,
+            }, format="json")
+            self.assertEqual(response.json()["summary"],
+                             {"created": 4, "updated": 1, "deleted": 1, "not_found": 1, "error": 0})
+
+            response = self.client.post("/api/campaigns/bulk", {
+                "create": [{**self.campaign, "name": "Atomic"}], "upsert": [{**self.campaign, "id": kept}],
+                "atomic": True,
+            }, format="json")
+            self.assertEqual(response.status_code, 200)
+            # A failing atomic request leaves nothing behind
+            with mock.patch.object(Campaign.objects, "bulk_create", side_effect=DatabaseError("disk full")):
+                response = self.client.post("/api/campaigns/bulk", {
+                    "create": [{**self.campaign, "name": "Rolled back"}], "delete": [kept], "atomic": True,
+                }, format="json")
+            self.assertEqual((response.status_code, response.json()["details"]), (400, "Transaction rolled back"))
+
+            lines = b"".join(self.client.get("/api/export/campaigns?format=ndjson&fields=name").streaming_content)
+            performance = b"".join(self.client.get("/api/export/performance").streaming_content)
+        supabase.assert_not_called()
+        self.assertEqual(Campaign.objects.get(pk=kept).status, "Active")
+        self.assertEqual(sorted(json.loads(line)["name"] for line in lines.splitlines()),
+                         ["Atomic", "Bulk 0", "Bulk 1", "Bulk 2", "Orm", "Orm"])
+        self.assertEqual(performance.decode().splitlines(), [",".join(PERFORMANCE_EXPORT_FIELDS)])
+        stats = self.client.get("/api/dashboard/stats").json()
+        self.assertEqual((stats["total_campaigns"], stats["active_campaigns"]), (6, 6))
+
+    def test_performance_upsert_keeps_rollup_and_kpis(self):
+        pk = self.client.post("/api/campaigns/", self.campaign).json()["id"]
+        url = f"/api/campaigns/{pk}/performance/"
+        months = [{"month": "2026-01-01", "clicks": 10, "spend": 100, "revenue": 150}]
+        self.client.put(url, months, format="json")
+        months += [{"month": "2026-02-01", "clicks": 30, "spend": 100, "revenue": 50}]
+        months[0]["revenue"] = 200
+        rows = self.client.put(url, months, format="json").json()
+
+        self.assertEqual([row["roi"] for row in rows], [100.0, -50.0])
+        self.assertEqual(MonthlyPerformance.objects.count(), 2)
+        self.assertEqual([row["month"] for row in self.client.get(url).json()], ["2026-01-01", "2026-02-01"])
+        campaign = self.client.get(f"/api/campaigns/{pk}/").json()
+        self.assertEqual((campaign["total_clicks"], campaign["amount_spent"], campaign["roi"]), (40, 200.0, 25.0))
+        self.assertEqual(self.client.get("/api/dashboard/stats").json()["avg_roi"], 25.0)
+
+        # Lifetime spend and ROI follow the performance rows; a campaign write cannot reset them
+        self.client.patch(f"/api/campaigns/{pk}/", {"name": "Renamed", "amount_spent": 0, "roi": 0}, format="json")
+        campaign = self.client.get(f"/api/campaigns/{pk}/").json()
+        self.assertEqual((campaign["name"], campaign["amount_spent"], campaign["roi"]), ("Renamed", 200.0, 25.0))
+
+        totals = self.client.get("/api/dashboard/performance", {"from": "2026-02"}).json()
+        self.assertEqual(totals, [{"name": "2026-02-01", "impressions": 0, "clicks": 30, "conversions": 0,
+                                   "spend": 100.0, "revenue": 50.0}])
+        DashboardStats.objects.all().delete()
+        cache.reset_backend()
+        self.assertEqual(self.client.get("/api/dashboard/stats").json()["total_budget"], 100.0)
+
+    def test_stats_weight_roi_by_spend_and_break_down(self):
+        big = self.client.post("/api/campaigns/", self.campaign).json()["id"]
+        paused = {**self.campaign, "platform": "LinkedIn", "status": "Paused"}
+        small = self.client.post("/api/campaigns/", paused).json()["id"]
+        self.client.put(f"/api/campaigns/{big}/performance/", [{"month": "2026-01-01", "spend": 1000, "revenue": 1500}],
+                        format="json")
+        self.client.put(f"/api/campaigns/{small}/performance/", [{"month": "2026-01-01", "spend": 5, "revenue": 0}],
+                        format="json")
+
+        with self.assertNumQueries(3):
+            stats = self.client.get("/api/dashboard/stats").json()
+        # (1500 - 1005) / 1005, where the unweighted mean of +50% and -100% would be -25%
+        self.assertEqual((stats["total_spend"], stats["total_revenue"], stats["avg_roi"]), (1005.0, 1500.0, 49.25))
+        self.assertEqual(stats["by_platform"], [
+            {"platform": "Email", "campaigns": 1, "budget": 100.0, "spend": 1000.0, "revenue": 1500.0, "roi": 50.0},
+            {"platform": "LinkedIn", "campaigns": 1, "budget": 100.0, "spend": 5.0, "revenue": 0.0, "roi": -100.0},
+        ])
+        by_status = [(row["status"], row["roi"]) for row in stats["by_status"]]
+        self.assertEqual(by_status, [("Active", 50.0), ("Paused", -100.0)])
+
+        self.client.delete(f"/api/campaigns/{small}/")
+        stats = self.client.get("/api/dashboard/stats").json()
+        self.assertEqual((stats["total_spend"], stats["avg_roi"]), (1000.0, 50.0))
+
+
+@override_settings(CAMPAIGNS_DATA_BACKEND="orm")
+class PerformanceRollupTests(TestCase):
+    def setUp(self):
+        cache.reset_backend()
+        reset_repository()
+        self.addCleanup(reset_repository)
+        self.client = APIClient()
+        self.campaign = Campaign.objects.create(name="Rollup", platform="Email", budget=100, start_date="2026-01-01",
+                                                end_date="2026-12-31", goal="Sales")
+        self.url = f"/api/campaigns/{self.campaign.pk}/performance/"
+        months = ["2025-12-01", "2026-01-01", "2026-02-01", "2026-03-01", "2026-04-01", "2026-05-01"]
+        self.client.put(self.url, [{"month": month, "clicks": 10, "spend": 100, "revenue": 150} for month in months],
+                        format="json")
+
+    def rollups(self):
+        return sorted(PerformanceRollup.objects.values_list("granularity", "period_start", "months", "clicks", "revenue"))
+
+    def expected_rollups(self):
+        # Rebuilt from the monthly rows, as the migration's backfill does
+        totals = {}
+        for row in MonthlyPerformance.objects.all():
+            for granularity in ("quarter", "year"):
+                key = (granularity, period_start(row.month, granularity))
+                months, clicks, revenue = totals.get(key, (0, 0, 0.0))
+                totals[key] = (months + 1, clicks + row.clicks, revenue + row.revenue)
+        return sorted(key + value for key, value in totals.items())
+
+    def test_triggers_follow_monthly_writes(self):
+        self.assertEqual(self.rollups(), self.expected_rollups())
+        self.assertEqual(len(self.rollups()), 5)
+
+        self.client.put(self.url, [{"month": "2026-02-01", "clicks": 40, "spend": 100, "revenue": 50}], format="json")
+        MonthlyPerformance.objects.filter(month="2025-12-01").delete()
+        self.assertEqual(self.rollups(), self.expected_rollups())
+        self.assertFalse(PerformanceRollup.objects.filter(period_start="2025-01-01").exists())
+
+        self.campaign.delete()
+        self.assertFalse(PerformanceRollup.objects.exists())
+
+    def test_granularity_and_window(self):
+        quarters = self.client.get(self.url, {"granularity": "quarter", "from": "2026-02", "to": "2026-06"}).json()
+        self.assertEqual([(row["period"], row["months"], row["clicks"]) for row in quarters],
+                         [("2026-01-01", 3, 30), ("2026-04-01", 2, 20)])
+        self.assertEqual((quarters[0]["spend"], quarters[0]["revenue"], quarters[0]["roi"]), (300.0, 450.0, 50.0))
+        self.assertEqual(len(self.client.get(self.url, {"from": "2026-04"}).json()), 2)
+
+        years = self.client.get("/api/dashboard/performance", {"granularity": "year"}).json()
+        self.assertEqual([(row["name"], row["clicks"]) for row in years], [("2025-01-01", 10), ("2026-01-01", 50)])
+        filtered = self.client.get("/api/dashboard/performance", {"granularity": "quarter", "platform": "Facebook"})
+        self.assertEqual(filtered.json(), [])
+
+        response = self.client.get("/api/dashboard/performance", {"granularity": "week"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "granularity must be one of: month, quarter, year")
+
+
+@override_settings(CAMPAIGNS_DATA_BACKEND="orm")
+class PerformanceWriteTests(TestCase):
+    def setUp(self):
+        cache.reset_backend()
+        reset_repository()
+        self.addCleanup(reset_repository)
+        self.addCleanup(cache.reset_backend)
+        self.client = APIClient()
+        campaign = Campaign.objects.create(name="Autosave", platform="Email", budget=100, start_date="2026-01-01",
+                                           end_date="2026-12-31", goal="Sales")
+        self.pk = str(campaign.pk)
+        self.url = f"/api/campaigns/{self.pk}/performance/"
+        self.months = [{"month": "2026-01-01", "clicks": 10, "spend": 100, "revenue": 150},
+                       {"month": "2026-02", "clicks": 20, "spend": 100, "revenue": 50}]
+        patcher = mock.patch.object(OrmRepository, "upsert_performance", autospec=True,
+                                    side_effect=OrmRepository.upsert_performance)
+        self.upsert = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def written_months(self):
+        return [[record["month"] for record in call.args[1]] for call in self.upsert.call_args_list]
+
+    def test_only_changed_months_are_upserted(self):
+        first = self.client.put(self.url, self.months, format="json").json()
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(self.client.put(self.url, self.months, format="json").json(), first)
+        # Nothing written, so the cached reads stay valid
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.months[1]["revenue"] = 300
+        rows = self.client.put(self.url, self.months, format="json").json()
+        self.assertEqual([row["roi"] for row in rows], [50.0, 200.0])
+        self.assertEqual(self.written_months(), [["2026-01-01", "2026-02-01"], ["2026-02-01"]])
+        self.assertEqual(self.client.get(f"/api/campaigns/{self.pk}/").json()["total_revenue"], 450.0)
+
+    def test_shared_backend_caches_the_stored_rows(self):
+        with override_settings(CAMPAIGNS_CACHE={"BACKEND": "django"}):
+            cache.reset_backend()
+            self.client.put(self.url, self.months, format="json")
+            with self.assertNumQueries(0):
+                self.client.put(self.url, self.months, format="json")
+            # Another write path invalidating the campaign retires the cached rows
+            MonthlyPerformance.objects.filter(month="2026-01-01").update(clicks=99)
+            cache.invalidate(f"performance:{self.pk}")
+            self.client.put(self.url, self.months, format="json")
+        self.assertEqual(self.written_months(), [["2026-01-01", "2026-02-01"], ["2026-01-01"]])
+        self.assertEqual(MonthlyPerformance.objects.get(month="2026-01-01").clicks, 10)
+
+    def test_idempotency_key_replays_the_first_response(self):
+        first = self.client.put(self.url, self.months, format="json", HTTP_IDEMPOTENCY_KEY="save-1")
+        MonthlyPerformance.objects.update(clicks=0)
+        retry = self.client.put(self.url, self.months, format="json", HTTP_IDEMPOTENCY_KEY="save-1")
+        self.assertEqual((retry.json(), retry["Idempotent-Replayed"]), (first.json(), "true"))
+        self.assertEqual(len(self.written_months()), 1)
+
+        reused = self.client.put(self.url, self.months[:1], format="json", HTTP_IDEMPOTENCY_KEY="save-1")
+        self.assertEqual(reused.status_code, 422)
+        # Failed attempts are not stored
+        invalid = [{"month": "January"}]
+        self.assertEqual(self.client.put(self.url, invalid, format="json", HTTP_IDEMPOTENCY_KEY="save-2").status_code, 400)
+        self.client.put(self.url, self.months, format="json", HTTP_IDEMPOTENCY_KEY="save-2")
+        self.assertEqual(MonthlyPerformance.objects.get(month="2026-01-01").clicks, 10)
+
+    def test_idempotency_key_is_claimed_while_the_first_attempt_runs(self):
+        retries, upsert = [], self.upsert.side_effect
+
+        def retry_meanwhile(repository, records):
+            retries.append(self.client.put(self.url, self.months, format="json", HTTP_IDEMPOTENCY_KEY="save-3"))
+            return upsert(repository, records)
+
+        self.upsert.side_effect = retry_meanwhile
+        first = self.client.put(self.url, self.months, format="json", HTTP_IDEMPOTENCY_KEY="save-3")
+        self.assertEqual((first.status_code, retries[0].status_code, retries[0]["Retry-After"]), (200, 409, "1"))
+        self.assertEqual(len(self.written_months()), 1)
+
+    @override_settings(CAMPAIGNS_CACHE={"MAX_ENTRIES": 1})
+    def test_idempotency_records_outlive_response_cache_eviction(self):
+        cache.reset_backend()
+        self.client.put(self.url, self.months, format="json", HTTP_IDEMPOTENCY_KEY="save-4")
+        for params in ({"page": 1}, {"page": 2}, {"page": 3}):
+            self.client.get("/api/campaigns/", params)
+        retry = self.client.put(self.url, self.months, format="json", HTTP_IDEMPOTENCY_KEY="save-4")
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+
+
+@override_settings(CAMPAIGNS_CACHE={"BACKEND": "none"})
+class PerformanceWriterTests(SimpleTestCase):
+    def setUp(self):
+        cache.reset_backend()
+        self.addCleanup(cache.reset_backend)
+        self.started, self.release = threading.Event(), threading.Event()
+        self.repository = mock.MagicMock()
+        self.repository.campaign_performance.return_value = []
+        self.repository.upsert_performance.side_effect = self.upsert
+        patcher = mock.patch("campaigns.writes.get_repository", return_value=self.repository)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upsert(self, records):
+        self.started.set()
+        self.release.wait(5)
+        return [{**record, "id": 1} for record in records], []
+
+    def test_concurrent_puts_for_a_campaign_share_one_write(self):
+        writer = PerformanceWriter()
+        results = {}
+
+        def put(name, clicks, months):
+            records = [performance_record("c1", {"month": month, "clicks": clicks}) for month in months]
+            results[name] = writer.put("c1", records)
+
+        def start(*args, until):
+            thread = threading.Thread(target=put, args=args)
+            thread.start()
+            while not until():
+                time.sleep(0.001)
+            return thread
+
+        threads = [start("first", 1, ["2026-01-01"], until=self.started.is_set)]
+        # Both arrive while the first write is running and are merged, the later one winning per month
+        threads.append(start("second", 2, ["2026-01-01", "2026-02-01"], until=lambda: writer._pending))
+        threads.append(start("third", 3, ["2026-02-01"], until=lambda: writer.stats()["merged"]))
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        written = [[(record["month"], record["clicks"]) for record in call.args[0]]
+                   for call in self.repository.upsert_performance.call_args_list]
+        self.assertEqual(written, [[("2026-01-01", 1)], [("2026-01-01", 2), ("2026-02-01", 3)]])
+        self.assertEqual([row["clicks"] for row in results["second"]], [2, 3])
+        self.assertEqual([row["clicks"] for row in results["third"]], [3])
+        self.assertEqual(writer.stats()["merged"], 1)
+
+
+@override_settings(CAMPAIGNS_DATA_BACKEND="orm", CAMPAIGN_COMPARE_MAX_IDS=3)
+class CampaignCompareTests(TestCase):
+    def setUp(self):
+        cache.reset_backend()
+        reset_repository()
+        self.addCleanup(reset_repository)
+        self.client = APIClient()
+        fields = {"platform": "Email", "budget": 100, "start_date": "2026-01-01", "end_date": "2026-12-31",
+                  "goal": "Sales"}
+        self.first = Campaign.objects.create(name="First", **fields)
+        self.second = Campaign.objects.create(name="Second", **fields)
+        for campaign, month, spend in ((self.first, "2026-01-01", 100), (self.first, "2026-03-01", 200),
+                                       (self.second, "2026-02-01", 50)):
+            MonthlyPerformance.objects.create(campaign=campaign, month=month, clicks=10, spend=spend, revenue=150)
+
+    def compare(self, *ids, **params):
+        return self.client.get("/api/campaigns/compare", {"ids": ",".join(str(pk) for pk in ids), **params})
+
+    def test_series_are_aligned_and_zero_filled(self):
+        missing = uuid.uuid4()
+        body = self.compare(self.second.pk, self.first.pk, missing).json()
+        self.assertEqual(body["periods"], ["2026-01-01", "2026-02-01", "2026-03-01"])
+        second, first, empty = body["campaigns"]
+        self.assertEqual((second["id"], empty["id"]), (str(self.second.pk), str(missing)))
+        self.assertEqual(first["series"]["spend"], [100.0, 0.0, 200.0])
+        self.assertEqual(first["series"]["roi"], [50.0, 0.0, -25.0])
+        self.assertEqual(second["series"]["clicks"], [0, 10, 0])
+        self.assertEqual(first["totals"], {"impressions": 0, "clicks": 20, "conversions": 0, "spend": 300.0,
+                                           "revenue": 300.0, "roi": 0.0})
+        self.assertEqual(empty["totals"]["clicks"], 0)
+
+        window = self.compare(self.first.pk, **{"from": "2025-12", "to": "2026-01"}).json()
+        self.assertEqual(window["periods"], ["2025-12-01", "2026-01-01"])
+        self.assertEqual(window["campaigns"][0]["series"]["clicks"], [0, 10])
+        quarters = self.compare(self.first.pk, self.second.pk, granularity="quarter").json()
+        self.assertEqual(quarters["periods"], ["2026-01-01"])
+        self.assertEqual([c["totals"]["spend"] for c in quarters["campaigns"]], [300.0, 50.0])
+
+    def test_invalid_requests(self):
+        for params, error in (
+            ({}, "ids is required: a comma-separated list of campaign ids"),
+            ({"ids": "not-a-uuid"}, "Invalid campaign id: not-a-uuid"),
+            ({"ids": ",".join(str(uuid.uuid4()) for _ in range(4))}, "At most 3 campaigns can be compared at once"),
+            ({"ids": str(self.first.pk), "from": "1900-01", "to": "2100-01"},
+             "The from/to window may span at most 600 periods"),
+        ):
+            response = self.client.get("/api/campaigns/compare/", params)
+            self.assertEqual((response.status_code, response.json()["error"]), (400, error))
+
+    def test_supabase_fetches_all_campaigns_in_one_query(self):
+        supabase = mock.MagicMock()
+        query = supabase.table.return_value.select.return_value.in_.return_value
+        query.order.return_value.limit.return_value.execute.return_value.data = [
+            {"id": 1, "campaign_id": str(self.first.pk), "month": "2026-01-01", "clicks": 5, "spend": 10,
+             "revenue": 20},
+        ]
+        with override_settings(CAMPAIGNS_DATA_BACKEND="supabase"), \
+                mock.patch("campaigns.repository.get_supabase_client", return_value=supabase):
+            reset_repository()
+            body = self.compare(self.first.pk, self.second.pk).json()
+        supabase.table.return_value.select.return_value.in_.assert_called_once_with(
+            "campaign_id", [str(self.first.pk), str(self.second.pk)]
+        )
+        self.assertEqual(supabase.table.call_count, 1)
+        self.assertEqual([c["series"]["clicks"] for c in body["campaigns"]], [[5], [0]])
+
+
+class AnalyticsTests(SimpleTestCase):
+    rows = [
+        {"month": "2026-03-01", "campaign_id": "b", "clicks": 30, "spend": 50.0, "revenue": None},
+        {"month": "2026-01-15", "campaign_id": "a", "clicks": 10, "spend": "20.5", "revenue": 41},
+        {"month": "2026-01-01", "campaign_id": "b", "clicks": None, "spend": 10, "revenue": 10},
+        {"month": "2026-03-01", "campaign_id": "a", "clicks": 5, "revenue": 8.5},
+    ]
+
+    def test_frame_sums_by_key(self):
+        # numpy when installed, then the pure-Python fallback
+        for numpy in (None, False):
+            with self.subTest(numpy=numpy), mock.patch.object(analytics, "_numpy", numpy):
+                frame = analytics.PerformanceFrame(self.rows, ("month", "campaign_id"), ("clicks", "spend", "revenue"))
+                self.assertEqual(frame.labels["campaign_id"], ["a", "b"])
+                self.assertEqual(frame.sum_by("campaign_id"), (["a", "b"], {
+                    "clicks": [15.0, 30.0], "spend": [20.5, 60.0], "revenue": [49.5, 10.0]
+                }))
+                months = ["2025-12-01", "2026-01-01", "2026-02-01", "2026-03-01"]
+                by_month = frame.sum_by("month", label=lambda value: value[:7] + "-01", labels=months)
+                self.assertEqual(by_month, (months, {
+                    "clicks": [0.0, 10.0, 0.0, 35.0], "spend": [0.0, 30.5, 0.0, 50.0], "revenue": [0.0, 51.0, 0.0, 8.5]
+                }))
+                self.assertEqual(frame.sum_by("month", labels=["2026-03-01"])[1]["clicks"], [35.0])
+                empty = analytics.PerformanceFrame([], ("month",), ("clicks",))
+                self.assertEqual(empty.sum_by("month"), ([], {"clicks": []}))
+
+    def test_series_helpers(self):
+        for numpy in (None, False):
+            with self.subTest(numpy=numpy), mock.patch.object(analytics, "_numpy", numpy):
+                self.assertEqual(analytics.weighted_roi([100, 0, 40], [150, 20, 30]), [50.0, 0.0, -25.0])
+                self.assertEqual(analytics.month_over_month([10, 15, 0, 5]), [None, 50.0, -100.0, None])
+                self.assertEqual(analytics.moving_average([1, 2, 4, 8], 3), [None, None, 2.33, 4.67])
+                self.assertEqual(analytics.moving_average([1, 2], 3), [None, None])
+                self.assertEqual(analytics.trend_score([10, 10, 10]), (50, 0.0))
+                self.assertEqual(analytics.trend_score([95, 100, 105]), (73, 5.0))
+                self.assertEqual(analytics.trend_score([30, 20, 10]), (0, -50.0))
+                self.assertEqual(analytics.trend_score([7]), (50, 0.0))
+
+
+@override_settings(CAMPAIGNS_DATA_BACKEND="orm")
+class InsightsTrendsTests(TestCase):
+    def setUp(self):
+        cache.reset_backend()
+        reset_repository()
+        self.addCleanup(reset_repository)
+        self.client = APIClient()
+        fields = {"budget": 100, "start_date": "2026-01-01", "end_date": "2026-12-31", "goal": "Sales"}
+        self.email = Campaign.objects.create(name="Email", platform="Email", **fields)
+        self.search = Campaign.objects.create(name="Search", platform="Google Ads", **fields)
+        for campaign, month, clicks, spend, revenue in (
+            (self.email, "2026-01-01", 100, 100, 150), (self.email, "2026-02-01", 110, 100, 90),
+            (self.email, "2026-04-01", 130, 50, 100), (self.search, "2026-02-01", 40, 200, 300),
+        ):
+            MonthlyPerformance.objects.create(
+                campaign=campaign, month=month, clicks=clicks, spend=spend, revenue=revenue
+            )
+
+    def test_trends_are_computed_from_performance(self):
+        body = self.client.get("/api/insights/trends/", {"window": 2}).json()
+        self.assertEqual((body["metric"], body["trend"]), ("clicks", "down"))
+        # 450 spend over 380 clicks
+        self.assertEqual((body["search_volume"], body["competition"]), ("0/month", "Medium"))
+        self.assertEqual(body["interest_over_time"], [
+            {"name": "Jan", "month": "2026-01-01", "value": 100, "change": None, "moving_average": None},
+            {"name": "Feb", "month": "2026-02-01", "value": 150, "change": 50.0, "moving_average": 125.0},
+            {"name": "Mar", "month": "2026-03-01", "value": 0, "change": -100.0, "moving_average": 75.0},
+            {"name": "Apr", "month": "2026-04-01", "value": 130, "change": None, "moving_average": 65.0},
+        ])
+        self.assertEqual(body["totals"], {"impressions": 0, "clicks": 380, "conversions": 0, "spend": 450.0,
+                                          "revenue": 640.0, "roi": 42.22})
+        self.assertEqual(body["top_campaigns"], [
+            {"id": str(self.email.pk), "clicks": 340, "roi": 36.0},
+            {"id": str(self.search.pk), "clicks": 40, "roi": 50.0},
+        ])
+
+    def test_filters_and_metric(self):
+        body = self.client.get("/api/insights/trends/", {
+            "metric": "roi", "platform": "Email", "from": "2026-01", "to": "2026-02"
+        }).json()
+        self.assertEqual([point["value"] for point in body["interest_over_time"]], [50.0, -10.0])
+        self.assertEqual(body["top_campaigns"], [{"id": str(self.email.pk), "roi": 20.0}])
+        self.assertEqual(self.client.get("/api/insights/trends/", {"campaign_id": "nope"}).json()["top_campaigns"], [])
+
+        row = {"month": "2026-01-01", "campaign_id": "a", "impressions": 4_800_000, "clicks": 10, "conversions": 0,
+               "spend": 50.0, "revenue": 0.0}
+        insights = build_insights([row, {**row, "month": "2026-02-01", "impressions": 0}], "clicks", 3, {})
+        self.assertEqual((insights["search_volume"], insights["competition"]), ("2.4M/month", "High"))
+
+        for params, error in (
+            ({"metric": "ctr"}, "metric must be one of: impressions, clicks, conversions, spend, revenue, roi"),
+            ({"window": "0"}, "window must be an integer between 1 and 12"),
+            ({"window": "x"}, "window must be an integer between 1 and 12"),
+        ):
+            response = self.client.get("/api/insights/trends/", params)
+            self.assertEqual((response.status_code, response.json()["error"]), (400, error))
+
+
+@mock.patch.dict(os.environ, SUPABASE_ENV)
+@mock.patch("campaigns.supabase_client.create_client", side_effect=lambda *args, **kwargs: object())
+class SupabaseClientRegistryTests(SimpleTestCase):
+    def test_client_is_reused(self, create_client):
+        registry = SupabaseClientRegistry()
+        self.assertIs(registry.get(), registry.get())
+        self.assertEqual(create_client.call_count, 1)
+        self.assertEqual(registry.stats()["hits"], 1)
+        self.assertEqual(registry.stats()["misses"], 1)
+
+    def test_rebuilds_on_credential_rotation(self, create_client):
+        registry = SupabaseClientRegistry()
+        first = registry.get()
+        with mock.patch.dict(os.environ, {"SUPABASE_SERVICE_ROLE_KEY": "rotated-key"}):
+            second = registry.get()
+        self.assertIsNot(first, second)
+        self.assertEqual(registry.stats()["reconnects"], 1)
+
+    def test_rebuilds_after_fork(self, create_client):
+        registry = SupabaseClientRegistry()
+        first = registry.get()
+        registry._after_fork()
+        self.assertIsNot(first, registry.get())
+
+    def test_rebuilds_when_pool_closed(self, create_client):
+        registry = SupabaseClientRegistry()
+        first = registry.get()
+        registry._http_client.close()
+        with mock.patch.dict(os.environ, {"SUPABASE_HEALTHCHECK_INTERVAL": "0"}):
+            self.assertIsNot(first, registry.get())
+
+    def test_counters_add_up_across_threads(self, create_client):
+        registry = SupabaseClientRegistry()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: registry.get(), range(800)))
+        self.assertEqual((registry.stats()["hits"], registry.stats()["misses"]), (799, 1))
+
+    async def test_concurrent_async_reconnects_build_one_client(self, create_client):
+        registry = AsyncSupabaseClientRegistry()
+        with mock.patch("campaigns.supabase_client.acreate_client", side_effect=lambda *args: object()) as acreate:
+            first = await registry.get()
+            loop = asyncio.get_running_loop()
+            credentials, _, http_client = registry._clients[loop]
+            await http_client.aclose()
+            # Closing the stale pool yields to the loop, where the other callers are waiting
+            async def close():
+                await asyncio.sleep(0)
+            stale = mock.Mock(is_closed=True, aclose=mock.AsyncMock(side_effect=close))
+            registry._clients[loop] = (credentials, first, stale)
+            clients = await asyncio.gather(*(registry.get() for _ in range(5)))
+        self.assertEqual(len({id(client) for client in clients}), 1)
+        self.assertIsNot(clients[0], first)
+        self.assertEqual((acreate.call_count, stale.aclose.await_count), (2, 1))
+        self.assertEqual((registry.stats()["misses"], registry.stats()["reconnects"]), (2, 1))
+
+
+class AsyncDashboardViewTests(SimpleTestCase):
+    def setUp(self):
+        cache.reset_backend()
+        reset_repository()
+        self.addCleanup(reset_repository)
+
+    def supabase(self, tables):
+        supabase = mock.MagicMock()
+
+        def table(name):
+            # Keyset pages of the table's rows, by id
+            query, page = mock.MagicMock(), {"after": 0, "limit": None}
+            query.select.return_value = query
+            query.eq.return_value = query
+            query.order.return_value = query
+            query.gt.side_effect = lambda key, value: page.update(after=value) or query
+            query.limit.side_effect = lambda limit: page.update(limit=limit) or query
+            query.execute = mock.AsyncMock(side_effect=lambda: mock.Mock(
+                data=[row for row in tables[name] if row.get("id", 1) > page["after"]][:page["limit"]]
+            ))
+            return query
+
+        supabase.table.side_effect = table
+        return supabase
+
+    async def test_stats_fall_back_to_concurrent_scans(self):
+        supabase = self.supabase({
+            "campaigns_dashboardstats": [],
+            "campaigns_campaign": [
+                {"id": 1, "status": "Active", "platform": "Email", "budget": 100, "total_spend": 80,
+                 "total_revenue": 100},
+                {"id": 2, "status": "Paused", "platform": "Email", "budget": 50, "total_spend": 20,
+                 "total_revenue": 30},
+            ],
+            "campaigns_monthlyperformance": [{"id": 1, "spend": 60, "revenue": 100}, {"id": 2, "spend": 40, "revenue": 30}],
+        })
+        supabase.rpc.return_value.execute = mock.AsyncMock(side_effect=APIError({"message": "function does not exist"}))
+        view = AsyncDashboardStatsView.as_view()
+        # One row per page: every page is read, not just the first response
+        with mock.patch("campaigns.repository.get_async_supabase_client", mock.AsyncMock(return_value=supabase)), \
+                override_settings(EXPORT_CHUNK_SIZE=1), self.assertLogs("campaigns.rollups", "WARNING"):
+            response = await view(AsyncRequestFactory().get("/api/dashboard/stats/"))
+            # Cached and revalidated like the sync view
+            calls = supabase.table.call_count
+            repeat = await view(AsyncRequestFactory().get("/api/dashboard/stats/", headers={"If-None-Match": response["ETag"]}))
+        self.assertEqual((repeat.status_code, repeat.content, supabase.table.call_count), (304, b"", calls))
+        self.assertEqual((response["Content-Type"], response["Cache-Control"]), ("application/json", "no-cache"))
+
+        self.assertEqual(json.loads(response.content), {
+            "total_campaigns": 2, "active_campaigns": 1, "total_budget": 150.0, "total_spend": 100.0,
+            "total_revenue": 130.0, "avg_roi": 30.0,
+            "by_platform": [
+                {"platform": "Email", "campaigns": 2, "budget": 150.0, "spend": 100.0, "revenue": 130.0, "roi": 30.0},
+            ],
+            "by_status": [
+                {"status": "Active", "campaigns": 1, "budget": 100.0, "spend": 80.0, "revenue": 100.0, "roi": 25.0},
+                {"status": "Paused", "campaigns": 1, "budget": 50.0, "spend": 20.0, "revenue": 30.0, "roi": 50.0},
+            ],
+        })
+
+
+    def test_asgi_middleware_chain_stays_async(self):
+        # The settings as config/asgi.py loads them, next to the WSGI ones
+        with mock.patch.dict(os.environ, {"CAMPAIGNS_ASYNC_VIEWS": "True"}):
+            asgi_middleware = runpy.run_path(str(settings.BASE_DIR / "config" / "settings.py"))["MIDDLEWARE"]
+        for middleware, adapted in ((asgi_middleware, False), (settings.MIDDLEWARE, True)):
+            with override_settings(DEBUG=True, MIDDLEWARE=middleware), \
+                    self.assertLogs("django.request", "DEBUG") as logs:
+                logging.getLogger("django.request").debug("Loading middleware")
+                ASGIHandler()
+            self.assertEqual(any("adapted for middleware" in line for line in logs.output), adapted, middleware)
+
+
+class DashboardAggregationTests(SimpleTestCase):
+    rows = [
+        {"month": "2026-02-01", "impressions": 100, "clicks": 10, "conversions": 1, "spend": "50.0", "revenue": 80},
+        {"month": "2026-01-01", "impressions": 200, "clicks": 20, "conversions": 2, "spend": 25.5, "revenue": 0},
+        {"month": "2026-02-01", "impressions": 50, "clicks": 5, "conversions": 0, "spend": 10, "revenue": 20.0},
+    ]
+
+    def test_aggregate_by_month(self):
+        result = aggregate_by_month(self.rows)
+        self.assertEqual([r["name"] for r in result], ["2026-01-01", "2026-02-01"])
+        self.assertEqual(result[1], {
+            "name": "2026-02-01", "impressions": 150, "clicks": 15, "conversions": 1, "spend": 60.0, "revenue": 100.0
+        })
+
+    def test_rpc_and_fallback_agree(self):
+        rpc_rows = [
+            {"month": "2026-01-01", "impressions": 200, "clicks": 20, "conversions": 2, "spend": 25.5, "revenue": 0},
+            {"month": "2026-02-01", "impressions": 150, "clicks": 15, "conversions": 1, "spend": 60, "revenue": 100},
+        ]
+        supabase = mock.MagicMock()
+        supabase.rpc.return_value.execute.return_value.data = rpc_rows
+        from_rpc = fetch_monthly_performance(supabase, {})
+
+        supabase.rpc.return_value.execute.side_effect = APIError({"message": "function does not exist"})
+        query = supabase.table.return_value.select.return_value
+        rows = [{"id": number, **row} for number, row in enumerate(self.rows, start=1)]
+        query.order.return_value.limit.return_value.execute.return_value.data = rows[:2]
+        query.gt.return_value.order.return_value.limit.return_value.execute.return_value.data = rows[2:]
+        with self.assertLogs('campaigns.aggregates', 'WARNING'):
+            self.assertEqual(fetch_monthly_performance(supabase, {}, chunk_size=2), from_rpc)
+        query.gt.assert_called_once_with("id", 2)
+
+    def test_parse_filters(self):
+        filters = parse_performance_filters({"from": "2026-01", "to": "2026-03-01", "platform": "Email"})
+        self.assertEqual(filters, {"from": "2026-01-01", "to": "2026-03-01", "platform": "Email"})
+        with self.assertRaises(ValueError):
+            parse_performance_filters({"from": "January"})
+
+    def test_period_filters_cover_whole_periods(self):
+        filters = parse_period_filters({"granularity": "quarter", "from": "2026-05-20", "to": "2026-08"})
+        self.assertEqual(filters, {"granularity": "quarter", "from": "2026-04-01", "to": "2026-08-01"})
+        self.assertEqual(parse_period_filters({"granularity": "month", "from": "2026-05"}), {"from": "2026-05-01"})
+
+    def test_period_rpc_fallback_sums_rollup_rows(self):
+        supabase = mock.MagicMock()
+        supabase.rpc.return_value.execute.side_effect = APIError({"message": "function does not exist"})
+        query = supabase.table.return_value.select.return_value.eq.return_value.order.return_value.limit.return_value
+        query.execute.return_value.data = [
+            {"period_start": "2026-01-01", "impressions": 10, "clicks": 1, "conversions": 0, "spend": 5, "revenue": 8},
+            {"period_start": "2026-01-01", "impressions": 20, "clicks": 2, "conversions": 1, "spend": 5, "revenue": 0},
+        ]
+        with self.assertLogs('campaigns.periods', 'WARNING'):
+            rows = fetch_period_performance(supabase, {"granularity": "year"})
+        self.assertEqual(rows, [{"name": "2026-01-01", "impressions": 30, "clicks": 3, "conversions": 1,
+                                 "spend": 10.0, "revenue": 8.0}])
+        supabase.table.assert_called_once_with("campaigns_performancerollup")
+
+
+class DashboardStatsRollupTests(SimpleTestCase):
+    campaigns = [
+        {"status": "Active", "budget": 100},
+        {"status": "Draft", "budget": "50.5"},
+    ]
+    # A $5 month at -100% barely moves the ROI of a $100 month at +50%
+    performances = [{"spend": 100, "revenue": 150}, {"spend": "5", "revenue": 0}, {"spend": None, "revenue": None}]
+
+    def test_incremental_updates_match_rebuild(self):
+        stats = compute_stats(self.campaigns, self.performances)
+        stats = merge_deltas(
+            stats,
+            campaign_stats_delta([self.campaigns[1]], [{"status": "Active", "budget": 75}]),
+            performance_stats_delta([{"spend": None, "revenue": None}], [{"spend": 20, "revenue": 25}]),
+        )
+        expected = compute_stats(
+            [self.campaigns[0], {"status": "Active", "budget": 75}],
+            self.performances[:2] + [{"spend": 20, "revenue": 25}],
+        )
+        self.assertEqual(stats, expected)
+
+    def test_format_stats(self):
+        stats = compute_stats(self.campaigns, self.performances)
+        self.assertEqual(format_stats(stats), {
+            "total_campaigns": 2, "active_campaigns": 1, "total_budget": 150.5, "total_spend": 105.0,
+            "total_revenue": 150.0, "avg_roi": 42.86
+        })
+        self.assertEqual(format_stats(empty_stats(), [])["avg_roi"], 0.0)
+
+    def test_breakdown_rpc_and_fallback_agree(self):
+        campaigns = [
+            {"id": str(uuid.UUID(int=i)), "platform": platform, "status": status, "budget": 100,
+             "total_spend": spend, "total_revenue": revenue}
+            for i, (platform, status, spend, revenue) in enumerate((
+                ("Email", "Active", 100, 150), ("Email", "Paused", 5, 0), ("Social", "Active", 0, 0),
+            ))
+        ]
+        rpc_rows = [
+            {"dimension": "platform", "value": "Email", "campaigns": 2, "budget": 200, "spend": 105, "revenue": 150},
+            {"dimension": "platform", "value": "Social", "campaigns": 1, "budget": 100, "spend": 0, "revenue": 0},
+            {"dimension": "status", "value": "Active", "campaigns": 2, "budget": 200, "spend": 100, "revenue": 150},
+            {"dimension": "status", "value": "Paused", "campaigns": 1, "budget": 100, "spend": 5, "revenue": 0},
+        ]
+        supabase = mock.MagicMock()
+        supabase.rpc.return_value.execute.return_value.data = rpc_rows
+        from_rpc = format_breakdown(fetch_breakdown(supabase))
+        self.assertEqual(from_rpc["by_platform"][0], {
+            "platform": "Email", "campaigns": 2, "budget": 200.0, "spend": 105.0, "revenue": 150.0, "roi": 42.86
+        })
+
+        # Without the function, campaigns are read two at a time by id
+        supabase.rpc.return_value.execute.side_effect = APIError({"message": "function does not exist"})
+        query = supabase.table.return_value.select.return_value
+        query.gt.return_value = query
+        query.order.return_value.limit.return_value.execute.side_effect = [
+            mock.Mock(data=campaigns[:2]), mock.Mock(data=campaigns[2:])
+        ]
+        with self.assertLogs("campaigns.rollups", "WARNING"):
+            self.assertEqual(format_breakdown(fetch_breakdown(supabase, chunk_size=2)), from_rpc)
+        query.gt.assert_called_once_with("id", campaigns[1]["id"])
+
+
+    def test_supabase_fallback_reads_every_page(self):
+        # More rows than PostgREST returns in one response
+        tables = {
+            "campaigns_campaign": [{"id": i, "status": "Active", "budget": 1} for i in range(1500)],
+            "campaigns_monthlyperformance": [{"id": i, "spend": 1, "revenue": 2} for i in range(1200)],
+        }
+
+        def page(rows, limit):
+            return mock.Mock(execute=lambda: mock.Mock(data=rows[:limit]))
+
+        def table(name):
+            select = mock.MagicMock()
+            select.order.return_value.limit.side_effect = lambda limit: page(tables[name], limit)
+            select.gt.side_effect = lambda key, last: mock.Mock(**{
+                "order.return_value.limit.side_effect": lambda limit: page(tables[name][last + 1:], limit)
+            })
+            return mock.Mock(**{"select.return_value": select})
+
+        supabase = mock.MagicMock()
+        supabase.table.side_effect = table
+        with mock.patch("campaigns.repository.get_supabase_client", return_value=supabase), \
+                mock.patch("campaigns.repository.read_stats", return_value=None):
+            stats = SupabaseRepository().dashboard_stats()
+        self.assertEqual((stats["total_campaigns"], stats["total_budget"], stats["spend_sum"]), (1500, 1500.0, 1200.0))
+
+class CampaignPaginationTests(SimpleTestCase):
+    def make_rows(self, count):
+        return [
+            {"id": str(uuid.UUID(int=i)), "created_at": f"2026-01-{28 - i:02d}T00:00:00+00:00", "name": f"c{i}"}
+            for i in range(count)
+        ]
+
+    def test_cursor_round_trip(self):
+        row = self.make_rows(1)[0]
+        self.assertEqual(decode_cursor(encode_cursor(row)), {"created_at": row["created_at"], "id": row["id"]})
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+
+        # PostgREST drops the trailing zeros of the fraction
+        row = {"id": row["id"], "created_at": "2026-01-05T10:00:00.12345+00:00"}
+        self.assertEqual(decode_cursor(encode_cursor(row)), row)
+        self.assertEqual(parse_timestamp(row["created_at"]).microsecond, 123450)
+        with self.assertRaises(ValueError):
+            decode_cursor(encode_cursor({"id": row["id"], "created_at": "2026-01-05T10:00:00.1234567+00:00"}))
+
+    def test_paginate_returns_next_cursor_only_when_more_rows(self):
+        query = mock.MagicMock()
+        ordered = query.order.return_value.order.return_value.limit.return_value
+        ordered.execute.return_value.data = self.make_rows(3)
+        rows, next_cursor, _ = paginate(query, {"limit": "2"})
+        query.order.return_value.order.return_value.limit.assert_called_with(3)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(decode_cursor(next_cursor)["id"], rows[-1]["id"])
+
+        ordered.execute.return_value.data = self.make_rows(2)
+        self.assertIsNone(paginate(query, {"limit": "2"})[1])
+
+    def test_kpi_ordering_cursor_and_filters(self):
+        row = {"id": str(uuid.UUID(int=1)), "roi": None}
+        self.assertEqual(decode_cursor(encode_cursor(row, ("roi", True)), ("roi", True)), row)
+        with self.assertRaises(ValueError):
+            decode_cursor(encode_cursor({"id": row["id"], "ctr": "1 or 1=1"}, ("ctr", False)), ("ctr", False))
+
+        supabase = mock.MagicMock()
+        query = supabase.table.return_value.select.return_value
+        query.gte.return_value = query
+        query.order.return_value.order.return_value.limit.return_value.execute.return_value.data = []
+        with mock.patch("campaigns.repository.get_supabase_client", return_value=supabase):
+            response = APIClient().get("/api/campaigns/?ordering=-roi&limit=2&min_ctr=1.5")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(APIClient().get("/api/campaigns/?ordering=budget").status_code, 400)
+            self.assertEqual(APIClient().get("/api/campaigns/?max_cpa=cheap").status_code, 400)
+
+        query.gte.assert_called_once_with("ctr", 1.5)
+        query.order.assert_called_once_with("roi", desc=True, nullsfirst=False)
+        self.assertEqual(supabase.table.return_value.select.call_args.args[0], "*")
+
+    def test_parse_fields(self):
+        self.assertEqual(parse_fields(None), "*")
+        self.assertEqual(parse_fields("name,status", required=("created_at", "id")), "name,status,created_at,id")
+        with self.assertRaises(ValueError):
+            parse_fields("name,secret")
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.reset_backend()
+        self.client = APIClient()
+        self.supabase = mock.MagicMock()
+        self.supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+            {"total_campaigns": 3, "active_campaigns": 1, "total_budget": 300, "spend_sum": 200, "revenue_sum": 230}
+        ]
+        self.supabase.rpc.return_value.execute.return_value.data = []
+        patcher = mock.patch("campaigns.repository.get_supabase_client", return_value=self.supabase)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeated_reads_hit_cache_until_invalidated(self):
+        first = self.client.get("/api/dashboard/stats")
+        self.assertEqual(first.json()["avg_roi"], 15.0)
+        second = self.client.get("/api/dashboard/stats/")
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(self.supabase.table.call_count, 1)
+
+        cache.invalidate("dashboard")
+        self.client.get("/api/dashboard/stats")
+        self.assertEqual(self.supabase.table.call_count, 2)
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get("/api/dashboard/stats")["ETag"]
+        response = self.client.get("/api/dashboard/stats", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_query_params_are_normalized(self):
+        backend = cache.LocalBackend(max_entries=2, ttl=60)
+        with mock.patch("campaigns.cache._backend", backend):
+            self.client.get("/api/dashboard/stats?b=2&a=1")
+            self.client.get("/api/dashboard/stats?a=1&b=2")
+        self.assertEqual(self.supabase.table.call_count, 1)
+        self.assertEqual(len(backend._entries), 1)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    payload = {
+        "id": uuid.UUID(int=1), "start_date": date(2026, 1, 1),
+        "created_at": datetime(2026, 1, 1, 12, tzinfo=dt_timezone.utc), "budget": Decimal("12.50"),
+        "error": gettext_lazy("This field is required."), "name": "Caf\u00e9\u2028", "roi": None, 3: [1, 2.5],
+    }
+
+    def test_matches_drf_renderer(self):
+        expected = JSONRenderer().render(self.payload)
+        fast = FastJSONRenderer().render(self.payload)
+        self.assertEqual(json.loads(fast), json.loads(expected))
+        self.assertIn(b"\\u2028", fast)
+        with mock.patch("campaigns.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(self.payload), expected)
+        self.assertIn(b'\n  "budget"', FastJSONRenderer().render(self.payload, "application/json; indent=4"))
+
+    def test_list_rows_are_rendered_as_decoded(self):
+        cache.reset_backend()
+        rows = [{"id": "1", "budget": 100, "amount_spent": 12.5, "roi": None}]
+        with mock.patch("campaigns.views.get_repository") as get_repository:
+            get_repository.return_value.list_campaigns.return_value = (rows, None, None)
+            response = APIClient().get("/api/campaigns/")
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.content, b'[{"id":"1","budget":100,"amount_spent":12.5,"roi":null}]')
+
+
+class BulkCampaignTests(SimpleTestCase):
+    campaign = {
+        "name": "Bulk", "platform": "Email", "budget": 100,
+        "start_date": "2026-01-01", "end_date": "2026-12-31", "goal": "Sales",
+    }
+
+    def test_validation_reports_per_item_errors(self):
+        pk = str(uuid.uuid4())
+        operations, errors = validate_operations({
+            "create": [self.campaign, {"name": "Missing fields"}],
+            "upsert": [{**self.campaign, "id": pk, "amount_spent": 0, "roi": 0}, self.campaign],
+            "delete": [pk, "nope"],
+        })
+        self.assertEqual([index for index, _ in operations["create"]], [0])
+        self.assertEqual(operations["create"][0][1]["start_date"], "2026-01-01")
+        self.assertEqual(operations["upsert"][0][1]["id"], pk)
+        self.assertEqual(operations["delete"], [(0, pk)])
+        self.assertEqual(sorted((e["op"], e["index"]) for e in errors), [("create", 1), ("delete", 1), ("upsert", 1)])
+        # Lifetime KPIs are kept by the triggers, so an upsert neither sends nor defaults them
+        self.assertFalse({"amount_spent", "roi"} & operations["upsert"][0][1].keys())
+
+        with self.assertRaises(ValueError):
+            validate_operations([self.campaign])
+
+    def test_creates_are_inserted_in_chunks(self):
+        operations, _ = validate_operations({"create": [dict(self.campaign, name=f"c{i}") for i in range(5)]})
+        supabase = mock.MagicMock()
+        supabase.table.return_value.insert.return_value.execute.side_effect = lambda: mock.Mock(
+            data=supabase.table.return_value.insert.call_args.args[0]
+        )
+        results, delta = execute_chunked(supabase, operations, chunk_size=2)
+        self.assertEqual(supabase.table.return_value.insert.call_count, 3)
+        self.assertEqual([r["status"] for r in results], ["created"] * 5)
+        self.assertEqual(delta["total_campaigns"], 5)
+        self.assertEqual(delta["draft_campaigns"], 5)
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTests(SimpleTestCase):
+    rows = [
+        {"id": 1, "campaign_id": "a", "month": "2026-01-01", "impressions": 10, "clicks": 1,
+         "conversions": 0, "spend": 5.0, "revenue": 7.5, "roi": 50.0},
+        {"id": 2, "campaign_id": "a", "month": "2026-02-01", "impressions": 20, "clicks": 2,
+         "conversions": 1, "spend": 5.0, "revenue": 2.5, "roi": -50.0},
+        {"id": 3, "campaign_id": "b", "month": "2026-01-01", "impressions": 30, "clicks": 3,
+         "conversions": 1, "spend": 0.0, "revenue": 0.0, "roi": 0.0},
+    ]
+
+    def setUp(self):
+        self.supabase = mock.MagicMock()
+        select = self.supabase.table.return_value.select.return_value
+        select.order.return_value.limit.return_value.execute.return_value.data = self.rows[:2]
+        select.gt.return_value.order.return_value.limit.return_value.execute.return_value.data = self.rows[2:]
+        reset_repository()
+        self.addCleanup(reset_repository)
+        patcher = mock.patch("campaigns.repository.get_supabase_client", return_value=self.supabase)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_csv_export_pages_through_table(self):
+        response = APIClient().get("/api/export/performance")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,campaign_id,month,impressions,clicks,conversions,spend,revenue,roi")
+        self.assertEqual(len(lines), 4)
+        self.supabase.table.return_value.select.return_value.gt.assert_called_once_with("id", 2)
+
+    def test_gzipped_ndjson_export(self):
+        response = APIClient().get("/api/export/performance?format=ndjson&gzip=true")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], [1, 2, 3])
+
+    def test_upstream_failure_is_an_error_status(self):
+        select = self.supabase.table.return_value.select.return_value
+        select.order.return_value.limit.return_value.execute.side_effect = APIError({"message": "relation does not exist"})
+        response = APIClient().get("/api/export/performance")
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(json.loads(response.content)["details"], "relation does not exist")
+
+    def test_invalid_campaign_id_is_rejected_before_querying(self):
+        response = APIClient().get("/api/export/performance?campaign_id=not-a-uuid")
+        self.assertEqual(response.status_code, 400)
+        self.supabase.table.assert_not_called()
+
+
+@override_settings(INGEST_BATCH_SIZE=2)
+class PerformanceIngestTests(SimpleTestCase):
+    def setUp(self):
+        cache.reset_backend()
+        self.known = str(uuid.uuid4())
+        self.supabase = mock.MagicMock()
+        table = self.supabase.table.return_value
+        table.select.return_value.in_.return_value.execute.return_value.data = [{"id": self.known}]
+        table.select.return_value.in_.return_value.in_.return_value.execute.return_value.data = [
+            {"campaign_id": self.known, "month": "2026-01-01", "roi": 10.0}
+        ]
+        table.upsert.return_value.execute.side_effect = lambda: mock.Mock(data=table.upsert.call_args.args[0])
+        patcher = mock.patch("campaigns.repository.get_supabase_client", return_value=self.supabase)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, body, content_type):
+        return APIClient().generic("POST", "/api/performance/ingest", body, content_type=content_type)
+
+    def test_ndjson_ingest_summary(self):
+        lines = [
+            {"campaign_id": self.known, "month": "2026-01", "impressions": 10, "spend": 10, "revenue": 15},
+            {"campaign_id": self.known, "month": "2026-02-01", "clicks": 1.5},
+            {"campaign_id": str(uuid.uuid4()), "month": "2026-01-01"},
+            {"campaign_id": self.known, "month": "2026-03-01", "spend": 4},
+        ]
+        body = "\n".join(json.dumps(line) for line in lines) + "\nnot json\n"
+        response = self.post(body, "application/x-ndjson")
+
+        summary = response.json()
+        self.assertEqual((summary["inserted"], summary["updated"], summary["rejected"]), (1, 1, 3))
+        self.assertEqual([e["line"] for e in summary["errors"]], [2, 3, 5])
+        self.assertEqual(self.supabase.table.return_value.upsert.call_count, 2)
+        first_batch = self.supabase.table.return_value.upsert.call_args_list[0].args[0]
+        self.assertEqual(first_batch[0]["roi"], 50.0)
+
+    def test_csv_ingest_and_content_type(self):
+        body = f"campaign_id,month,spend,revenue\n{self.known},2026-01-01,1,2\n{self.known},2026-01-01,1,3\n"
+        summary = self.post(body, "text/csv").json()
+        self.assertEqual(summary["accepted"], 1)
+        self.assertEqual(summary["errors"], [{"line": 2, "reason": "Superseded by line 3"}])
+        self.assertEqual(self.post("{}", "application/json").status_code, 415)
+
+    @override_settings(INGEST_MAX_PENDING_BATCHES=1)
+    def test_write_failure_stops_the_ingest(self):
+        # Not a RepositoryError: a transport failure from the client library
+        self.supabase.table.return_value.upsert.return_value.execute.side_effect = ConnectionError("reset")
+        line = json.dumps({"campaign_id": self.known, "month": "2026-01", "spend": 1})
+        body = "\n".join([line] * 40) + "\n"
+        with self.assertLogs("campaigns.ingest", "ERROR"):
+            response = self.post(body, "application/x-ndjson")
+
+        summary = response.json()
+        self.assertEqual((response.status_code, summary["accepted"]), (500, 0))
+        self.assertEqual(summary["error"], "Ingest stopped: the database could not be written")
+        self.assertEqual(self.supabase.table.return_value.upsert.call_count, 1)
+        self.assertLess(summary["rejected"], 40)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        cache.reset_backend()
+        reset_repository()
+        self.addCleanup(reset_repository)
+        self.client = APIClient()
+        # The worker's clock, just ahead of the jobs queued by the test
+        self.now = datetime.now(dt_timezone.utc) + timedelta(seconds=5)
+        self.worker = JobWorker(backoff=10, max_backoff=60, lease=300, name="test", clock=lambda: self.now)
+        self.calls = []
+        handlers = {"flaky": self.flaky, "invalid": self.invalid}
+        patcher = mock.patch.dict("campaigns.jobs.HANDLERS", handlers)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def flaky(self, payload):
+        self.calls.append(payload)
+        if len(self.calls) <= payload["failures"]:
+            raise RuntimeError("upstream timed out")
+        return {"calls": len(self.calls)}
+
+    def invalid(self, payload):
+        raise JobFailed("nothing to retry")
+
+    def later(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+    def test_failed_attempts_retry_with_backoff(self):
+        with self.assertLogs("campaigns.jobs", "WARNING"):
+            job = enqueue("flaky", {"failures": 1}, max_attempts=2)
+            with mock.patch("campaigns.jobs.random.uniform", side_effect=lambda low, high: high):
+                job = self.worker.run_once()
+            self.assertEqual((job.status, job.attempts, job.error), ("queued", 1, "RuntimeError: upstream timed out"))
+            self.assertEqual(job.run_after, self.now + timedelta(seconds=10))
+            self.assertIsNone(self.worker.run_once())
+
+            self.later(10)
+            job = self.worker.run_once()
+            self.assertEqual((job.status, job.attempts, job.result, job.error), ("succeeded", 2, {"calls": 2}, ""))
+
+            enqueue("flaky", {"failures": 5}, max_attempts=2)
+            self.later(60)
+            self.assertEqual(self.worker.run_pending(), 1)
+            self.later(60)
+            self.assertEqual(self.worker.run_once().status, "failed")
+
+            enqueue("invalid")
+            job = self.worker.run_once()
+            self.assertEqual((job.status, job.attempts, job.error), ("failed", 1, "nothing to retry"))
+
+    def test_expired_lease_is_taken_over(self):
+        job = enqueue("flaky", {"failures": 0}, max_attempts=2)
+        self.assertEqual(self.worker.claim("crashed").pk, job.pk)
+        self.assertIsNone(self.worker.run_once())
+
+        self.later(301)
+        job = self.worker.run_once()
+        self.assertEqual((job.status, job.attempts, job.locked_by), ("succeeded", 2, "test"))
+
+        # A job whose last attempt lost its worker is not run again
+        job = enqueue("flaky", {"failures": 0}, max_attempts=1)
+        self.worker.claim("crashed")
+        self.later(301)
+        self.assertIsNone(self.worker.run_once())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error, len(self.calls)), ("failed", "Worker lost", 1))
+
+    @override_settings(CAMPAIGNS_DATA_BACKEND="orm")
+    def test_job_endpoints(self):
+        Campaign.objects.create(name="Jobs", platform="Email", status="Active", budget=100, start_date="2026-01-01",
+                                end_date="2026-12-31", goal="Sales")
+        response = self.client.post("/api/jobs", {"kind": "rebuild_dashboard_stats"}, format="json")
+        self.assertEqual((response.status_code, response.json()["status"]), (202, "queued"))
+        self.assertEqual(response["Location"], f"/api/jobs/{response.json()['id']}")
+        self.assertEqual(self.client.post("/api/jobs", {"kind": "unknown"}, format="json").status_code, 400)
+
+        call_command("run_jobs", "--once", stdout=io.StringIO())
+        job = self.client.get(response["Location"]).json()
+        self.assertEqual((job["status"], job["result"]["total_campaigns"]), ("succeeded", 1))
+        self.assertEqual(DashboardStats.objects.get().total_budget, 100.0)
+        self.assertEqual([job["kind"] for job in self.client.get("/api/jobs/?status=succeeded").json()],
+                         ["rebuild_dashboard_stats"])
+        self.assertEqual(self.client.get(f"/api/jobs/{uuid.uuid4()}").status_code, 404)
+
+    @override_settings(CAMPAIGNS_DATA_BACKEND="orm")
+    def test_rebuild_command_uses_the_configured_backend(self):
+        Campaign.objects.create(name="Drift", platform="Email", status="Active", budget=100, start_date="2026-01-01",
+                                end_date="2026-12-31", goal="Sales")
+        DashboardStats.objects.update_or_create(pk=1, defaults={"total_campaigns": 0})
+        with mock.patch("campaigns.supabase_client.get_supabase_client") as supabase:
+            with self.assertRaisesMessage(CommandError, "drifted"):
+                call_command("rebuild_dashboard_stats", "--check", stdout=io.StringIO())
+            out = io.StringIO()
+            call_command("rebuild_dashboard_stats", stdout=out)
+            call_command("rebuild_dashboard_stats", "--check", stdout=io.StringIO())
+        supabase.assert_not_called()
+        self.assertIn("total_campaigns: stored=0 actual=1", out.getvalue())
+        self.assertEqual(DashboardStats.objects.get().total_budget, 100.0)
+
+    @override_settings(CAMPAIGNS_DATA_BACKEND="orm")
+    def test_in_process_workers_start_with_a_request(self):
+        reset_worker()
+        self.addCleanup(reset_worker)
+        with mock.patch.object(JobWorker, "start") as start:
+            self.client.get("/api/jobs")
+            start.assert_not_called()
+            with override_settings(JOBS={"WORKERS": 2}):
+                self.client.get("/api/jobs")
+        start.assert_called_once_with()
+        self.assertEqual(get_worker().threads, 2)
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=1000)
+    def test_async_ingest_returns_a_job(self):
+        known = str(uuid.uuid4())
+        supabase = mock.MagicMock()
+        table = supabase.table.return_value
+        table.select.return_value.in_.return_value.execute.return_value.data = [{"id": known}]
+        table.select.return_value.in_.return_value.in_.return_value.execute.return_value.data = []
+        table.upsert.return_value.execute.side_effect = lambda: mock.Mock(data=table.upsert.call_args.args[0])
+        # Over the upload limit: the body is staged in storage, not read into memory or the job row
+        body = "".join(
+            json.dumps({"campaign_id": known, "month": f"20{year}-{month:02}", "spend": 10, "revenue": 15}) + "\n"
+            for year in range(10, 20) for month in range(1, 13)
+        )
+        self.assertGreater(len(body), settings.DATA_UPLOAD_MAX_MEMORY_SIZE)
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+
+        with override_settings(MEDIA_ROOT=media.name), \
+                mock.patch("campaigns.repository.get_supabase_client", return_value=supabase):
+            response = self.client.generic("POST", "/api/performance/ingest?async=true", body,
+                                           content_type="application/x-ndjson")
+            self.assertEqual(response.status_code, 202)
+            self.assertFalse(table.upsert.called)
+            job = Job.objects.get(pk=response.json()["id"])
+            self.assertNotIn("body", job.payload)
+            self.assertEqual(os.listdir(os.path.join(media.name, "ingest")), [os.path.basename(job.payload["upload"])])
+            JobWorker().run_pending()
+
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.result["inserted"], job.result["rejected"]), ("succeeded", 120, 0))
+            self.assertEqual(os.listdir(os.path.join(media.name, "ingest")), [])
+
+
+class StubNewsServer:
+    """Local stand-in for the RapidAPI news search: answers with queued statuses, then 200."""
+
+    def __init__(self, delay=0.0):
+        self.statuses = []
+        self.queries = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.queries.append(self.path)
+                time.sleep(delay)
+                code = stub.statuses.pop(0) if stub.statuses else 200
+                body = json.dumps({"status": "OK", "data": [{"title": f"Story {len(stub.queries)}"}]}).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/search"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class NewsProxyTests(SimpleTestCase):
+    query = {"query": "Football", "limit": "10", "time_published": "anytime", "country": "US", "lang": "en"}
+
+    def stub(self, delay=0.0):
+        stub = StubNewsServer(delay)
+        self.addCleanup(stub.close)
+        return stub
+
+    def fetcher(self, stub, **options):
+        return NewsFetcher(stub.url, **{"backoff": 0, "rate": 100, "burst": 100, **options})
+
+    def test_identical_searches_are_coalesced_and_cached(self):
+        stub = self.stub(delay=0.2)
+        fetcher = self.fetcher(stub)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(fetcher.search(self.query, {})[1])) for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(stub.queries), 1)
+        self.assertEqual(sorted(set(results)), ["COALESCED", "MISS"])
+        self.assertEqual(fetcher.search({**self.query, "query": " football"}, {})[1], "HIT")
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        stub = self.stub()
+        fetcher = self.fetcher(stub, ttl=0, stale_ttl=60)
+        first, _ = fetcher.search(self.query, {})
+        stale, cache_status = fetcher.search(self.query, {})
+        self.assertEqual((stale, cache_status), (first, "STALE"))
+
+        deadline = time.monotonic() + 5
+        while len(stub.queries) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(stub.queries), 2)
+
+    def test_retries_then_opens_circuit(self):
+        stub = self.stub()
+        fetcher = self.fetcher(stub, retries=1, failure_threshold=2, reset_timeout=60)
+        stub.statuses = [503] * 4
+        for _ in range(2):
+            with self.assertRaises(NewsUnavailable):
+                fetcher.search(self.query, {})
+        self.assertEqual(len(stub.queries), 4)
+
+        with self.assertRaises(NewsUnavailable) as raised:
+            fetcher.search(self.query, {})
+        self.assertEqual(len(stub.queries), 4)
+        self.assertGreater(raised.exception.retry_after, 0)
+        self.assertEqual(fetcher.stats()["circuit"], "open")
+
+    def test_token_bucket_throttles(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=lambda s: now.__setitem__(0, now[0] + s))
+        self.assertTrue(bucket.acquire() and bucket.acquire())
+        self.assertFalse(bucket.acquire())
+        self.assertTrue(bucket.acquire(timeout=1))
+        self.assertAlmostEqual(now[0], 0.5)
+
+    def test_view_proxies_through_cache(self):
+        stub = self.stub()
+        reset_fetcher()
+        self.addCleanup(reset_fetcher)
+        with override_settings(NEWS_PROXY={"URL": stub.url, "BACKOFF": 0}):
+            first = APIClient().post("/api/news/search/", {"query": "Elections"}, format="json")
+            second = APIClient().post("/api/news/search/", {"query": "Elections"}, format="json")
+
+        self.assertEqual((first.status_code, first["X-Cache"], second["X-Cache"]), (200, "MISS", "HIT"))
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(len(stub.queries), 1)
+        self.assertIn("query=Elections", stub.queries[0])
+
+
+@override_settings(CAMPAIGNS_DATA_BACKEND="orm")
+class TracingTests(TestCase):
+    def setUp(self):
+        cache.reset_backend()
+        reset_repository()
+        self.addCleanup(reset_repository)
+        tracing.metrics.reset()
+
+    def server_timing(self, response):
+        return dict(entry.split(";", 1) for entry in response["Server-Timing"].split(", "))
+
+    def test_server_timing_and_metrics(self):
+        campaign = Campaign.objects.create(name="Traced", platform="Email", budget=100, start_date="2026-01-01",
+                                           end_date="2026-12-31", goal="Sales")
+        for month in ("2026-01-01", "2026-02-01", "2026-03-01"):
+            MonthlyPerformance.objects.create(campaign=campaign, month=month, clicks=10, spend=100, revenue=150)
+
+        timings = self.server_timing(APIClient().get("/api/dashboard/performance"))
+        self.assertLessEqual({"upstream", "decode", "render", "app", "total"}, timings.keys())
+        self.assertEqual((timings["queries"], timings["rows"]), ('desc="1"', 'desc="3"'))
+
+        metrics = APIClient().get("/metrics").content.decode()
+        self.assertIn('campaigns_http_requests_total{route="dashboard-performance",method="GET",status="200"} 1', metrics)
+        self.assertIn('campaigns_http_request_duration_seconds_count{route="dashboard-performance"} 1', metrics)
+        self.assertIn('campaigns_upstream_rows_total{route="dashboard-performance"} 3', metrics)
+        with override_settings(CAMPAIGNS_TRACING={"METRICS_TOKEN": "secret"}):
+            self.assertEqual(APIClient().get("/metrics").status_code, 401)
+            self.assertEqual(APIClient().get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+
+    def test_upstream_round_trips_and_nested_phases(self):
+        stub = StubNewsServer(delay=0.05)
+        self.addCleanup(stub.close)
+        with tracing.start_trace() as trace, httpx.Client(transport=tracing.TracedTransport()) as client:
+            with tracing.phase("decode"):
+                client.get(stub.url)
+                client.get(stub.url)
+        self.assertEqual(trace.queries, 2)
+        self.assertGreaterEqual(trace.phases["upstream"], 0.1)
+        self.assertLess(trace.phases["decode"], 0.05)
+
+    def test_sampled_requests_are_profiled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(CAMPAIGNS_TRACING={"PROFILE_SAMPLE_RATE": 1.0, "PROFILE_DIR": directory}):
+                self.assertEqual(APIClient().get("/api/dashboard/stats").status_code, 200)
+            [name] = os.listdir(directory)
+            self.assertIn("GET-api-dashboard-stats", name)
+            self.assertTrue(pstats.Stats(os.path.join(directory, name)).total_calls)
+
+
+class ColdStartTests(SimpleTestCase):
+    def test_serverless_boot_defers_heavy_imports(self):
+        # Booting the API-only app and loading its URLconf must not pull in the
+        # PostgREST client or numpy (first use only) or the apps the lean settings leave out
+        code = (
+            "import sys, config.serverless; from django.urls import resolve; resolve('/api/campaigns/'); "
+            "print(' '.join(sorted(name for name in sys.modules if name.split('.')[0] in "
+            "('supabase', 'postgrest', 'pydantic', 'whitenoise', 'numpy') or name.startswith(("
+            "'django.contrib.sessions', 'django.contrib.staticfiles', 'django.contrib.auth.models')))))"
+        )
+        env = {name: value for name, value in os.environ.items() if name != "DJANGO_SETTINGS_MODULE"}
+        result = subprocess.run([sys.executable, "-c", code], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "")
+
+    def test_client_talks_to_postgrest_directly(self):
+        with httpx.Client() as http_client:
+            client = supabase_client.create_client("https://example.supabase.co/", "service-key", http_client)
+            self.assertEqual(str(client.base_url), "https://example.supabase.co/rest/v1")
+            self.assertEqual(client.headers["apikey"], "service-key")
+            self.assertEqual(client.headers["Authorization"], "Bearer service-key")
+
+
+class GunicornConfigTests(SimpleTestCase):
+    def load(self, **env):
+        names = ("SERVER", "WEB_CONCURRENCY", "GUNICORN_THREADS", "GUNICORN_TIMEOUT", "GUNICORN_PRELOAD",
+                 "CAMPAIGNS_CACHE_BACKEND", "REDIS_URL")
+        environ = {name: value for name, value in os.environ.items() if name not in names}
+        with mock.patch.dict(os.environ, {**environ, **env}, clear=True):
+            return runpy.run_path(str(settings.BASE_DIR / "gunicorn.conf.py"))
+
+    def test_workers_follow_cpus_and_env(self):
+        config = self.load(CAMPAIGNS_CACHE_BACKEND="django", REDIS_URL="redis://cache:6379/0")
+        self.assertEqual(config["workers"], config["available_cpus"]())
+        self.assertEqual((config["worker_class"], config["wsgi_app"]), ("gthread", "config.wsgi:application"))
+        self.assertEqual((config["threads"], config["timeout"], config["preload_app"]), (4, 30, True))
+        self.assertGreater(config["max_requests"], 0)
+        self.assertGreater(config["max_requests_jitter"], 0)
+
+        config = self.load(SERVER="asgi", WEB_CONCURRENCY="3", GUNICORN_TIMEOUT="120", GUNICORN_PRELOAD="False")
+        self.assertEqual((config["workers"], config["timeout"], config["preload_app"]), (3, 120, False))
+        self.assertEqual(config["worker_class"], "uvicorn_worker.UvicornWorker")
+        self.assertNotIn("threads", config)
+
+    def test_per_process_cache_keeps_one_worker(self):
+        with mock.patch("os.sched_getaffinity", return_value=set(range(8))):
+            self.assertEqual(self.load()["workers"], 1)
+            self.assertEqual(self.load(CAMPAIGNS_CACHE_BACKEND="django")["workers"], 1)
+            self.assertEqual(self.load(CAMPAIGNS_CACHE_BACKEND="none")["workers"], 8)
+
+        config = self.load(WEB_CONCURRENCY="4")
+        server = mock.Mock(cfg=mock.Mock(workers=4))
+        with self.assertRaisesRegex(RuntimeError, "per-process response cache"):
+            config["on_starting"](server)
+        server.cfg.workers = 1
+        config["on_starting"](server)
+
+    def test_cpu_quota_caps_workers(self):
+        available_cpus = self.load()["available_cpus"]
+        with mock.patch("os.sched_getaffinity", return_value=set(range(8))), \
+                mock.patch("builtins.open", mock.mock_open(read_data="150000 100000\n")):
+            self.assertEqual(available_cpus(), 2)
+        with mock.patch("os.sched_getaffinity", return_value=set(range(8))), \
+                mock.patch("builtins.open", mock.mock_open(read_data="max 100000\n")):
+            self.assertEqual(available_cpus(), 8)
+
+
+@skipUnless(connection.vendor == "postgresql", "query plans are checked against Postgres; set DATABASE_URL")
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN the hot queries (as PostgREST and the SQL functions issue them)
+    with sequential scans disabled, and check each is served by the index
+    meant for it rather than a sequential or full index scan.
+    """
+    campaign_id = uuid.UUID(int=1)
+    # Either the unique (campaign_id, month) index or the campaign_id one serves per-campaign lookups
+    PERFORMANCE_CAMPAIGN_INDEXES = ("campaigns_monthlyperformance_campaign_id", "campaigns_m_campaig_")
+    queries = {
+        "list": (
+            "SELECT * FROM campaigns_campaign ORDER BY created_at DESC, id DESC LIMIT 21", [],
+            "campaigns_created_id_idx"
+        ),
+        "list next page": (
+            "SELECT * FROM campaigns_campaign WHERE created_at <= %s AND (created_at < %s OR (created_at = %s AND id < %s)) "
+            "ORDER BY created_at DESC, id DESC LIMIT 21", ["2026-01-15"] * 3 + [campaign_id],
+            "campaigns_created_id_idx"
+        ),
+        "list by status": (
+            "SELECT * FROM campaigns_campaign WHERE status = %s ORDER BY created_at DESC, id DESC LIMIT 21", ["Active"],
+            "campaigns_status_created_idx"
+        ),
+        "list by status and platform": (
+            "SELECT * FROM campaigns_campaign WHERE status = %s AND platform = %s "
+            "ORDER BY created_at DESC, id DESC LIMIT 21", ["Active", "Email"],
+            "campaigns_status_platform_idx"
+        ),
+        "list by platform": (
+            "SELECT * FROM campaigns_campaign WHERE platform = %s ORDER BY created_at DESC, id DESC LIMIT 21", ["Email"],
+            "campaigns_platform_created_idx"
+        ),
+        "list by ctr": (
+            "SELECT * FROM campaigns_campaign ORDER BY ctr DESC, id DESC LIMIT 21", [], "campaigns_campaign_ctr_id"
+        ),
+        "list by roi": (
+            "SELECT * FROM campaigns_campaign ORDER BY roi DESC NULLS LAST, id DESC LIMIT 21", [],
+            "campaigns_campaign_roi_id"
+        ),
+        "campaign performance": (
+            "SELECT * FROM campaigns_monthlyperformance WHERE campaign_id = %s ORDER BY month", [campaign_id],
+            PERFORMANCE_CAMPAIGN_INDEXES
+        ),
+        "dashboard performance": (
+            "SELECT month, sum(impressions), sum(clicks), sum(conversions), sum(spend), sum(revenue) "
+            "FROM campaigns_monthlyperformance WHERE month >= %s AND month <= %s GROUP BY month ORDER BY month",
+            ["2026-01-01", "2026-03-01"], "campaigns_perf_month_idx"
+        ),
+        "ingest existing rows": (
+            "SELECT campaign_id, month, roi FROM campaigns_monthlyperformance "
+            "WHERE campaign_id = ANY(%s) AND month = ANY(%s::date[])", [[campaign_id], ["2026-01-01"]],
+            PERFORMANCE_CAMPAIGN_INDEXES
+        ),
+        "performance export page": (
+            "SELECT * FROM campaigns_monthlyperformance WHERE id > %s ORDER BY id LIMIT 1000", [0],
+            "campaigns_monthlyperformance_pkey"
+        ),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        statuses = [choice for choice, _ in Campaign.STATUS_CHOICES]
+        platforms = [choice for choice, _ in Campaign.PLATFORM_CHOICES]
+        for i in range(200):
+            campaign = Campaign.objects.create(
+                id=uuid.UUID(int=i + 1), name=f"Campaign {i}", status=statuses[i % 4], platform=platforms[i % 5],
+                budget=100, start_date="2026-01-01", end_date="2026-12-31", goal="Sales"
+            )
+            MonthlyPerformance.objects.bulk_create(
+                MonthlyPerformance(campaign=campaign, month=f"2026-{month:02d}-01", spend=10, revenue=12)
+                for month in range(1, 13)
+            )
+
+    def plan_nodes(self, plan):
+        yield plan
+        for child in plan.get("Plans", []):
+            yield from self.plan_nodes(child)
+
+    def test_hot_queries_use_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE campaigns_campaign")
+            cursor.execute("ANALYZE campaigns_monthlyperformance")
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            for name, (sql, params, index) in self.queries.items():
+                with self.subTest(name):
+                    cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+                    plan = cursor.fetchone()[0][0]["Plan"]
+                    nodes = list(self.plan_nodes(plan))
+                    details = json.dumps(plan, indent=2)
+                    self.assertFalse([n for n in nodes if n["Node Type"] == "Seq Scan"], f"{name} scans sequentially:\n{details}")
+                    used = [n.get("Index Name", "") for n in nodes]
+                    self.assertTrue(any(i.startswith(index) for i in used if i), f"{name} does not use {index}:\n{details}")
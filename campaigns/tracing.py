@@ -0,0 +1,369 @@
+import contextvars
+import cProfile
+import functools
+import logging
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACING_SETTINGS = {
+    'ENABLED': True,
+    'METRICS_TOKEN': None,
+    'PROFILE_SAMPLE_RATE': 0.0,
+    'PROFILE_DIR': os.path.join(tempfile.gettempdir(), 'campaign-profiles'),
+}
+
+# Phases reported per request, in Server-Timing order:
+#   client     getting the pooled Supabase client
+#   upstream   PostgREST round trips (including the body transfer) or SQL execution
+#   decode     the rest of the data-access calls: building queries, decoding rows
+#   aggregate  Python aggregation loops (the dashboard fallbacks)
+#   render     DRF rendering the response body
+#   app        everything else: middleware, parsing, view code
+PHASES = ('client', 'upstream', 'decode', 'aggregate', 'render', 'app')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def tracing_settings():
+    return {**DEFAULT_TRACING_SETTINGS, **getattr(settings, 'CAMPAIGNS_TRACING', {})}
+
+
+class Trace:
+    """Timings and upstream counters of one request. Data-access threads spawned by the request share it."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] += seconds
+
+    def count(self, queries=0, rows=0):
+        with self._lock:
+            self.queries += queries
+            self.rows += rows
+
+    def finish(self):
+        # Whatever no phase claimed goes to `app`
+        total = time.perf_counter() - self.started
+        self.phases['app'] = max(0.0, total - sum(seconds for phase, seconds in self.phases.items() if phase != 'app'))
+        return total
+
+    def server_timing(self, total):
+        entries = [f'{phase};dur={seconds * 1000:.1f}' for phase, seconds in self.phases.items() if seconds]
+        entries.append(f'total;dur={total * 1000:.1f}')
+        entries.append(f'queries;desc="{self.queries}"')
+        entries.append(f'rows;desc="{self.rows}"')
+        return ', '.join(entries)
+
+
+_trace = contextvars.ContextVar('campaigns_trace', default=None)
+_span = contextvars.ContextVar('campaigns_span', default=None)
+
+
+@contextmanager
+def start_trace():
+    # Make a new Trace current for the enclosed code (a request, or a script step)
+    trace = Trace()
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+class _Span:
+    __slots__ = ('children',)
+
+    def __init__(self):
+        self.children = 0.0
+
+
+@contextmanager
+def phase(name):
+    """
+    Attribute the enclosed time to `name` on the current request's trace.
+    Phases nest: time spent in an inner phase counts only towards the inner one.
+    A no-op outside a traced request.
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+
+    parent = _span.get()
+    span = _Span()
+    token = _span.set(span)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _span.reset(token)
+        trace.add(name, max(0.0, elapsed - span.children))
+        if parent is not None:
+            parent.children += elapsed
+
+
+def traced(name):
+    """Decorator form of phase()."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count_upstream(queries=0, rows=0):
+    if trace := _trace.get():
+        trace.count(queries, rows)
+
+
+def count_rows(result):
+    # Rows in a data-access result: a row list/set, a (rows, ...) tuple or a single row dict
+    if isinstance(result, tuple):
+        result = result[0] if result else None
+    if isinstance(result, (list, set)):
+        return len(result)
+    return 1 if isinstance(result, dict) else 0
+
+
+class TracedTransport(httpx.HTTPTransport):
+    """httpx transport of the Supabase client: times each round trip, body included, as `upstream`."""
+
+    def handle_request(self, request):
+        with phase('upstream'):
+            response = super().handle_request(request)
+            response.read()
+        count_upstream(queries=1)
+        return response
+
+
+class AsyncTracedTransport(httpx.AsyncHTTPTransport):
+    async def handle_async_request(self, request):
+        with phase('upstream'):
+            response = await super().handle_async_request(request)
+            await response.aread()
+        count_upstream(queries=1)
+        return response
+
+
+def _sql_timer(execute, sql, params, many, context):
+    with phase('upstream'):
+        result = execute(sql, params, many, context)
+    count_upstream(queries=1)
+    return result
+
+
+def trace_queries():
+    # Time this thread's ORM queries as `upstream` (Django connections are per thread)
+    return connection.execute_wrapper(_sql_timer)
+
+
+class Metrics:
+    """
+    Per-process counters in the Prometheus text format. Each gunicorn worker
+    keeps its own; scrape every worker (or sum them) for the full picture.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.durations = {}
+            self.phases = {}
+            self.queries = {}
+            self.rows = {}
+
+    def observe(self, route, method, status_code, total, trace):
+        with self._lock:
+            key = (route, method, str(status_code))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            buckets, count, seconds = self.durations.get(route, ([0] * len(DURATION_BUCKETS), 0, 0.0))
+            buckets = [hits + (total <= bound) for hits, bound in zip(buckets, DURATION_BUCKETS)]
+            self.durations[route] = (buckets, count + 1, seconds + total)
+
+            for name, elapsed in trace.phases.items():
+                self.phases[(route, name)] = self.phases.get((route, name), 0.0) + elapsed
+            self.queries[route] = self.queries.get(route, 0) + trace.queries
+            self.rows[route] = self.rows.get(route, 0) + trace.rows
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP campaigns_http_requests_total Requests served, by route, method and status.',
+                '# TYPE campaigns_http_requests_total counter',
+            ]
+            for (route, method, code), value in sorted(self.requests.items()):
+                lines.append(f'campaigns_http_requests_total{_labels(route=route, method=method, status=code)} {value}')
+
+            lines += [
+                '# HELP campaigns_http_request_duration_seconds Request latency, by route.',
+                '# TYPE campaigns_http_request_duration_seconds histogram',
+            ]
+            for route, (buckets, count, seconds) in sorted(self.durations.items()):
+                for bound, hits in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f'campaigns_http_request_duration_seconds_bucket{_labels(route=route, le=bound)} {hits}')
+                lines.append(f'campaigns_http_request_duration_seconds_bucket{_labels(route=route, le="+Inf")} {count}')
+                lines.append(f'campaigns_http_request_duration_seconds_sum{_labels(route=route)} {seconds:.6f}')
+                lines.append(f'campaigns_http_request_duration_seconds_count{_labels(route=route)} {count}')
+
+            lines += [
+                '# HELP campaigns_phase_seconds_total Time spent per request phase, by route.',
+                '# TYPE campaigns_phase_seconds_total counter',
+            ]
+            for (route, name), value in sorted(self.phases.items()):
+                lines.append(f'campaigns_phase_seconds_total{_labels(route=route, phase=name)} {value:.6f}')
+
+            for metric, values, description in (
+                ('campaigns_upstream_queries_total', self.queries, 'PostgREST requests or SQL queries, by route.'),
+                ('campaigns_upstream_rows_total', self.rows, 'Rows returned by data-access calls, by route.'),
+            ):
+                lines += [f'# HELP {metric} {description}', f'# TYPE {metric} counter']
+                for route, value in sorted(values.items()):
+                    lines.append(f'{metric}{_labels(route=route)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+metrics = Metrics()
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    # Both routers register the viewset; count /campaigns and /campaigns/ as one route
+    return match.view_name.replace('campaign_slash-', 'campaign-')
+
+
+class Profiler:
+    """
+    Runs cProfile over a random SAMPLE_RATE fraction of sync requests and dumps
+    each profile to PROFILE_DIR (load them with pstats or snakeviz). One
+    request per process is profiled at a time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def sample(self, options):
+        rate = options['PROFILE_SAMPLE_RATE']
+        return rate > 0 and random.random() < rate and self._lock.acquire(blocking=False)
+
+    def run(self, options, request, get_response):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                response = get_response(request)
+            finally:
+                profile.disable()
+            self.dump(options['PROFILE_DIR'], request, profile)
+        finally:
+            self._lock.release()
+        return response
+
+    def dump(self, directory, request, profile):
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+        path = os.path.join(directory, f'{time.strftime("%Y%m%dT%H%M%S")}-{os.getpid()}-{request.method}-{slug}.prof')
+        try:
+            os.makedirs(directory, exist_ok=True)
+            profile.dump_stats(path)
+        except OSError as e:
+            logger.warning("Could not write profile %s: %s", path, e)
+        else:
+            logger.info("Profiled %s %s -> %s", request.method, request.path, path)
+
+
+profiler = Profiler()
+
+
+class TracingMiddleware:
+    """
+    Times each request by phase (see PHASES), counts its upstream queries and
+    rows, and reports them in a Server-Timing header and on /metrics. Place it
+    first in MIDDLEWARE so the total covers the whole stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = tracing_settings()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.options['ENABLED']:
+            return self.get_response(request)
+
+        with start_trace() as trace, trace_queries():
+            if profiler.sample(self.options):
+                response = profiler.run(self.options, request, self.get_response)
+            else:
+                response = self.get_response(request)
+        return self.finish(request, response, trace)
+
+    async def __acall__(self, request):
+        if not self.options['ENABLED']:
+            return await self.get_response(request)
+
+        # cProfile follows one thread, not one coroutine, so async requests are not sampled
+        with start_trace() as trace:
+            response = await self.get_response(request)
+        return self.finish(request, response, trace)
+
+    def process_template_response(self, request, response):
+        # Runs just before DRF renders the body; the callback fires right after
+        if trace := _trace.get():
+            started = time.perf_counter()
+            response.add_post_render_callback(lambda _: trace.add('render', time.perf_counter() - started))
+        return response
+
+    def finish(self, request, response, trace):
+        total = trace.finish()
+        response['Server-Timing'] = trace.server_timing(total)
+        metrics.observe(route_name(request), request.method, response.status_code, total, trace)
+        return response
+
+
+def metrics_view(request):
+    token = tracing_settings()['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,8 +1,10 @@
+from django.conf import settings
 from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     CampaignViewSet, DashboardStatsView, DashboardPerformanceView, 
-    InsightsTrendsView, NewsSearchAPIView
+    InsightsTrendsView, NewsSearchAPIView, CampaignExportView, PerformanceExportView,
+    PerformanceIngestView, JobListView, JobDetailView
 )
 
 # Router for endpoints without trailing slashes (e.g., /api/campaigns)
@@ -23,4 +25,19 @@ urlpatterns = [
     re_path(r'^dashboard/performance/?$', DashboardPerformanceView.as_view(), name='dashboard-performance'),
     re_path(r'^insights/trends/?$', InsightsTrendsView.as_view(), name='insights-trends'),
     re_path(r'^news/search/?$', NewsSearchAPIView.as_view(), name='news-search'),
+    re_path(r'^export/campaigns/?$', CampaignExportView.as_view(), name='export-campaigns'),
+    re_path(r'^performance/ingest/?$', PerformanceIngestView.as_view(), name='performance-ingest'),
+    re_path(r'^export/performance/?$', PerformanceExportView.as_view(), name='export-performance'),
+    re_path(r'^jobs/?$', JobListView.as_view(), name='jobs'),
+    re_path(r'^jobs/(?P<pk>[0-9a-f-]{36})/?$', JobDetailView.as_view(), name='job-detail'),
 ]
+
+if settings.ASYNC_VIEWS:
+    from .async_views import AsyncDashboardPerformanceView, AsyncDashboardStatsView, AsyncNewsSearchView
+
+    # Listed first so they take precedence over the sync views for the same paths
+    urlpatterns = [
+        re_path(r'^news/search/?$', AsyncNewsSearchView.as_view(), name='news-search'),
+        re_path(r'^dashboard/stats/?$', AsyncDashboardStatsView.as_view(), name='dashboard-stats'),
+        re_path(r'^dashboard/performance/?$', AsyncDashboardPerformanceView.as_view(), name='dashboard-performance'),
+    ] + urlpatterns
@@ -1,38 +1,64 @@
-import requests
-import os
+import io
+import logging
+import math
+from itertools import chain, islice
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from .models import Job
 from .serializers import CampaignSerializer
-from .supabase_client import get_supabase_client
-import random
-from datetime import timedelta, date, datetime
+from .repository import RepositoryError, get_repository
+from .pagination import cursor_fields, parse_fields, parse_limit
+from .kpis import parse_kpi_ranges, parse_ordering
+from .cache import cache_response, idempotent, invalidate
+from .export import (
+    CSVRenderer, NDJSONRenderer, campaign_export, csv_chunks, encode, ndjson_chunks,
+    performance_export
+)
+from .news import NewsUnavailable, get_fetcher, news_search_request
+from .ingest import CONTENT_TYPES as INGEST_CONTENT_TYPES, ingest
+from .jobs import enqueue, format_job, stage_upload
+from .bulk import OPERATIONS as BULK_OPERATIONS, summarize, validate_operations
+from .compare import build_comparison, parse_compare_params
+from .insights import build_insights, parse_insights_params
+from .periods import parse_period_filters
+from .rollups import format_stats
+from .writes import get_writer, performance_record
+from datetime import date, datetime
 import uuid
 
-def format_campaign(data):
-    if 'budget' in data:
-        data['budget'] = float(data['budget'])
-    if 'amount_spent' in data:
-        data['amount_spent'] = float(data['amount_spent'])
-    if 'roi' in data and data['roi'] is not None:
-        data['roi'] = float(data['roi'])
-    return data
+logger = logging.getLogger(__name__)
 
 class CampaignViewSet(viewsets.ViewSet):
+    @cache_response('campaigns')
     def list(self, request):
-        supabase = get_supabase_client()
-        query = supabase.table('campaigns_campaign').select('*')
-        
-        if status_param := request.query_params.get('status'):
-            query = query.eq('status', status_param)
-        if platform_param := request.query_params.get('platform'):
-            query = query.eq('platform', platform_param)
-        if search_param := request.query_params.get('search'):
-            query = query.ilike('name', f'%{search_param}%')
-            
-        response = query.order('created_at', desc=True).execute()
-        return Response([format_campaign(item) for item in response.data])
+        params = request.query_params
+        paginated = 'limit' in params or 'cursor' in params
+        include_count = params.get('include_count') == 'true'
+
+        try:
+            ordering = parse_ordering(params.get('ordering'))
+            ranges = parse_kpi_ranges(params)
+            columns = parse_fields(params.get('fields'), required=cursor_fields(ordering) if paginated else ())
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            rows, next_cursor, count = get_repository().list_campaigns(
+                params, columns, ordering, ranges, paginated, include_count
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not paginated:
+            return Response(rows)
+        body = {"results": rows, "next": next_cursor}
+        if include_count:
+            body["count"] = count
+        return Response(body)
 
     def create(self, request):
         serializer = CampaignSerializer(data=request.data)
@@ -47,17 +73,15 @@ class CampaignViewSet(viewsets.ViewSet):
         data.setdefault('amount_spent', 0.0)
         data.setdefault('status', 'Draft')
         
-        supabase = get_supabase_client()
-        response = supabase.table('campaigns_campaign').insert(data).execute()
-        
-        if response.data:
-            return Response(format_campaign(response.data[0]), status=status.HTTP_201_CREATED)
+        if row := get_repository().create_campaign(data):
+            invalidate('campaigns', 'dashboard')
+            return Response(row, status=status.HTTP_201_CREATED)
         return Response({"error": "Failed to create campaign"}, status=status.HTTP_400_BAD_REQUEST)
 
+    @cache_response(lambda pk: f'campaign:{pk}')
     def retrieve(self, request, pk=None):
-        supabase = get_supabase_client()
-        response = supabase.table('campaigns_campaign').select('*').eq('id', pk).execute()
-        return Response(format_campaign(response.data[0])) if response.data else Response(status=status.HTTP_404_NOT_FOUND)
+        row = get_repository().get_campaign(pk)
+        return Response(row) if row else Response(status=status.HTTP_404_NOT_FOUND)
 
     def update(self, request, pk=None, partial=False):
         serializer = CampaignSerializer(data=request.data, partial=partial)
@@ -73,10 +97,13 @@ class CampaignViewSet(viewsets.ViewSet):
             if isinstance(value, uuid.UUID):
                 data[key] = str(value)
                 
-        supabase = get_supabase_client()
         try:
-            response = supabase.table('campaigns_campaign').update(data).eq('id', pk).execute()
-            return Response(format_campaign(response.data[0])) if response.data else Response(status=status.HTTP_404_NOT_FOUND)
+            row = get_repository().update_campaign(pk, data)
+            if not row:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+
+            invalidate('campaigns', f'campaign:{pk}', 'dashboard')
+            return Response(row)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -84,22 +111,67 @@ class CampaignViewSet(viewsets.ViewSet):
         return self.update(request, pk, partial=True)
 
     def destroy(self, request, pk=None):
-        get_supabase_client().table('campaigns_campaign').delete().eq('id', pk).execute()
+        if get_repository().delete_campaign(pk):
+            invalidate('campaigns', f'campaign:{pk}', f'performance:{pk}', 'dashboard')
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        try:
+            operations, errors = validate_operations(request.data)
+            atomic = request.data.get('atomic') is True
+            chunk_size = int(request.data.get('chunk_size') or settings.CAMPAIGN_BULK_CHUNK_SIZE)
+            if chunk_size < 1:
+                raise ValueError("chunk_size must be positive")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if atomic and errors:
+            return Response(
+                {"error": "Validation failed, nothing was applied", "results": errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            results = get_repository().bulk_campaigns(operations, atomic, chunk_size)
+        except RepositoryError as e:
+            return Response({"error": e.message, "details": "Transaction rolled back"}, status=status.HTTP_400_BAD_REQUEST)
+        if not atomic:
+            results.extend(errors)
+
+        touched = [r['id'] for r in results if r['status'] in ('created', 'updated', 'deleted')]
+        deleted = [r['id'] for r in results if r['status'] == 'deleted']
+        invalidate(
+            'campaigns', 'dashboard',
+            *(f'campaign:{pk}' for pk in touched),
+            *(f'performance:{pk}' for pk in deleted)
+        )
+
+        results.sort(key=lambda r: (BULK_OPERATIONS.index(r['op']), r['index']))
+        return Response({"atomic": atomic, "summary": summarize(results), "results": results})
+
+    @action(detail=False, methods=['get'], url_path='compare')
+    @cache_response('dashboard')
+    def compare(self, request):
+        # Aligned, zero-filled series of several campaigns from one upstream query
+        try:
+            ids, filters = parse_compare_params(request.query_params, settings.CAMPAIGN_COMPARE_MAX_IDS)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        rows = get_repository().compare_performance(ids, filters)
+        return Response(build_comparison(ids, rows, filters))
+
     @action(detail=True, methods=['get', 'put'], url_path='performance')
+    @cache_response(lambda pk: f'performance:{pk}')
+    @idempotent
     def performance_monthly(self, request, pk=None):
-        supabase = get_supabase_client()
-        
         if request.method == 'GET':
-            # Retrieve monthly performance data
-            response = supabase.table('campaigns_monthlyperformance')\
-                .select('*')\
-                .eq('campaign_id', pk)\
-                .order('month')\
-                .execute()
-            
-            return Response(response.data)
+            # Monthly rows, or quarterly/yearly rollups with ?granularity=, inside the from/to window
+            try:
+                filters = parse_period_filters(request.query_params)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(get_repository().campaign_performance(pk, filters))
 
         elif request.method == 'PUT':
             # Bulk update/save monthly performance data
@@ -110,144 +182,167 @@ class CampaignViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Prepare data for upsert
-            records = []
             try:
-                for item in data:
-                    # Calculate ROI: ((Revenue - Spend) / Spend) * 100
-                    spend = float(item.get('spend', 0))
-                    revenue = float(item.get('revenue', 0))
-                    roi = ((revenue - spend) / spend * 100) if spend > 0 else 0.0
-                    
-                    record = {
-                        'campaign_id': pk,
-                        'month': item.get('month'),
-                        'impressions': int(item.get('impressions', 0)),
-                        'clicks': int(item.get('clicks', 0)),
-                        'conversions': int(item.get('conversions', 0)),
-                        'spend': spend,
-                        'revenue': revenue,
-                        'roi': round(roi, 2)
-                    }
-                    
-                    # If id exists, include it for update
-                    if 'id' in item:
-                        record['id'] = item['id']
-                        
-                    records.append(record)
-            
-                # Upsert data (requires unique constraint on campaign_id, month)
-                response = supabase.table('campaigns_monthlyperformance').upsert(records, on_conflict='campaign_id, month').execute()
-                
-                if response.data:
-                    return Response(response.data)
-                return Response({"error": "Failed to save performance data", "details": "No data returned from Supabase"}, status=status.HTTP_400_BAD_REQUEST)
+                records = [performance_record(pk, item) for item in data]
+                # Only months whose content changed are upserted; concurrent PUTs share one write
+                rows = get_writer().put(pk, records)
+
+                if rows:
+                    return Response(rows)
+                return Response({"error": "Failed to save performance data", "details": "No rows were written"}, status=status.HTTP_400_BAD_REQUEST)
             except Exception as e:
                 return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 class DashboardStatsView(APIView):
+    @cache_response('dashboard')
     def get(self, request):
-        supabase = get_supabase_client()
-        
-        # Fetch campaigns
-        campaigns_response = supabase.table('campaigns_campaign').select('status,budget').execute()
-        campaigns = campaigns_response.data
-        
-        # Fetch all monthly performance to calculate average ROI
-        perf_response = supabase.table('campaigns_monthlyperformance').select('roi').execute()
-        perfs = perf_response.data
-        
-        rois = [float(p.get('roi') or 0) for p in perfs]
-        avg_roi = sum(rois) / len(rois) if rois else 0
-        
-        return Response({
-            "total_campaigns": len(campaigns),
-            "active_campaigns": sum(1 for c in campaigns if c.get('status') == 'Active'),
-            "total_budget": sum(float(c.get('budget', 0) or 0) for c in campaigns),
-            "avg_roi": round(avg_roi, 2)
-        })
+        # Single-row rollup maintained by the write paths, plus a few rows grouped in the database
+        repository = get_repository()
+        return Response(format_stats(repository.dashboard_stats(), repository.stats_breakdown()))
 
 class DashboardPerformanceView(APIView):
+    @cache_response('dashboard')
     def get(self, request):
-        supabase = get_supabase_client()
-        
-        # Fetch aggregated monthly performance
-        # Since we can't do complex aggregation easily via simple Supabase client calls without RPC,
-        # we'll fetch all data and aggregate in Python (acceptable for MVP/small scale)
-        response = supabase.table('campaigns_monthlyperformance').select('*').execute()
-        data = response.data
-        
-        # Aggregate by month
-        aggregated = {}
-        for item in data:
-            month = item['month']
-            # Convert date string YYYY-MM-DD to Month Name (e.g., "Jan") or keep as YYYY-MM
-            # For this chart, let's keep it simple or format as needed. 
-            # User example showed "2026-02", "2026-03".
-            
-            if month not in aggregated:
-                aggregated[month] = {
-                    "name": month,
-                    "impressions": 0,
-                    "clicks": 0,
-                    "conversions": 0,
-                    "spend": 0.0,
-                    "revenue": 0.0
-                }
-            
-            aggregated[month]["impressions"] += item.get('impressions', 0)
-            aggregated[month]["clicks"] += item.get('clicks', 0)
-            aggregated[month]["conversions"] += item.get('conversions', 0)
-            aggregated[month]["spend"] += float(item.get('spend', 0.0))
-            aggregated[month]["revenue"] += float(item.get('revenue', 0.0))
-            
-        # Convert to list and sort by date
-        result = list(aggregated.values())
-        result.sort(key=lambda x: x['name'])
-        
-        return Response(result)
+        try:
+            filters = parse_period_filters(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Aggregated per period in the database; quarters and years come from the rollup table
+        if 'granularity' in filters:
+            return Response(get_repository().period_performance(filters))
+        return Response(get_repository().monthly_performance(filters))
+
+class ExportView(APIView):
+    # CSV unless the client asks for NDJSON via ?format=ndjson or the Accept header
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    filename = 'export'
+    # (repository, query params) -> (columns, rows); see export.campaign_export
+    export = None
+
+    def get(self, request):
+        try:
+            columns, rows = self.export(get_repository(), request.query_params)
+            # Read the first page before answering, so a failing query is an error status rather than a
+            # truncated 200 (a failure on a later page can only end the stream early)
+            rows = iter(rows)
+            first = list(islice(rows, 1))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except RepositoryError as e:
+            logger.warning("Export %s failed: %s", self.filename, e.message)
+            return Response({"error": "Export failed", "details": e.message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        rows = chain(first, rows)
+
+        export_format = request.accepted_renderer.format
+        chunks = csv_chunks(columns, rows) if export_format == 'csv' else ndjson_chunks(rows)
+        compress = request.query_params.get('gzip') == 'true' or 'gzip' in request.headers.get('Accept-Encoding', '')
+
+        response = StreamingHttpResponse(encode(chunks, compress), content_type=request.accepted_renderer.media_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.filename}.{export_format}"'
+        response['Vary'] = 'Accept-Encoding'
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        return response
+
+class CampaignExportView(ExportView):
+    filename = 'campaigns'
+    export = staticmethod(campaign_export)
+
+class PerformanceExportView(ExportView):
+    filename = 'monthly_performance'
+    export = staticmethod(performance_export)
+
+class PerformanceIngestView(APIView):
+    def post(self, request):
+        # Read the raw body line by line rather than through request.data
+        content_type = request.content_type.split(';')[0].strip()
+        if content_type not in INGEST_CONTENT_TYPES:
+            return Response(
+                {"error": f"Content-Type must be one of: {', '.join(INGEST_CONTENT_TYPES)}"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+        if request.query_params.get('async') == 'true':
+            # Queued as a background job; the body is copied to storage in chunks and the job refers to it
+            upload = stage_upload(request.stream or io.BytesIO())
+            job = enqueue('ingest_performance', {'content_type': content_type, 'upload': upload})
+            return job_accepted(job)
+
+        summary = ingest(get_repository(), request.stream or [], content_type)
+        if summary.campaign_ids:
+            invalidate(
+                'campaigns', 'dashboard',
+                *(f'campaign:{pk}' for pk in summary.campaign_ids),
+                *(f'performance:{pk}' for pk in summary.campaign_ids)
+            )
+        if summary.failure is not None:
+            # The batches written before the failure stay written; the summary says which lines were not
+            return Response(summary.as_dict(), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(summary.as_dict())
 
 class InsightsTrendsView(APIView):
+    @cache_response('dashboard')
     def get(self, request):
-        return Response({
-            "trend_score": 87,
-            "search_volume": "2.4M/month",
-            "competition": "Medium",
-            "interest_over_time": [{"name": m, "value": v} for m, v in zip(
-                ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"],
-                [45, 52, 38, 65, 78, 90, 85, 70, 75, 82, 95, 88]
-            )]
-        })
+        try:
+            filters, metric, window = parse_insights_params(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Computed in columns by campaigns.analytics over the matching monthly rows
+        rows = get_repository().performance_rows(filters)
+        return Response(build_insights(rows, metric, window, filters))
+
+def news_response(querystring, headers):
+    # (body, status, headers) for a proxied news search; shared with the async view
+    try:
+        data, cache_status = get_fetcher().search(querystring, headers)
+    except NewsUnavailable as e:
+        headers = {'Retry-After': str(math.ceil(e.retry_after))} if e.retry_after is not None else None
+        code = status.HTTP_503_SERVICE_UNAVAILABLE if e.retry_after is not None else status.HTTP_500_INTERNAL_SERVER_ERROR
+        return {"error": str(e), "details": e.details}, code, headers
+    return data, status.HTTP_200_OK, {'X-Cache': cache_status}
 
 class NewsSearchAPIView(APIView):
     def post(self, request):
-        url = "https://real-time-news-data.p.rapidapi.com/search"
-        
-        query = request.data.get('query', 'Football')
-        limit = request.data.get('limit', '10')
-        time_published = request.data.get('time_published', 'anytime')
-        country = request.data.get('country', 'US')
-        lang = request.data.get('lang', 'en')
-        
-        querystring = {
-            "query": query,
-            "limit": limit,
-            "time_published": time_published,
-            "country": country,
-            "lang": lang
-        }
-        
-        headers = {
-            "x-rapidapi-host": os.environ.get("RAPIDAPI_HOST", "real-time-news-data.p.rapidapi.com"),
-            "x-rapidapi-key": os.environ.get("RAPIDAPI_KEY")
-        }
-        
+        querystring, headers = news_search_request(request.data)
+        data, code, response_headers = news_response(querystring, headers)
+        return Response(data, status=code, headers=response_headers)
+
+def job_accepted(job):
+    # 202 pointing at the job's status endpoint
+    return Response(format_job(job), status=status.HTTP_202_ACCEPTED, headers={'Location': f'/api/jobs/{job.id}'})
+
+class JobListView(APIView):
+    def get(self, request):
+        # Most recent jobs first, optionally of one status and kind
+        params = request.query_params
         try:
-            response = requests.get(url, headers=headers, params=querystring)
-            response.raise_for_status()
-            return Response(response.json())
-        except requests.RequestException as e:
-            return Response(
-                {"error": str(e), "details": response.text if 'response' in locals() else "No response"}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            limit = parse_limit(params.get('limit'))
+        except ValueError:
+            return Response({"error": "limit must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+        jobs = Job.objects.defer('payload').order_by('-created_at')
+        if params.get('status'):
+            jobs = jobs.filter(status=params['status'])
+        if params.get('kind'):
+            jobs = jobs.filter(kind=params['kind'])
+        return Response([format_job(job) for job in jobs[:limit]])
+
+    def post(self, request):
+        # Queue a job of a registered kind, e.g. {"kind": "rebuild_dashboard_stats"}
+        data = request.data if isinstance(request.data, dict) else {}
+        payload = data.get('payload') or {}
+        if not isinstance(payload, dict):
+            return Response({"error": "payload must be an object"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            job = enqueue(data.get('kind'), payload)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return job_accepted(job)
+
+class JobDetailView(APIView):
+    def get(self, request, pk):
+        job = Job.objects.defer('payload').filter(pk=pk).first()
+        if job is None:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(format_job(job))
@@ -0,0 +1,179 @@
+"""
+The PUT /api/campaigns/<id>/performance write path. Autosave sends a
+campaign's full month list on every change, so each record is compared with
+a content hash of the stored row and only the months that differ are
+upserted; a PUT that changes nothing writes nothing and keeps the cached
+reads. Concurrent PUTs for one campaign are merged into a single upstream
+write per round.
+"""
+import hashlib
+import threading
+
+from .aggregates import PERFORMANCE_AMOUNTS, PERFORMANCE_COUNTERS, parse_month
+from .cache import get_backend, invalidate
+from .periods import roi
+from .repository import get_repository
+
+
+def performance_record(pk, item):
+    # One monthly performance record of campaign `pk` from a request item, ROI computed from spend and revenue
+    try:
+        month = parse_month(str(item.get('month'))).isoformat()
+    except ValueError:
+        raise ValueError(f"Invalid month: {item.get('month')}")
+    spend = float(item.get('spend', 0))
+    revenue = float(item.get('revenue', 0))
+    record = {
+        'campaign_id': pk,
+        'month': month,
+        **{field: int(item.get(field, 0)) for field in PERFORMANCE_COUNTERS},
+        'spend': spend,
+        'revenue': revenue,
+        'roi': roi(spend, revenue),
+    }
+    # If id exists, include it for update
+    if 'id' in item:
+        record['id'] = item['id']
+    return record
+
+
+def content_hash(row):
+    # Digest of the fields a PUT can change; ROI follows from spend and revenue
+    values = [int(row.get(field) or 0) for field in PERFORMANCE_COUNTERS]
+    values += [float(row.get(field) or 0.0) for field in PERFORMANCE_AMOUNTS]
+    return hashlib.sha1(repr(values).encode()).hexdigest()
+
+
+def _snapshot_key(pk, backend):
+    # Keyed by the performance scope's generation: any write that invalidates it retires the snapshot
+    generation, = backend.generations([f'performance:{pk}'])
+    return f'performance-snapshot:{pk}@{generation}'
+
+
+class _Write:
+    # One upstream write shared by the PUTs that were merged into it
+    def __init__(self):
+        self.records = {}
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PerformanceWriter:
+    """
+    Saves monthly performance records through the repository.
+
+    The stored rows of a campaign are read as {month: (content hash, row)}
+    and only records whose hash differs are upserted. With a shared cache
+    backend that snapshot is cached under the campaign's performance scope,
+    so any invalidating write retires it; an in-process cache cannot see
+    other workers' writes, so the rows are read again for every write. PUTs
+    for a campaign that arrive while one of its writes is running are merged
+    (later records win per month) and written together once it finishes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._campaign_locks = {}
+        self._counters = {'writes': 0, 'merged': 0, 'rows_written': 0, 'rows_unchanged': 0}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def put(self, pk, records):
+        """
+        Save `records` (performance_record() dicts of campaign `pk`) and return
+        the stored rows of their months, in request order. Raises
+        RepositoryError.
+        """
+        with self._lock:
+            write = self._pending.get(pk)
+            if write is None:
+                write = self._pending[pk] = _Write()
+            else:
+                self._counters['merged'] += 1
+            write.records.update((record['month'], record) for record in records)
+            campaign_lock, users = self._campaign_locks.get(pk, (threading.Lock(), 0))
+            self._campaign_locks[pk] = (campaign_lock, users + 1)
+
+        try:
+            # One write per campaign at a time; whoever gets the lock first runs the pending one
+            with campaign_lock:
+                with self._lock:
+                    leader = self._pending.get(pk) is write
+                    if leader:
+                        del self._pending[pk]
+                if leader:
+                    try:
+                        write.result = self._save(pk, list(write.records.values()))
+                    except Exception as e:
+                        write.error = e
+                    finally:
+                        write.done.set()
+        finally:
+            with self._lock:
+                campaign_lock, users = self._campaign_locks[pk]
+                if users == 1:
+                    del self._campaign_locks[pk]
+                else:
+                    self._campaign_locks[pk] = (campaign_lock, users - 1)
+
+        write.done.wait()
+        if write.error is not None:
+            raise write.error
+        months = dict.fromkeys(record['month'] for record in records)
+        return [write.result[month] for month in months if month in write.result]
+
+    def _save(self, pk, records):
+        backend = get_backend()
+        # Taken before reading, so rows that a concurrent invalidating write replaces are never cached as current
+        key = _snapshot_key(pk, backend)
+        snapshot = backend.get(key) if backend.shared else None
+        if snapshot is None:
+            snapshot = {row['month'][:10]: (content_hash(row), row) for row in get_repository().campaign_performance(pk)}
+            if backend.shared:
+                backend.set(key, snapshot)
+
+        changed = [
+            record for record in records
+            if record['month'] not in snapshot or snapshot[record['month']][0] != content_hash(record)
+        ]
+        self._count('writes')
+        self._count('rows_unchanged', len(records) - len(changed))
+        if changed:
+            # Upsert on (campaign_id, month); the rollup swaps out the replaced rows' ROI
+            rows, _ = get_repository().upsert_performance(changed)
+            self._count('rows_written', len(rows))
+            snapshot = {**snapshot, **{row['month'][:10]: (content_hash(row), row) for row in rows}}
+            # Only carried over when no other write invalidated the campaign meanwhile
+            current = backend.shared and _snapshot_key(pk, backend) == key
+            # The KPI triggers have updated the campaign row too
+            invalidate('campaigns', f'campaign:{pk}', f'performance:{pk}', 'dashboard')
+            if current:
+                backend.set(_snapshot_key(pk, backend), snapshot)
+        return {month: row for month, (_, row) in snapshot.items()}
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = PerformanceWriter()
+    return _writer
+
+
+def reset_writer():
+    global _writer
+    with _writer_lock:
+        _writer = None
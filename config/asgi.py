@@ -1,6 +1,11 @@
 import os
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+# Serve the upstream-bound endpoints from campaigns/async_views.py
+os.environ.setdefault('CAMPAIGNS_ASYNC_VIEWS', 'True')
+
+# Static files are answered here, so the middleware chain (without WhiteNoise) stays async
+application = ASGIStaticFilesHandler(get_asgi_application())
@@ -0,0 +1,9 @@
+"""
+WSGI entry point of the Vercel function: the app under the API-only settings.
+"""
+import os
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings_api')
+
+application = get_wsgi_application()
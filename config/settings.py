@@ -1,8 +1,10 @@
 
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
+import django
 
 load_dotenv()
 
@@ -27,6 +29,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'campaigns.tracing.TracingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -57,18 +60,22 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# DATABASE_URL points Django at Postgres (e.g. the Supabase connection string);
+# without it a local SQLite file is used
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': dj_database_url.config(
+        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
+        conn_max_age=int(os.getenv('DATABASE_CONN_MAX_AGE', '0')),
+        conn_health_checks=True,
+    )
 }
-
-if not DATABASES['default']:
-    DATABASES['default'] = {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' and django.VERSION >= (5, 1):
+    # Take the write lock when a transaction begins, so concurrent writers wait
+    # for it instead of failing with "database is locked" on upgrade (the option
+    # is new in Django 5.1; the Python 3.9 images run 4.2, where writers that
+    # collide still fail). The job queue does not depend on it: its claim is a
+    # single conditional UPDATE.
+    DATABASES['default'].setdefault('OPTIONS', {})['transaction_mode'] = 'IMMEDIATE'
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -94,6 +101,10 @@ STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Default file storage; queued ingests keep their request bodies under ingest/ until the job finishes.
+# Workers on other hosts need it shared (a volume, or a remote backend in STORAGES)
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', str(BASE_DIR / 'media'))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -101,5 +112,112 @@ CORS_ALLOW_CREDENTIALS = True
 
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # orjson-backed JSON; the browsable API is only offered while developing
+    'DEFAULT_RENDERER_CLASSES': ['campaigns.renderers.FastJSONRenderer'] + (
+        ['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []
+    ),
+}
+
+# Upper bound for `limit` on keyset-paginated campaign lists
+CAMPAIGN_PAGE_MAX_LIMIT = int(os.getenv('CAMPAIGN_PAGE_MAX_LIMIT', '100'))
+
+# `include_count` on the orm backend counts matching rows up to this many, so a
+# broad filter on a large table never costs a full COUNT(*)
+CAMPAIGN_COUNT_LIMIT = int(os.getenv('CAMPAIGN_COUNT_LIMIT', '10000'))
+
+# Bulk campaign endpoint: rows per PostgREST call, and operations per request
+CAMPAIGN_BULK_CHUNK_SIZE = int(os.getenv('CAMPAIGN_BULK_CHUNK_SIZE', '200'))
+CAMPAIGN_BULK_MAX_OPERATIONS = int(os.getenv('CAMPAIGN_BULK_MAX_OPERATIONS', '10000'))
+
+# Campaigns accepted by one /api/campaigns/compare request
+CAMPAIGN_COMPARE_MAX_IDS = int(os.getenv('CAMPAIGN_COMPARE_MAX_IDS', '50'))
+
+# Rows fetched per upstream query by the streaming export endpoints
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))
+
+# Performance ingest: records per validated/upserted batch, batches queued
+# ahead of the writer before parsing blocks, and rejected lines reported
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '250'))
+INGEST_MAX_PENDING_BATCHES = int(os.getenv('INGEST_MAX_PENDING_BATCHES', '2'))
+INGEST_MAX_ERRORS = int(os.getenv('INGEST_MAX_ERRORS', '10000'))
+
+# Background jobs (campaigns/jobs.py): job threads started inside each web
+# process (0 leaves them to `manage.py run_jobs`), seconds between polls when
+# idle, attempts per job, the retry backoff ceiling (BACKOFF * 2^n, capped at
+# MAX_BACKOFF) and seconds a worker may hold a job before another takes it over
+JOBS = {
+    'WORKERS': int(os.getenv('JOBS_IN_PROCESS_WORKERS', '0')),
+    'POLL_INTERVAL': float(os.getenv('JOBS_POLL_INTERVAL', '1')),
+    'MAX_ATTEMPTS': int(os.getenv('JOBS_MAX_ATTEMPTS', '3')),
+    'BACKOFF': float(os.getenv('JOBS_RETRY_BACKOFF', '5')),
+    'MAX_BACKOFF': float(os.getenv('JOBS_MAX_BACKOFF', '600')),
+    'LEASE': int(os.getenv('JOBS_LEASE', '900')),
+}
+
+# RapidAPI news search proxy: seconds before a response goes stale and how long
+# a stale copy may still be served while refreshing, the upstream call budget
+# (RATE calls/second with bursts of BURST, waiting up to RATE_WAIT seconds for a
+# slot), retries with exponential BACKOFF, and consecutive failures that open
+# the circuit for RESET_TIMEOUT seconds
+NEWS_PROXY = {
+    'URL': os.getenv('NEWS_SEARCH_URL', 'https://real-time-news-data.p.rapidapi.com/search'),
+    'TIMEOUT': float(os.getenv('NEWS_TIMEOUT', '10')),
+    'TTL': int(os.getenv('NEWS_CACHE_TTL', '300')),
+    'STALE_TTL': int(os.getenv('NEWS_STALE_TTL', '3600')),
+    'MAX_ENTRIES': int(os.getenv('NEWS_CACHE_MAX_ENTRIES', '256')),
+    'RATE': float(os.getenv('NEWS_RATE_LIMIT', '1')),
+    'BURST': int(os.getenv('NEWS_RATE_BURST', '5')),
+    'RATE_WAIT': float(os.getenv('NEWS_RATE_WAIT', '2')),
+    'RETRIES': int(os.getenv('NEWS_RETRIES', '2')),
+    'BACKOFF': float(os.getenv('NEWS_RETRY_BACKOFF', '0.5')),
+    'FAILURE_THRESHOLD': int(os.getenv('NEWS_FAILURE_THRESHOLD', '5')),
+    'RESET_TIMEOUT': int(os.getenv('NEWS_RESET_TIMEOUT', '30')),
+}
+
+# Where the campaign, performance and dashboard endpoints read and write:
+# 'supabase' (PostgREST) or 'orm' (the Django models over DATABASES['default'],
+# e.g. a pooled Postgres via DATABASE_URL).
+CAMPAIGNS_DATA_BACKEND = os.getenv('CAMPAIGNS_DATA_BACKEND', 'supabase')
+
+# Per-request phase timings in a Server-Timing header and Prometheus metrics on
+# /metrics (only with `Authorization: Bearer <METRICS_TOKEN>` when a token is
+# set). PROFILE_SAMPLE_RATE is the fraction of requests run under cProfile,
+# with the .prof dumps written to PROFILE_DIR
+CAMPAIGNS_TRACING = {
+    'ENABLED': os.getenv('TRACING_ENABLED', 'True') == 'True',
+    'METRICS_TOKEN': os.getenv('METRICS_TOKEN') or None,
+    'PROFILE_SAMPLE_RATE': float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+    'PROFILE_DIR': os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'campaign-profiles')),
+}
+
+# Route the read-heavy endpoints to the async views in campaigns/async_views.py
+# (config/asgi.py turns this on when the app is served over ASGI)
+ASYNC_VIEWS = os.getenv('CAMPAIGNS_ASYNC_VIEWS', 'False') == 'True'
+if ASYNC_VIEWS:
+    # WhiteNoise is sync-only and would turn the whole chain sync, holding a thread per async request;
+    # config/asgi.py serves static files in front of Django instead
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
+# Set REDIS_URL to share CACHES['default'] between workers and instances
+if REDIS_URL := os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# Response cache for the read endpoints: 'local' (per-process LRU), 'django'
+# (the CACHES alias, shared between workers when backed by Redis) or 'none'.
+# It also keeps the rows performance PUTs diff against, and (in their own keyspace,
+# bounded apart from the responses) Idempotency-Key records.
+CAMPAIGNS_CACHE = {
+    'BACKEND': os.getenv('CAMPAIGNS_CACHE_BACKEND', 'local'),
+    'TTL': int(os.getenv('CAMPAIGNS_CACHE_TTL', '30')),
+    'MAX_ENTRIES': int(os.getenv('CAMPAIGNS_CACHE_MAX_ENTRIES', '1024')),
+    'ALIAS': 'default',
+    # How long a write's response is kept for replay under its Idempotency-Key
+    'IDEMPOTENCY_TTL': int(os.getenv('CAMPAIGNS_IDEMPOTENCY_TTL', '86400')),
+    'IDEMPOTENCY_MAX_ENTRIES': int(os.getenv('CAMPAIGNS_IDEMPOTENCY_MAX_ENTRIES', '10000')),
 }
@@ -0,0 +1,33 @@
+"""
+API-only settings for the serverless deployment (see config/serverless.py).
+
+The JSON API uses none of the admin, auth, sessions, messages or static files
+machinery, so those apps and their middleware are left out; every cold start
+then skips importing them.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import REST_FRAMEWORK, TEMPLATES
+
+INSTALLED_APPS = [
+    'rest_framework',
+    'corsheaders',
+    'campaigns',
+]
+
+MIDDLEWARE = [
+    'campaigns.tracing.TracingMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+# Only the browsable API (DEBUG) renders templates
+TEMPLATES = [{**TEMPLATES[0], 'OPTIONS': {'context_processors': ['django.template.context_processors.request']}}]
+
+# Without django.contrib.auth there is no user model; the API is unauthenticated
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_PERMISSION_CLASSES': [],
+    'UNAUTHENTICATED_USER': None,
+}
@@ -1,9 +1,16 @@
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
+from campaigns.tracing import metrics_view
 from .views import api_root
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/', include('campaigns.urls')),
+    path('metrics', metrics_view, name='metrics'),
     path('', api_root, name='api_root'),
 ]
+
+# The API-only settings (config/settings_api.py) leave the admin out
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
@@ -85,8 +85,8 @@ curl -X POST https://campaign-tracker-backend-eight.vercel.app/api/campaigns \
         <h2>Insights</h2>
 
         <div class="endpoint">
-            <span class="method get">GET</span> <code>/api/insights/trends?query=marketing</code>
-            <p>Get trend analysis and related keywords.</p>
+            <span class="method get">GET</span> <code>/api/insights/trends?metric=clicks</code>
+            <p>Get month-over-month trends, a trend score and the leading campaigns.</p>
         </div>
     </body>
     </html>
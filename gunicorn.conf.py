@@ -0,0 +1,96 @@
+"""
+Production gunicorn settings, read from ./gunicorn.conf.py by default.
+
+One worker process per available CPU, so aggregation loops and JSON
+rendering are not all serialized on one GIL, each with a few threads to
+overlap waits on Supabase. That needs the response cache shared between
+workers (CAMPAIGNS_CACHE_BACKEND=django with REDIS_URL) or off (none): with
+a per-process cache, each worker would only see its own invalidations and
+serve stale reads for up to the TTL, and an Idempotency-Key retry landing on
+another worker would run again. So with such a cache the default is one
+worker, and starting more is refused. The app is imported once in the master before
+forking; the lazily created clients and database connections still open in
+each worker. Workers are recycled after a jittered number of requests, and
+one that stops answering the master for `timeout` seconds is restarted.
+
+Environment (defaults in brackets):
+  SERVER                     wsgi (gthread workers) or asgi (uvicorn workers) [wsgi]
+  PORT                       [8080]
+  WEB_CONCURRENCY            worker processes [available CPUs; 1 with a per-process cache]
+  GUNICORN_THREADS           threads per wsgi worker [4]
+  GUNICORN_TIMEOUT           seconds before an unresponsive worker is restarted [30]
+  GUNICORN_GRACEFUL_TIMEOUT  seconds workers get to finish on restart or shutdown [30]
+  GUNICORN_KEEPALIVE         seconds an idle keep-alive connection is held [5]
+  GUNICORN_MAX_REQUESTS      requests before a worker is recycled, 0 to never [1000]
+  GUNICORN_MAX_REQUESTS_JITTER  random extra requests, so workers recycle apart [100]
+  GUNICORN_PRELOAD           import the app before forking [True]
+"""
+import gc
+import math
+import os
+
+
+def available_cpus():
+    # CPUs this process may use: its affinity mask, capped by a cgroup v2 CPU quota (containers)
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+server = os.getenv('SERVER', 'wsgi')
+if server == 'asgi':
+    wsgi_app = 'config.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'config.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+def per_process_cache():
+    # The campaigns cache as config/settings.py configures it; 'django' is only shared when backed by Redis
+    backend = os.getenv('CAMPAIGNS_CACHE_BACKEND', 'local')
+    return backend == 'local' or (backend == 'django' and not os.getenv('REDIS_URL'))
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv('WEB_CONCURRENCY') or (1 if per_process_cache() else available_cpus()))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Heartbeat files in memory rather than on a possibly slow container disk
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+def on_starting(server):
+    # Also covers --workers on the command line, which overrides the count above
+    if server.cfg.workers > 1 and per_process_cache():
+        raise RuntimeError(
+            f"{server.cfg.workers} workers with a per-process response cache would serve stale reads; "
+            "set CAMPAIGNS_CACHE_BACKEND=django with REDIS_URL, or CAMPAIGNS_CACHE_BACKEND=none, or one worker"
+        )
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    # The URLconf imports the views and everything they use; load it once here rather than per worker
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+    # Keep the preloaded objects out of the collector, so it does not copy their pages into every worker
+    gc.freeze()
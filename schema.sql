@@ -234,6 +234,522 @@ CREATE INDEX campaigns_monthlyperformance_campaign_id_idx ON campaigns_monthlype
 COMMIT;
 
 
+-- campaigns 0003_dashboardstats
+-- Single-row rollup behind /api/dashboard/stats, updated incrementally by the API
+CREATE TABLE campaigns_dashboardstats (
+    id smallint PRIMARY KEY DEFAULT 1 CHECK (id >= 0),
+    total_campaigns integer NOT NULL DEFAULT 0,
+    active_campaigns integer NOT NULL DEFAULT 0,
+    paused_campaigns integer NOT NULL DEFAULT 0,
+    completed_campaigns integer NOT NULL DEFAULT 0,
+    draft_campaigns integer NOT NULL DEFAULT 0,
+    total_budget double precision NOT NULL DEFAULT 0.0,
+    roi_sum double precision NOT NULL DEFAULT 0.0,
+    roi_count integer NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT NOW()
+);
+
+-- The deltas below only UPDATE row 1, so create it and build it from the current tables
+INSERT INTO campaigns_dashboardstats (id) VALUES (1) ON CONFLICT DO NOTHING;
+UPDATE campaigns_dashboardstats SET
+    total_campaigns = (SELECT COUNT(*) FROM campaigns_campaign),
+    active_campaigns = (SELECT COUNT(*) FROM campaigns_campaign WHERE status = 'Active'),
+    paused_campaigns = (SELECT COUNT(*) FROM campaigns_campaign WHERE status = 'Paused'),
+    completed_campaigns = (SELECT COUNT(*) FROM campaigns_campaign WHERE status = 'Completed'),
+    draft_campaigns = (SELECT COUNT(*) FROM campaigns_campaign WHERE status = 'Draft'),
+    total_budget = COALESCE((SELECT SUM(budget) FROM campaigns_campaign), 0),
+    roi_sum = COALESCE((SELECT SUM(roi) FROM campaigns_monthlyperformance), 0),
+    roi_count = (SELECT COUNT(*) FROM campaigns_monthlyperformance),
+    updated_at = NOW()
+WHERE id = 1;
+
+-- Adds each key of `delta` to the matching column in a single atomic UPDATE
+CREATE OR REPLACE FUNCTION apply_dashboard_stats_delta(delta jsonb)
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE campaigns_dashboardstats SET
+        total_campaigns = total_campaigns + COALESCE((delta->>'total_campaigns')::integer, 0),
+        active_campaigns = active_campaigns + COALESCE((delta->>'active_campaigns')::integer, 0),
+        paused_campaigns = paused_campaigns + COALESCE((delta->>'paused_campaigns')::integer, 0),
+        completed_campaigns = completed_campaigns + COALESCE((delta->>'completed_campaigns')::integer, 0),
+        draft_campaigns = draft_campaigns + COALESCE((delta->>'draft_campaigns')::integer, 0),
+        total_budget = total_budget + COALESCE((delta->>'total_budget')::double precision, 0),
+        roi_sum = roi_sum + COALESCE((delta->>'roi_sum')::double precision, 0),
+        roi_count = roi_count + COALESCE((delta->>'roi_count')::integer, 0),
+        updated_at = NOW()
+    WHERE id = 1;
+$$;
+
+
+-- campaigns 0004_campaign_search_index
+-- Trigram indexes let ILIKE '%term%' on name/description use an index instead of a seq scan
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS campaigns_campaign_name_trgm ON campaigns_campaign USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS campaigns_campaign_description_trgm ON campaigns_campaign USING gin (description gin_trgm_ops);
+
+-- Substring search ranked by trigram similarity (called via RPC; PostgREST filters apply on top)
+CREATE OR REPLACE FUNCTION search_campaigns(p_term text, p_include_description boolean DEFAULT false)
+RETURNS SETOF campaigns_campaign
+LANGUAGE sql STABLE
+AS $$
+    SELECT c.*
+    FROM campaigns_campaign c
+    WHERE c.name ILIKE '%' || p_term || '%'
+       OR (p_include_description AND c.description ILIKE '%' || p_term || '%')
+    ORDER BY GREATEST(
+                 similarity(c.name, p_term),
+                 CASE WHEN p_include_description THEN similarity(COALESCE(c.description, ''), p_term) * 0.5 ELSE 0 END
+             ) DESC,
+             c.created_at DESC,
+             c.id DESC;
+$$;
+
+
+-- campaigns bulk_apply_campaigns
+-- All-or-nothing bulk writes for POST /api/campaigns/bulk with "atomic": true.
+-- PostgREST runs the call in one transaction, so any failing row rolls back every operation.
+-- amount_spent and roi are lifetime KPIs kept by the triggers; an upsert leaves them as they are.
+CREATE OR REPLACE FUNCTION bulk_apply_campaigns(
+    p_create jsonb DEFAULT '[]'::jsonb,
+    p_upsert jsonb DEFAULT '[]'::jsonb,
+    p_delete uuid[] DEFAULT '{}'::uuid[]
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    created jsonb;
+    upserted jsonb;
+    deleted jsonb;
+BEGIN
+    WITH rows AS (
+        INSERT INTO campaigns_campaign (
+            id, name, description, platform, status, budget, amount_spent,
+            start_date, end_date, target_audience, goal, roi, created_at
+        )
+        SELECT id, name, description, platform, status, budget, COALESCE(amount_spent, 0.0),
+               start_date, end_date, target_audience, goal, roi, COALESCE(created_at, NOW())
+        FROM jsonb_populate_recordset(NULL::campaigns_campaign, p_create)
+        RETURNING *
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(rows)), '[]'::jsonb) INTO created FROM rows;
+
+    WITH rows AS (
+        INSERT INTO campaigns_campaign (
+            id, name, description, platform, status, budget, amount_spent,
+            start_date, end_date, target_audience, goal, roi, created_at
+        )
+        SELECT id, name, description, platform, status, budget, COALESCE(amount_spent, 0.0),
+               start_date, end_date, target_audience, goal, roi, NOW()
+        FROM jsonb_populate_recordset(NULL::campaigns_campaign, p_upsert)
+        ON CONFLICT (id) DO UPDATE SET
+            name = EXCLUDED.name,
+            description = EXCLUDED.description,
+            platform = EXCLUDED.platform,
+            status = EXCLUDED.status,
+            budget = EXCLUDED.budget,
+            start_date = EXCLUDED.start_date,
+            end_date = EXCLUDED.end_date,
+            target_audience = EXCLUDED.target_audience,
+            goal = EXCLUDED.goal
+        RETURNING *
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(rows)), '[]'::jsonb) INTO upserted FROM rows;
+
+    WITH rows AS (
+        DELETE FROM campaigns_campaign WHERE id = ANY(p_delete) RETURNING *
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(rows)), '[]'::jsonb) INTO deleted FROM rows;
+
+    RETURN jsonb_build_object('created', created, 'upserted', upserted, 'deleted', deleted);
+END;
+$$;
+
+
+-- campaigns dashboard_monthly_performance
+-- Monthly totals across campaigns for /api/dashboard/performance (called via RPC)
+CREATE OR REPLACE FUNCTION dashboard_monthly_performance(
+    p_from date DEFAULT NULL,
+    p_to date DEFAULT NULL,
+    p_platform text DEFAULT NULL,
+    p_campaign_id uuid DEFAULT NULL
+)
+RETURNS TABLE (
+    month date,
+    impressions bigint,
+    clicks bigint,
+    conversions bigint,
+    spend double precision,
+    revenue double precision
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT mp.month,
+           SUM(mp.impressions)::bigint,
+           SUM(mp.clicks)::bigint,
+           SUM(mp.conversions)::bigint,
+           SUM(mp.spend),
+           SUM(mp.revenue)
+    FROM campaigns_monthlyperformance mp
+    JOIN campaigns_campaign c ON c.id = mp.campaign_id
+    WHERE (p_from IS NULL OR mp.month >= p_from)
+      AND (p_to IS NULL OR mp.month <= p_to)
+      AND (p_platform IS NULL OR c.platform = p_platform)
+      AND (p_campaign_id IS NULL OR mp.campaign_id = p_campaign_id)
+    GROUP BY mp.month
+    ORDER BY mp.month;
+$$;
+
+
+-- campaigns 0005_campaign_kpis
+-- Lifetime totals and KPIs on each campaign, kept in step with monthly performance by triggers
+ALTER TABLE campaigns_campaign
+    ADD COLUMN IF NOT EXISTS total_impressions bigint NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS total_clicks bigint NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS total_conversions bigint NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS total_spend double precision NOT NULL DEFAULT 0.0,
+    ADD COLUMN IF NOT EXISTS total_revenue double precision NOT NULL DEFAULT 0.0,
+    ADD COLUMN IF NOT EXISTS ctr double precision NOT NULL DEFAULT 0.0,
+    ADD COLUMN IF NOT EXISTS conversion_rate double precision NOT NULL DEFAULT 0.0,
+    ADD COLUMN IF NOT EXISTS cpc double precision NOT NULL DEFAULT 0.0,
+    ADD COLUMN IF NOT EXISTS cpa double precision NOT NULL DEFAULT 0.0;
+
+-- (kpi, id) indexes back `ordering=<kpi>` keyset pages and min_/max_ filters.
+-- A NULL roi (no performance yet) sorts lowest, so one index serves both directions.
+CREATE INDEX IF NOT EXISTS campaigns_campaign_ctr_id ON campaigns_campaign (ctr, id);
+CREATE INDEX IF NOT EXISTS campaigns_campaign_cvr_id ON campaigns_campaign (conversion_rate, id);
+CREATE INDEX IF NOT EXISTS campaigns_campaign_cpc_id ON campaigns_campaign (cpc, id);
+CREATE INDEX IF NOT EXISTS campaigns_campaign_cpa_id ON campaigns_campaign (cpa, id);
+CREATE INDEX IF NOT EXISTS campaigns_campaign_spent_id ON campaigns_campaign (amount_spent, id);
+CREATE INDEX IF NOT EXISTS campaigns_campaign_revenue_id ON campaigns_campaign (total_revenue, id);
+CREATE INDEX IF NOT EXISTS campaigns_campaign_roi_id ON campaigns_campaign (roi NULLS FIRST, id);
+
+-- Ratios, amount_spent (lifetime spend) and roi (lifetime ROI) follow the totals
+CREATE OR REPLACE FUNCTION campaigns_campaign_derive_kpis()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.ctr := CASE WHEN NEW.total_impressions > 0 THEN NEW.total_clicks * 100.0 / NEW.total_impressions ELSE 0 END;
+    NEW.conversion_rate := CASE WHEN NEW.total_clicks > 0 THEN NEW.total_conversions * 100.0 / NEW.total_clicks ELSE 0 END;
+    NEW.cpc := CASE WHEN NEW.total_clicks > 0 THEN NEW.total_spend / NEW.total_clicks ELSE 0 END;
+    NEW.cpa := CASE WHEN NEW.total_conversions > 0 THEN NEW.total_spend / NEW.total_conversions ELSE 0 END;
+    NEW.amount_spent := NEW.total_spend;
+    NEW.roi := CASE WHEN NEW.total_spend > 0 THEN (NEW.total_revenue - NEW.total_spend) * 100.0 / NEW.total_spend ELSE 0 END;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS campaigns_campaign_derive_kpis ON campaigns_campaign;
+CREATE TRIGGER campaigns_campaign_derive_kpis
+    BEFORE UPDATE OF total_impressions, total_clicks, total_conversions, total_spend, total_revenue ON campaigns_campaign
+    FOR EACH ROW EXECUTE FUNCTION campaigns_campaign_derive_kpis();
+
+-- Statement-level: an upsert of many months issues one UPDATE per campaign.
+-- INSERT ... ON CONFLICT DO UPDATE fires both the insert and the update trigger.
+CREATE OR REPLACE FUNCTION campaigns_performance_kpis()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE campaigns_campaign c SET
+            total_impressions = total_impressions + d.impressions,
+            total_clicks = total_clicks + d.clicks,
+            total_conversions = total_conversions + d.conversions,
+            total_spend = total_spend + d.spend,
+            total_revenue = total_revenue + d.revenue
+        FROM (
+            SELECT campaign_id, sum(impressions) AS impressions, sum(clicks) AS clicks,
+                   sum(conversions) AS conversions, sum(spend) AS spend, sum(revenue) AS revenue
+            FROM new_rows GROUP BY campaign_id
+        ) d
+        WHERE c.id = d.campaign_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE campaigns_campaign c SET
+            total_impressions = total_impressions - d.impressions,
+            total_clicks = total_clicks - d.clicks,
+            total_conversions = total_conversions - d.conversions,
+            total_spend = total_spend - d.spend,
+            total_revenue = total_revenue - d.revenue
+        FROM (
+            SELECT campaign_id, sum(impressions) AS impressions, sum(clicks) AS clicks,
+                   sum(conversions) AS conversions, sum(spend) AS spend, sum(revenue) AS revenue
+            FROM old_rows GROUP BY campaign_id
+        ) d
+        WHERE c.id = d.campaign_id;
+    ELSE
+        UPDATE campaigns_campaign c SET
+            total_impressions = total_impressions + d.impressions,
+            total_clicks = total_clicks + d.clicks,
+            total_conversions = total_conversions + d.conversions,
+            total_spend = total_spend + d.spend,
+            total_revenue = total_revenue + d.revenue
+        FROM (
+            SELECT campaign_id, sum(impressions) AS impressions, sum(clicks) AS clicks,
+                   sum(conversions) AS conversions, sum(spend) AS spend, sum(revenue) AS revenue
+            FROM (
+                SELECT campaign_id, impressions, clicks, conversions, spend, revenue FROM new_rows
+                UNION ALL
+                SELECT campaign_id, -impressions, -clicks, -conversions, -spend, -revenue FROM old_rows
+            ) changes
+            GROUP BY campaign_id
+        ) d
+        WHERE c.id = d.campaign_id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS campaigns_performance_kpis_insert ON campaigns_monthlyperformance;
+DROP TRIGGER IF EXISTS campaigns_performance_kpis_update ON campaigns_monthlyperformance;
+DROP TRIGGER IF EXISTS campaigns_performance_kpis_delete ON campaigns_monthlyperformance;
+CREATE TRIGGER campaigns_performance_kpis_insert AFTER INSERT ON campaigns_monthlyperformance
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION campaigns_performance_kpis();
+CREATE TRIGGER campaigns_performance_kpis_update AFTER UPDATE ON campaigns_monthlyperformance
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION campaigns_performance_kpis();
+CREATE TRIGGER campaigns_performance_kpis_delete AFTER DELETE ON campaigns_monthlyperformance
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION campaigns_performance_kpis();
+
+-- Backfill from existing performance rows (the derive trigger fills in the ratios)
+UPDATE campaigns_campaign SET
+    total_impressions = COALESCE((SELECT SUM(p.impressions) FROM campaigns_monthlyperformance p WHERE p.campaign_id = campaigns_campaign.id), 0),
+    total_clicks = COALESCE((SELECT SUM(p.clicks) FROM campaigns_monthlyperformance p WHERE p.campaign_id = campaigns_campaign.id), 0),
+    total_conversions = COALESCE((SELECT SUM(p.conversions) FROM campaigns_monthlyperformance p WHERE p.campaign_id = campaigns_campaign.id), 0),
+    total_spend = COALESCE((SELECT SUM(p.spend) FROM campaigns_monthlyperformance p WHERE p.campaign_id = campaigns_campaign.id), 0),
+    total_revenue = COALESCE((SELECT SUM(p.revenue) FROM campaigns_monthlyperformance p WHERE p.campaign_id = campaigns_campaign.id), 0)
+WHERE id IN (SELECT campaign_id FROM campaigns_monthlyperformance);
+
+
+-- campaigns 0006_query_indexes
+-- Keyset pagination on (created_at, id), optionally filtered by status and/or platform
+CREATE INDEX IF NOT EXISTS campaigns_created_id_idx ON campaigns_campaign (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS campaigns_status_created_idx ON campaigns_campaign (status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS campaigns_status_platform_idx ON campaigns_campaign (status, platform, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS campaigns_platform_created_idx ON campaigns_campaign (platform, created_at DESC, id DESC);
+-- Dashboard monthly aggregation: index-only scans by month
+CREATE INDEX IF NOT EXISTS campaigns_perf_month_idx ON campaigns_monthlyperformance (month)
+    INCLUDE (campaign_id, impressions, clicks, conversions, spend, revenue, roi);
+
+
+-- campaigns 0007_performance_rollups
+-- Quarterly and yearly totals per campaign, so ?granularity=quarter|year on the performance
+-- endpoints reads only the periods inside the requested window
+CREATE TABLE IF NOT EXISTS campaigns_performancerollup (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    campaign_id uuid NOT NULL REFERENCES campaigns_campaign(id) ON DELETE CASCADE,
+    granularity varchar(10) NOT NULL,
+    period_start date NOT NULL,
+    months integer NOT NULL DEFAULT 0,
+    impressions bigint NOT NULL DEFAULT 0,
+    clicks bigint NOT NULL DEFAULT 0,
+    conversions bigint NOT NULL DEFAULT 0,
+    spend double precision NOT NULL DEFAULT 0.0,
+    revenue double precision NOT NULL DEFAULT 0.0,
+    CONSTRAINT campaigns_rollup_period_uniq UNIQUE (campaign_id, granularity, period_start)
+);
+CREATE INDEX IF NOT EXISTS campaigns_rollup_window_idx ON campaigns_performancerollup (granularity, period_start);
+
+-- Statement-level, like the KPI triggers: each write adds its change to the quarter and year
+-- rows it touches. Campaigns removed by a cascaded delete are skipped (their rollup rows are
+-- gone too), and rows left without months are removed.
+CREATE OR REPLACE FUNCTION campaigns_performance_rollup()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        WITH changes AS (
+            SELECT campaign_id, month, 1 AS months, impressions, clicks, conversions, spend, revenue FROM new_rows
+        ), deltas AS (
+            SELECT changes.campaign_id, g.granularity, date_trunc(g.granularity, changes.month)::date AS period_start,
+                   sum(months) AS months, sum(impressions) AS impressions, sum(clicks) AS clicks,
+                   sum(conversions) AS conversions, sum(spend) AS spend, sum(revenue) AS revenue
+            FROM changes CROSS JOIN (VALUES ('quarter'), ('year')) g(granularity)
+            GROUP BY 1, 2, 3
+        )
+        INSERT INTO campaigns_performancerollup
+            (campaign_id, granularity, period_start, months, impressions, clicks, conversions, spend, revenue)
+        SELECT d.* FROM deltas d
+        WHERE EXISTS (SELECT 1 FROM campaigns_campaign c WHERE c.id = d.campaign_id)
+        ON CONFLICT (campaign_id, granularity, period_start) DO UPDATE SET
+            months = campaigns_performancerollup.months + EXCLUDED.months,
+            impressions = campaigns_performancerollup.impressions + EXCLUDED.impressions,
+            clicks = campaigns_performancerollup.clicks + EXCLUDED.clicks,
+            conversions = campaigns_performancerollup.conversions + EXCLUDED.conversions,
+            spend = campaigns_performancerollup.spend + EXCLUDED.spend,
+            revenue = campaigns_performancerollup.revenue + EXCLUDED.revenue;
+    ELSIF TG_OP = 'DELETE' THEN
+        WITH changes AS (
+            SELECT campaign_id, month, -1 AS months, -impressions AS impressions, -clicks AS clicks,
+                   -conversions AS conversions, -spend AS spend, -revenue AS revenue FROM old_rows
+        ), deltas AS (
+            SELECT changes.campaign_id, g.granularity, date_trunc(g.granularity, changes.month)::date AS period_start,
+                   sum(months) AS months, sum(impressions) AS impressions, sum(clicks) AS clicks,
+                   sum(conversions) AS conversions, sum(spend) AS spend, sum(revenue) AS revenue
+            FROM changes CROSS JOIN (VALUES ('quarter'), ('year')) g(granularity)
+            GROUP BY 1, 2, 3
+        )
+        INSERT INTO campaigns_performancerollup
+            (campaign_id, granularity, period_start, months, impressions, clicks, conversions, spend, revenue)
+        SELECT d.* FROM deltas d
+        WHERE EXISTS (SELECT 1 FROM campaigns_campaign c WHERE c.id = d.campaign_id)
+        ON CONFLICT (campaign_id, granularity, period_start) DO UPDATE SET
+            months = campaigns_performancerollup.months + EXCLUDED.months,
+            impressions = campaigns_performancerollup.impressions + EXCLUDED.impressions,
+            clicks = campaigns_performancerollup.clicks + EXCLUDED.clicks,
+            conversions = campaigns_performancerollup.conversions + EXCLUDED.conversions,
+            spend = campaigns_performancerollup.spend + EXCLUDED.spend,
+            revenue = campaigns_performancerollup.revenue + EXCLUDED.revenue;
+        DELETE FROM campaigns_performancerollup r USING (SELECT DISTINCT campaign_id FROM old_rows) d
+        WHERE r.campaign_id = d.campaign_id AND r.months <= 0;
+    ELSE
+        WITH changes AS (
+            SELECT campaign_id, month, 1 AS months, impressions, clicks, conversions, spend, revenue FROM new_rows
+            UNION ALL
+            SELECT campaign_id, month, -1 AS months, -impressions AS impressions, -clicks AS clicks,
+                   -conversions AS conversions, -spend AS spend, -revenue AS revenue FROM old_rows
+        ), deltas AS (
+            SELECT changes.campaign_id, g.granularity, date_trunc(g.granularity, changes.month)::date AS period_start,
+                   sum(months) AS months, sum(impressions) AS impressions, sum(clicks) AS clicks,
+                   sum(conversions) AS conversions, sum(spend) AS spend, sum(revenue) AS revenue
+            FROM changes CROSS JOIN (VALUES ('quarter'), ('year')) g(granularity)
+            GROUP BY 1, 2, 3
+        )
+        INSERT INTO campaigns_performancerollup
+            (campaign_id, granularity, period_start, months, impressions, clicks, conversions, spend, revenue)
+        SELECT d.* FROM deltas d
+        WHERE EXISTS (SELECT 1 FROM campaigns_campaign c WHERE c.id = d.campaign_id)
+        ON CONFLICT (campaign_id, granularity, period_start) DO UPDATE SET
+            months = campaigns_performancerollup.months + EXCLUDED.months,
+            impressions = campaigns_performancerollup.impressions + EXCLUDED.impressions,
+            clicks = campaigns_performancerollup.clicks + EXCLUDED.clicks,
+            conversions = campaigns_performancerollup.conversions + EXCLUDED.conversions,
+            spend = campaigns_performancerollup.spend + EXCLUDED.spend,
+            revenue = campaigns_performancerollup.revenue + EXCLUDED.revenue;
+        DELETE FROM campaigns_performancerollup r USING (SELECT DISTINCT campaign_id FROM old_rows) d
+        WHERE r.campaign_id = d.campaign_id AND r.months <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS campaigns_performance_rollup_insert ON campaigns_monthlyperformance;
+DROP TRIGGER IF EXISTS campaigns_performance_rollup_update ON campaigns_monthlyperformance;
+DROP TRIGGER IF EXISTS campaigns_performance_rollup_delete ON campaigns_monthlyperformance;
+CREATE TRIGGER campaigns_performance_rollup_insert AFTER INSERT ON campaigns_monthlyperformance
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION campaigns_performance_rollup();
+CREATE TRIGGER campaigns_performance_rollup_update AFTER UPDATE ON campaigns_monthlyperformance
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION campaigns_performance_rollup();
+CREATE TRIGGER campaigns_performance_rollup_delete AFTER DELETE ON campaigns_monthlyperformance
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION campaigns_performance_rollup();
+
+-- Backfill from existing performance rows
+DELETE FROM campaigns_performancerollup;
+INSERT INTO campaigns_performancerollup
+    (campaign_id, granularity, period_start, months, impressions, clicks, conversions, spend, revenue)
+SELECT campaign_id, g.granularity, date_trunc(g.granularity, month)::date, count(*),
+       sum(impressions), sum(clicks), sum(conversions), sum(spend), sum(revenue)
+FROM campaigns_monthlyperformance CROSS JOIN (VALUES ('quarter'), ('year')) g(granularity)
+GROUP BY 1, 2, 3;
+
+-- Totals per quarter or year across campaigns for /api/dashboard/performance?granularity=...
+CREATE OR REPLACE FUNCTION dashboard_period_performance(
+    p_granularity text,
+    p_from date DEFAULT NULL,
+    p_to date DEFAULT NULL,
+    p_platform text DEFAULT NULL,
+    p_campaign_id uuid DEFAULT NULL
+)
+RETURNS TABLE (
+    period_start date,
+    impressions bigint,
+    clicks bigint,
+    conversions bigint,
+    spend double precision,
+    revenue double precision
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT r.period_start,
+           SUM(r.impressions)::bigint,
+           SUM(r.clicks)::bigint,
+           SUM(r.conversions)::bigint,
+           SUM(r.spend),
+           SUM(r.revenue)
+    FROM campaigns_performancerollup r
+    JOIN campaigns_campaign c ON c.id = r.campaign_id
+    WHERE r.granularity = p_granularity
+      AND (p_from IS NULL OR r.period_start >= p_from)
+      AND (p_to IS NULL OR r.period_start <= p_to)
+      AND (p_platform IS NULL OR c.platform = p_platform)
+      AND (p_campaign_id IS NULL OR r.campaign_id = p_campaign_id)
+    GROUP BY r.period_start
+    ORDER BY r.period_start;
+$$;
+
+-- campaigns 0008_dashboardstats_spend_sums
+-- Running spend and revenue sums replace the per-row ROI sum, so the dashboard ROI is weighted by spend
+ALTER TABLE campaigns_dashboardstats
+    ADD COLUMN IF NOT EXISTS spend_sum double precision NOT NULL DEFAULT 0.0,
+    ADD COLUMN IF NOT EXISTS revenue_sum double precision NOT NULL DEFAULT 0.0;
+UPDATE campaigns_dashboardstats SET
+    spend_sum = COALESCE((SELECT SUM(spend) FROM campaigns_monthlyperformance), 0),
+    revenue_sum = COALESCE((SELECT SUM(revenue) FROM campaigns_monthlyperformance), 0);
+ALTER TABLE campaigns_dashboardstats DROP COLUMN IF EXISTS roi_sum, DROP COLUMN IF EXISTS roi_count;
+
+CREATE OR REPLACE FUNCTION apply_dashboard_stats_delta(delta jsonb)
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE campaigns_dashboardstats SET
+        total_campaigns = total_campaigns + COALESCE((delta->>'total_campaigns')::integer, 0),
+        active_campaigns = active_campaigns + COALESCE((delta->>'active_campaigns')::integer, 0),
+        paused_campaigns = paused_campaigns + COALESCE((delta->>'paused_campaigns')::integer, 0),
+        completed_campaigns = completed_campaigns + COALESCE((delta->>'completed_campaigns')::integer, 0),
+        draft_campaigns = draft_campaigns + COALESCE((delta->>'draft_campaigns')::integer, 0),
+        total_budget = total_budget + COALESCE((delta->>'total_budget')::double precision, 0),
+        spend_sum = spend_sum + COALESCE((delta->>'spend_sum')::double precision, 0),
+        revenue_sum = revenue_sum + COALESCE((delta->>'revenue_sum')::double precision, 0),
+        updated_at = NOW()
+    WHERE id = 1;
+$$;
+
+-- Campaign count, budget and lifetime spend/revenue (kept on each campaign by the
+-- KPI triggers) per platform and per status, in one scan of the campaigns table
+CREATE OR REPLACE FUNCTION dashboard_breakdown()
+RETURNS TABLE (
+    dimension text,
+    value text,
+    campaigns bigint,
+    budget double precision,
+    spend double precision,
+    revenue double precision
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT CASE WHEN GROUPING(platform) = 0 THEN 'platform' ELSE 'status' END,
+           CASE WHEN GROUPING(platform) = 0 THEN platform ELSE status END,
+           COUNT(*),
+           SUM(budget),
+           SUM(total_spend),
+           SUM(total_revenue)
+    FROM campaigns_campaign
+    GROUP BY GROUPING SETS ((platform), (status))
+    ORDER BY 1, 2;
+$$;
+
+-- campaigns 0009_job
+BEGIN;
+--
+-- Create model Job
+--
+CREATE TABLE "campaigns_job" ("id" uuid NOT NULL PRIMARY KEY, "kind" varchar(64) NOT NULL, "payload" jsonb NOT NULL, "status" varchar(16) NOT NULL, "attempts" integer NOT NULL CHECK ("attempts" >= 0), "max_attempts" integer NOT NULL CHECK ("max_attempts" >= 0), "run_after" timestamp with time zone NOT NULL, "locked_by" varchar(128) NOT NULL, "locked_until" timestamp with time zone NULL, "result" jsonb NULL, "error" text NOT NULL, "created_at" timestamp with time zone NOT NULL, "updated_at" timestamp with time zone NOT NULL, "finished_at" timestamp with time zone NULL);
+CREATE INDEX "campaigns_job_due_idx" ON "campaigns_job" ("status", "run_after");
+CREATE INDEX "campaigns_job_created_idx" ON "campaigns_job" ("created_at" DESC);
+COMMIT;
+
 -- sessions 0001_initial
 BEGIN;
 --